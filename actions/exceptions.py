@@ -13,11 +13,21 @@ class VnfScaleNotCompleted(Exception):
     pass
 
 
+class VnfScaleNotAllowed(VnfScaleNotCompleted):
+    """The scale action is not allowed in the current state of the ns"""
+    pass
+
+
 class NsDescriptorNotFound(Exception):
     """The ns descriptor not found"""
     pass
 
 
+class VimAccountNotFound(Exception):
+    """The VIM account not found"""
+    pass
+
+
 class NsInstantiationNotCompleted(Exception):
     """The instantiation of the NS failed"""
     pass
@@ -61,3 +71,18 @@ class TranscoderSpectatorsQualityConfigurationFailed(Exception):
 class InvalidTranscoderSpectatorsQualities(Exception):
     """The structure of the spectators qualities is not valid"""
     pass
+
+
+class FaasBootstrapNotReady(Exception):
+    """The IngressUrl of the bootstrap serverless VNF is not available"""
+    pass
+
+
+class FaasVnfNotFound(Exception):
+    """There is no spawned serverless VNF to be terminated"""
+    pass
+
+
+class InvalidExecutionMessage(ValueError):
+    """The execution message is malformed or misses a required field"""
+    pass
@@ -1,13 +1,24 @@
-import logging.config
-import requests
+import logging
 import json
 from httpclient.client import Client
-from settings import LOGGING
+from runtime.logs import configure_logging
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("worker")
 
 
+def get_upstream(bootstrap_ingress_url):
+    """ Get the upstream name (circuit breaker) of the bootstrap serverless VNF of a NS
+
+    Args:
+        bootstrap_ingress_url (str): The IngressUrl of the bootstrap serverless VNF
+
+    Returns:
+        str: the upstream name
+    """
+    return "faas-bootstrap:{}".format(bootstrap_ingress_url)
+
+
 class Action:
     class Operations:
         SPAWN_VCACHE = 'spawn_vcache'
@@ -28,7 +39,8 @@ class Action:
             ns_uuid (str): The uuid of the ns record
             vnfd_uuid (str): The uuid of the VNFd record
         """
-        self.__client = Client()
+        # The client is bound to the upstream of the bootstrap serverless VNF of the NS
+        self.__client = None
         self.osm_host = osm_host
         self.ns_uuid = ns_uuid
         self.vnfd_uuid = vnfd_uuid
@@ -36,6 +48,26 @@ class Action:
 
     def set_bootstrap_ingress_url(self, bootstrap_ingress_url):
         self.bootstrap_ingress_url = bootstrap_ingress_url
+        # Each vCDN NS has its own bootstrap serverless VNF, session and circuit breaker
+        self.__client = Client(upstream=get_upstream(bootstrap_ingress_url))
+
+    def post(self, endpoint, payload):
+        """ Send a request to the bootstrap serverless VNF through its circuit breaker
+
+        The spawn and terminate requests are not idempotent (a new event uuid per attempt), so
+        a request that timed out after it was sent is not resent.
+
+        Args:
+            endpoint (str): The endpoint of the bootstrap serverless VNF
+            payload (dict): The request body
+
+        Returns:
+            obj: a requests object
+
+        Raises:
+            RequestOutcomeUnknown: The request was sent, but its response was not received.
+        """
+        return self.__client.request('POST', endpoint, idempotent=False, json=payload)
 
     def spawn_edge_vcache_vnf(self, event_uuid, ns_name, mid_cache_ip_mgmt_net,
                               vcache_incremental_counter, vdns_ip, vdns_port,
@@ -79,7 +111,7 @@ class Action:
         logger.info(
             '[Request-event-{}] Spawn/scale out the FaaS Edge vCache VNF {}. Send request to '
             'serverless orchestrator: {}'.format(event_uuid, vnfd_name, payload))
-        request = requests.post(endpoint, json=payload)
+        request = self.post(endpoint, payload)
         response_status = request.status_code
         logger.info('[Response-event-{}] Spawn/scale out the FaaS Edge vCache VNF {}. Response was '
                     'retrieved. HTTP status code is {}'.format(event_uuid, vnfd_name,
@@ -121,7 +153,7 @@ class Action:
             '[Request-event-{}] Terminate the FaaS Edge vCache VNF spawned by event {}. Send '
             'request to serverless orchestrator: {}'.format(terminate_event_uuid,
                                                             spawn_event_uuid, payload))
-        request = requests.post(endpoint, json=payload)
+        request = self.post(endpoint, payload)
         response_status = request.status_code
         logger.info('[Response-event-{}] Terminate the FaaS Edge vCache VNF spawned by event {}. '
                     'Response was retrieved. HTTP status code is {}'.format(
@@ -157,7 +189,7 @@ class Action:
         }
         logger.info('[Request-event-{}] Spawn vTranscoder {} on {}. Payload: {}'.format(
             event_uuid, vnfd_name, processor, payload))
-        request = requests.post(endpoint, json=payload)
+        request = self.post(endpoint, payload)
         # request = self.__client.post(endpoint, headers=None, payload=json.dumps(payload))
         response_data = request.text
         response_status = request.status_code
@@ -182,7 +214,7 @@ class Action:
             '[Request-event-{}] Terminate vTranscoder spawned by event {}. Payload: {}'.format(
                 terminate_event_uuid, spawn_event_uuid, payload))
 
-        request = requests.post(endpoint, json=payload)
+        request = self.post(endpoint, payload)
         # request = self.__client.post(endpoint, headers=None, payload=json.dumps(payload))
         response_status = request.status_code
         logger.warning(
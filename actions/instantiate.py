@@ -1,13 +1,88 @@
-from soapi.nsr import Nsr
-from soapi.nsd import Nsd
-from soapi.identity import basic_token
-from settings import OSM_ADMIN_CREDENTIALS, LOGGING
-from actions.exceptions import *
-import logging.config
-
-logging.config.dictConfig(LOGGING)
+import time
+import logging
+from collections import OrderedDict
+from nbiapi.identity import get_bearer_token
+from nbiapi.ns import Ns
+from nbiapi.nsd import Nsd
+from nbiapi.vim_account import VimAccount
+from actions.lifecycle import LifecycleTracker
+from runtime import operations
+from runtime.cache import TtlCache
+from settings import NS_INSTANTIATION
+from runtime.logs import configure_logging
+from actions.exceptions import NsDescriptorNotFound, VimAccountNotFound, \
+    NsInstantiationNotCompleted
+
+configure_logging()
 logger = logging.getLogger("worker")
 
+# The NSD and VIM account catalogs, indexed by name
+catalogs = TtlCache("osm_catalogs", ttl=NS_INSTANTIATION['catalog_ttl'], max_size=8)
+
+
+def index_catalog(records, fields):
+    """ Index the records of a catalog by each of the given fields
+
+    Args:
+        records (list): The catalog records, e.g. the NS descriptors
+        fields (tuple): The fields to be indexed, e.g. ("name", "short-name")
+
+    Returns:
+        dict: the record uuid (`_id`) per field value
+
+    Examples:
+        >>> from actions.instantiate import index_catalog
+        >>> index_catalog([{"_id": "9c4a8f58", "id": "vcdn_nsd", "name": "vCDN"}], ("id", "name"))
+        {'vcdn_nsd': '9c4a8f58', 'vCDN': '9c4a8f58'}
+    """
+    index = {}
+    for record in records:
+        for field in fields:
+            if record.get(field, None) is not None:
+                index.setdefault(record[field], record['_id'])
+    return index
+
+
+def load_nsd_index(token):
+    response = Nsd(token).get_list()
+    if response.status_code != 200:
+        return None
+    return index_catalog(response.json(), ("name", "short-name", "id", "_id"))
+
+
+def load_vim_account_index(token):
+    response = VimAccount(token).get_list()
+    if response.status_code != 200:
+        return None
+    return index_catalog(response.json(), ("name", "_id"))
+
+
+# The loaders of the catalog indexes
+CATALOG_LOADERS = {"nsd": load_nsd_index, "vim_account": load_vim_account_index}
+
+
+def resolve(catalog, name, token):
+    """ Get the uuid of a catalog record given its name from the cached index
+
+    A missing name refreshes the index once, e.g. after the onboarding of a new descriptor.
+
+    Args:
+        catalog (str): The catalog, i.e. nsd or vim_account
+        name (str): The record name (or uuid)
+        token (str): The OSM bearer token
+
+    Returns:
+        str: the uuid of the record or None if it is not found
+    """
+    loader = CATALOG_LOADERS[catalog]
+    index = catalogs.get_or_load(catalog, lambda: loader(token)) or {}
+    if name not in index:
+        index = loader(token)
+        if index is None:
+            return None
+        catalogs.set(catalog, index)
+    return index.get(name, None)
+
 
 class Action:
     def __init__(self, nsd_name, ns_name, vim_account_name):
@@ -21,18 +96,57 @@ class Action:
         self.nsd_name = nsd_name
         self.ns_name = ns_name
         self.vim_account_name = vim_account_name
-        self.__token = basic_token(OSM_ADMIN_CREDENTIALS.get('username'), OSM_ADMIN_CREDENTIALS.get('username'))
+        self.__token = get_bearer_token()
 
     def execute(self):
-        """Execute the instantiation of the NS"""
-        nsd = Nsd(self.__token)
-        nsd_descriptor = nsd.search(self.nsd_name)
-        if not isinstance(nsd_descriptor, dict):
-            raise NsDescriptorNotFound("Failed to find the NS descriptor: `{}` ".format(self.nsd_name))
-
-        ns = Nsr(self.__token)
-        ns_response = ns.instantiate(nsd_descriptor, self.ns_name, self.vim_account_name)
-        if ns_response.status_code != 201:
+        """Submit the instantiation of the NS
+
+        The completion is tracked in the background (see `tracker`), so several
+        instantiations can be in flight.
+
+        Returns:
+            dict: the submitted instantiation, i.e. the NS uuid, the operation uuid and the
+                timings of the resolve and submit phases
+
+        Raises:
+            NsDescriptorNotFound: The NS descriptor is not in the catalog.
+            VimAccountNotFound: The VIM account is not in the catalog.
+            NsInstantiationNotCompleted: The NBI rejected the instantiation.
+        """
+        started_at = time.time()
+        nsd_uuid = resolve("nsd", self.nsd_name, self.__token)
+        if nsd_uuid is None:
+            raise NsDescriptorNotFound(
+                "Failed to find the NS descriptor: `{}` ".format(self.nsd_name))
+        vim_account_uuid = resolve("vim_account", self.vim_account_name, self.__token)
+        if vim_account_uuid is None:
+            raise VimAccountNotFound(
+                "Failed to find the VIM account: `{}` ".format(self.vim_account_name))
+        resolved_at = time.time()
+
+        ns_response = Ns(self.__token).instantiate(nsd_uuid, self.ns_name, vim_account_uuid)
+        if ns_response.status_code not in (200, 201, 202):
             raise NsInstantiationNotCompleted(
                 "Failed to instantiate the NS with name `{}` based on descriptor with name `{}` in "
-                "VIM `{}`".format(self.ns_name, self.nsd_name, self.vim_account_name))
+                "VIM `{}`: HTTP status {}".format(self.ns_name, self.nsd_name,
+                                                  self.vim_account_name, ns_response.status_code))
+        submitted_at = time.time()
+
+        content = ns_response.json()
+        instantiation = {
+            "ns_name": self.ns_name,
+            "ns_uuid": content.get('id', None),
+            "nslcmop_id": content.get('nslcmop_id', None),
+            "started_at": started_at,
+            "submitted_at": submitted_at,
+            "phases": OrderedDict([("resolve", resolved_at - started_at),
+                                   ("submit", submitted_at - resolved_at)]),
+        }
+        logger.info('The instantiation of the NS {} ({}) was submitted in {:.3f} seconds'.format(
+            self.ns_name, instantiation['ns_uuid'], submitted_at - started_at))
+        return instantiation
+
+
+# The instantiations in flight of the running process
+tracker = LifecycleTracker("instantiation", operations.index, NS_INSTANTIATION['timeout'],
+                           completion_phase="deployment")
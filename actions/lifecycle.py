@@ -0,0 +1,185 @@
+import time
+import threading
+import logging
+from nbiapi.identity import get_bearer_token
+from nbiapi.operation import NsLcmOperation
+from runtime import metrics, operations
+from runtime.logs import configure_logging
+from settings import OSM_OPERATIONS_LISTENER, OSM_OPERATIONS_POLL_INTERVAL
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+def fetch_operation_state(operation_uuid):
+    """ Fetch the final state of a NS lifecycle operation through the NBI
+
+    Args:
+        operation_uuid (str): The nslcmop identifier
+
+    Returns:
+        str: the final operation state (e.g. COMPLETED) or None if the operation is in progress
+    """
+    response = NsLcmOperation(get_bearer_token()).get(operation_uuid=operation_uuid)
+    if response.status_code != 200:
+        return None
+    operation_state = response.json().get('operationState', None)
+    return operation_state if operation_state in operations.FINAL_STATES else None
+
+
+class LifecycleTracker:
+    """The NS lifecycle operations in flight (e.g. instantiations), completed by the OSM events.
+
+    The operations are watched in the in-flight operations index, which is updated by the
+    events of the OSM Kafka `ns` topic (e.g. `instantiated`, `terminated`); nothing is polled.
+    An operation without event after the timeout is checked once through the NBI. If the
+    listener of the `ns` topic is disabled, the operations are checked through the NBI every
+    `poll_interval` seconds until the timeout.
+
+    The timings of the phases are recorded in the `ns_<kind>_seconds` timer and the final
+    states in the `ns_<kind>s` counter.
+    """
+
+    def __init__(self, kind, operations_index, timeout, completion_phase="completion",
+                 listening=OSM_OPERATIONS_LISTENER, poll_interval=OSM_OPERATIONS_POLL_INTERVAL,
+                 get_state=fetch_operation_state):
+        """Constructor
+
+        Args:
+            kind (str): The operation kind, e.g. instantiation
+            operations_index (InFlightOperations): The index that receives the OSM events
+            timeout (int): The max seconds to wait the completion event
+            completion_phase (str): The phase from the submission to the completion event,
+                e.g. deployment
+            listening (bool): Complete the operations from the events of the `ns` topic.
+                Otherwise, they are polled through the NBI.
+            poll_interval (int): The seconds between two NBI checks without the listener
+            get_state (callable): Accepts the operation uuid and returns its final state or
+                None if it is in progress
+        """
+        self.kind = kind
+        self.operations_index = operations_index
+        self.timeout = timeout
+        self.completion_phase = completion_phase
+        self.listening = listening
+        self.poll_interval = poll_interval
+        self.get_state = get_state
+        self.pending = {}
+        self.__lock = threading.Lock()
+
+    def track(self, operation):
+        """ Wait the completion of a submitted operation in the background
+
+        Args:
+            operation (dict): The submitted operation: ns_name, ns_uuid, nslcmop_id, started_at,
+                submitted_at and the timings of the previous phases (`phases`)
+        """
+        operation_uuid = operation['nslcmop_id']
+        if operation_uuid is None:
+            logger.warning('The {} of the NS {} has no operation to be tracked'.format(
+                self.kind, operation['ns_name']))
+            return
+        if self.listening:
+            timer = threading.Timer(self.timeout, self.expire, args=(operation_uuid,))
+        else:
+            timer = threading.Timer(min(self.poll_interval, self.timeout), self.poll,
+                                    args=(operation_uuid,))
+        timer.daemon = True
+        with self.__lock:
+            self.pending[operation_uuid] = dict(operation, timer=timer,
+                                                expires_at=time.time() + self.timeout)
+        if self.listening:
+            operations.start_listener(self.operations_index)
+            self.operations_index.register(operation['ns_uuid'], operation_uuid, self.kind)
+            self.operations_index.watch(
+                operation_uuid, lambda state, event: self.complete(operation_uuid, state))
+        timer.start()
+
+    def complete(self, operation_uuid, state):
+        """ Record the end of an operation and its phase timings
+
+        Args:
+            operation_uuid (str): The nslcmop identifier
+            state (str): The final operation state, e.g. COMPLETED, or TIMEOUT
+        """
+        with self.__lock:
+            operation = self.pending.pop(operation_uuid, None)
+        if operation is None:
+            return
+        operation['timer'].cancel()
+        completed_at = time.time()
+        phases = operation['phases']
+        phases[self.completion_phase] = completed_at - operation['submitted_at']
+        phases['total'] = completed_at - operation['started_at']
+        for phase, seconds in phases.items():
+            metrics.observe('ns_{}_seconds'.format(self.kind), seconds, phase=phase)
+        metrics.increment('ns_{}s'.format(self.kind), state=state)
+
+        report = logger.info if state == "COMPLETED" else logger.error
+        report('The {} of the NS {} ({}) ended with {} ({})'.format(
+            self.kind, operation['ns_name'], operation['ns_uuid'], state,
+            ', '.join('{}: {:.3f}s'.format(phase, seconds) for phase, seconds in phases.items())))
+
+    def expire(self, operation_uuid):
+        """ Check once through the NBI an operation without completion event
+
+        Args:
+            operation_uuid (str): The nslcmop identifier
+        """
+        if self.operations_index.unwatch(operation_uuid) is None:
+            return
+        self.complete(operation_uuid, self.check(operation_uuid) or "TIMEOUT")
+
+    def poll(self, operation_uuid):
+        """ Check through the NBI an operation tracked without the listener
+
+        The operation is checked again after `poll_interval` seconds until the timeout.
+
+        Args:
+            operation_uuid (str): The nslcmop identifier
+        """
+        with self.__lock:
+            operation = self.pending.get(operation_uuid, None)
+        if operation is None:
+            return
+        state = self.check(operation_uuid)
+        remaining = operation['expires_at'] - time.time()
+        if state is None and remaining > 0:
+            timer = threading.Timer(min(self.poll_interval, remaining), self.poll,
+                                    args=(operation_uuid,))
+            timer.daemon = True
+            with self.__lock:
+                if operation_uuid not in self.pending:
+                    return
+                self.pending[operation_uuid]['timer'] = timer
+            timer.start()
+            return
+        self.complete(operation_uuid, state or "TIMEOUT")
+
+    def check(self, operation_uuid):
+        """ Get the final state of an operation through the NBI
+
+        Args:
+            operation_uuid (str): The nslcmop identifier
+
+        Returns:
+            str: the final operation state or None if it is in progress or the check failed
+        """
+        try:
+            return self.get_state(operation_uuid)
+        except Exception as ex:
+            logger.warning('Failed to check the {} operation {}: {}'.format(
+                self.kind, operation_uuid, ex))
+            return None
+
+    def snapshot(self):
+        """ Get the operations in flight
+
+        Returns:
+            list: the NS name and uuid, the operation and the elapsed seconds per operation
+        """
+        now = time.time()
+        with self.__lock:
+            return [{"ns_name": operation['ns_name'], "ns_uuid": operation['ns_uuid'],
+                     "nslcmop_id": operation_uuid, "seconds": now - operation['started_at']}
+                    for operation_uuid, operation in self.pending.items()]
@@ -0,0 +1,140 @@
+import json
+from actions.exceptions import InvalidExecutionMessage
+
+# Use a fast JSON backend if any
+try:
+    import orjson
+
+    def loads(value):
+        return orjson.loads(value)
+except ImportError:
+    try:
+        import ujson
+
+        def loads(value):
+            return ujson.loads(value.decode('utf-8', 'ignore'))
+    except ImportError:
+        def loads(value):
+            return json.loads(value.decode('utf-8', 'ignore'))
+
+# The fields that must be set per planning type
+REQUIRED_FIELDS = {
+    "vnf_scale_out": ("ns_id", "vnfd_id", "vnf_index"),
+    "vnf_scale_in": ("ns_id", "vnfd_id", "vnf_index"),
+    "faas_vnf_scale_out": ("ns_id", "ns_name", "vnfd_id"),
+    "faas_vnf_scale_in": ("ns_id", "ns_name", "vnfd_id"),
+    "set_vce_bitrate": ("mac", "value"),
+    "set_vtranscoder_profile": ("ns_name", "vnfd_name", "vnf_index", "value"),
+    "set_vtranscoder_processing_unit": ("ns_name", "vnfd_name", "vnf_index"),
+    "set_vtranscoder_client_profile": ("value",),
+    "ns_instantiate": ("nsd_name", "ns_name", "vim_name"),
+    "ns_terminate": ("ns_id",),
+}
+
+
+class ExecutionMessage:
+    """The fields of a message from ns.instances.exec, extracted once.
+
+    Attributes:
+        raw (dict): The decoded message, e.g. for its re-publication
+        planning (str): The planning type, e.g. vnf_scale_out
+        to_be_applied (bool): If the action must be applied (`analysis.action`)
+        timestamp (str): The `metric.timestamp` of the decision
+        ns_id (str): The NS uuid
+        ns_name (str): The NS name
+        nsd_name (str): The NSD name
+        vnf_index (str): The member VNF index
+        vnfd_id (str): The VNFD uuid
+        vnfd_name (str): The VNFD name
+        vim_type (str): The VIM type
+        vim_name (str): The VIM name
+        vim_tag (str): The VIM tag
+        mac (str): The VDU mac address (vCE)
+        value (any): The suggested value of the action
+
+    Examples:
+        >>> from actions.message import ExecutionMessage
+        >>> message = ExecutionMessage.from_record(b'{"execution": {"planning": "set_vce_bitrate", '
+        ...                                        b'"mac": "fa:16:3e:12", "value": 6000}}')
+        >>> message.validate()
+        >>> message.routing_key
+        'fa:16:3e:12'
+    """
+    __slots__ = ('raw', 'planning', 'to_be_applied', 'timestamp', 'ns_id', 'ns_name', 'nsd_name',
+                 'vnf_index', 'vnfd_id', 'vnfd_name', 'vim_type', 'vim_name', 'vim_tag', 'mac',
+                 'value')
+
+    def __init__(self, raw):
+        """Constructor
+
+        Args:
+            raw (dict): The decoded message
+
+        Raises:
+            InvalidExecutionMessage: The message or one of its sections is not an object.
+        """
+        if not isinstance(raw, dict):
+            raise InvalidExecutionMessage('The execution message is not an object')
+        try:
+            mano = raw.get('mano') or {}
+            ns = mano.get('ns') or {}
+            vnf = mano.get('vnf') or {}
+            vim = mano.get('vim') or {}
+            execution = raw.get('execution') or {}
+            self.planning = execution.get('planning', None)
+            self.mac = execution.get('mac', None)
+            self.value = execution.get('value', None)
+            self.to_be_applied = bool((raw.get('analysis') or {}).get('action', False))
+            self.timestamp = (raw.get('metric') or {}).get('timestamp', None)
+            self.ns_id = ns.get('id', None)
+            self.ns_name = ns.get('name', None)
+            self.nsd_name = ns.get('nsd_name', None)
+            self.vnf_index = vnf.get('index', None)
+            self.vnfd_id = vnf.get('vnfd_id', None)
+            self.vnfd_name = vnf.get('vnfd_name', None)
+            self.vim_type = vim.get('type', None)
+            self.vim_name = vim.get('name', None)
+            self.vim_tag = vim.get('tag', None)
+        except AttributeError:
+            raise InvalidExecutionMessage('A section of the execution message is not an object')
+        self.raw = raw
+
+    @classmethod
+    def from_record(cls, value):
+        """ Decode a Kafka record of ns.instances.exec
+
+        Args:
+            value (bytes): The record value (JSON)
+
+        Returns:
+            ExecutionMessage: the message
+
+        Raises:
+            InvalidExecutionMessage: The record is not a valid JSON object.
+        """
+        try:
+            return cls(loads(value))
+        except InvalidExecutionMessage:
+            raise
+        except ValueError as ex:
+            raise InvalidExecutionMessage('The execution message is not valid JSON: {}'.format(ex))
+
+    def validate(self):
+        """ Check the fields that the planning type requires
+
+        Raises:
+            InvalidExecutionMessage: A required field is missing.
+        """
+        missing = [field for field in REQUIRED_FIELDS.get(self.planning, ())
+                   if getattr(self, field) is None]
+        if missing:
+            raise InvalidExecutionMessage('The {} message misses the fields {}'.format(
+                self.planning, ', '.join(missing)))
+
+    @property
+    def routing_key(self):
+        """str: The key that keeps the actions of the same entity in order (NS uuid, mac or the
+        name of a new NS)"""
+        if self.ns_id is not None:
+            return self.ns_id
+        return self.mac if self.mac is not None else self.ns_name
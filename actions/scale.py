@@ -1,28 +1,46 @@
-import logging.config
+import logging
 from nbiapi.ns import Ns
-from nbiapi.vnfd import Vnfd
-from nbiapi.vnf import Vnf
-from nbiapi.operation import NsLcmOperation
-from nbiapi.identity import bearer_token
-from settings import OSM_ADMIN_CREDENTIALS, LOGGING
-from actions.exceptions import ScalingGroupNotFound, VnfScaleNotCompleted, VnfdUnexpectedStatusCode
-
-logging.config.dictConfig(LOGGING)
+from actions.snapshot import NsSnapshot
+from runtime import operations
+from runtime.cache import TtlCache
+from settings import OSM_DESCRIPTOR_TTL
+from runtime.logs import configure_logging
+from actions.exceptions import ScalingGroupNotFound, VnfScaleNotCompleted, VnfScaleNotAllowed
+
+configure_logging()
 logger = logging.getLogger("worker")
 
+# The scaling group name per VNF descriptor
+scaling_groups_cache = TtlCache("vnfd_scaling_groups", ttl=OSM_DESCRIPTOR_TTL, max_size=256)
+
+
+def prefetch_resources(snapshot, vnfd_uuid):
+    """ Fetch concurrently the NBI resources that a scale action will need
+
+    The VNF descriptor is skipped if its scaling group is cached and the pending operations
+    are skipped if the NS is tracked by the in-flight operations index.
+
+    Args:
+        snapshot (NsSnapshot): The NBI resources of the NS shared in the action
+        vnfd_uuid (str): The uuid of the VNFd record
+    """
+    snapshot.prefetch(
+        vnfd_uuid=vnfd_uuid if scaling_groups_cache.get(vnfd_uuid) is None else None,
+        pending_scale_operations=not operations.index.is_tracked(snapshot.ns_uuid))
+
 
 class Action:
-    def __init__(self, ns_uuid, vnfd_uuid):
+    def __init__(self, ns_uuid, vnfd_uuid, snapshot=None):
         """Constructor
 
         Args:
             ns_uuid (str): The uuid of the ns record
             vnfd_uuid (str): The uuid of the VNFd record
+            snapshot (NsSnapshot, optional): The NBI resources of the NS shared in the action
         """
         self.ns_uuid = ns_uuid
         self.vnfd_uuid = vnfd_uuid
-        self.__token = bearer_token(OSM_ADMIN_CREDENTIALS['username'],
-                                    OSM_ADMIN_CREDENTIALS['password'])
+        self.snapshot = snapshot if snapshot is not None else NsSnapshot(ns_uuid)
         self.scaling_group_name = None
         self.get_scaling_group_if_any()
 
@@ -36,17 +54,12 @@ class Action:
             VnfdUnexpectedStatusCode: The retrieval of the VNF descriptor was failed.
             ScalingGroupNotFound: Not found declared scaling group details in the VNF descriptor.
         """
-        vnfd = Vnfd(self.__token)
-        osm_request = vnfd.get(vnfd_uuid=self.vnfd_uuid)
-
-        # Check the statue of the HTTP request
-        if osm_request.status_code != 200:
-            raise VnfdUnexpectedStatusCode(
-                'The status code `{}` in the retrieval of VNFd details with UUID `{}` is '
-                'not expected'.format(osm_request.status_code, self.vnfd_uuid))
+        self.scaling_group_name = scaling_groups_cache.get(self.vnfd_uuid)
+        if self.scaling_group_name is not None:
+            return
 
         scaling_groups = []
-        response = osm_request.json()
+        response = self.snapshot.get_vnfd(self.vnfd_uuid)
         scaling_group_descriptor = response.get('scaling-group-descriptor', [])
 
         for entry in scaling_group_descriptor:
@@ -56,6 +69,7 @@ class Action:
         if len(scaling_groups):
             # Todo: risky in case of multiple scaling group descriptors
             self.scaling_group_name = scaling_groups[0]
+            scaling_groups_cache.set(self.vnfd_uuid, self.scaling_group_name)
         else:
             raise ScalingGroupNotFound(
                 'The scaling group of the VNFd `{}` has not been defined in the descriptor.'
@@ -73,9 +87,7 @@ class Action:
         Returns:
             bool: True to allow it. Otherwise, False.
         """
-        vnf = Vnf(self.__token)
-        response = vnf.get_list_by_ns(ns_uuid=self.ns_uuid)
-        vnfs_list = response.json()
+        vnfs_list = self.snapshot.get_vnfs()
 
         current_edge_vdus = 1
         for vnf_instance in vnfs_list:
@@ -101,29 +113,27 @@ class Action:
                 If pending action is detected, the new action of same type must be skipped.
 
         """
-        detected = False
+        scale_type = scale_action.upper()
 
-        ns_operation = NsLcmOperation(self.__token)
-        request = ns_operation.get_list()
-        operations_list = request.json()
+        # Lookup in the in-flight operations index, fed by the OSM Kafka `ns` topic
+        if operations.index.is_tracked(self.ns_uuid):
+            return len(operations.index.get_pending(self.ns_uuid, lcm_operation_type="scale",
+                                                    scale_type=scale_type)) > 0
+
+        # Fallback: fetch only the processing scale operations of the NS
+        operations_list = self.snapshot.get_pending_scale_operations()
+        operations.index.track(self.ns_uuid, operations_list)
 
         for operation in operations_list:
-            if operation['nsInstanceId'] != self.ns_uuid:
-                continue
-            if operation['lcmOperationType'] != "scale":
+            # Guard against NBI versions that ignore the query filters
+            if not operations.is_pending_scale(self.ns_uuid, operation):
                 continue
-            if operation['operationState'] == "PROCESSING":
-                action = operation.get('operationParams', {}).get('scaleVnfData', {}).get(
-                    'scaleVnfType', None)
-                if action is None:
-                    continue
-
-                action = action.lower()
-                if action == scale_action:
-                    detected = True
-                    break
+            action = operation.get('operationParams', {}).get('scaleVnfData', {}).get(
+                'scaleVnfType', None)
+            if action is not None and action.upper() == scale_type:
+                return True
 
-        return detected
+        return False
 
     def apply(self, vnf_index, scale_action="scale_out"):
         """ Apply the scaling in or out
@@ -136,6 +146,7 @@ class Action:
             None
 
         Raises:
+            VnfScaleNotAllowed: The scale action is not allowed in the current state of the NS.
             VnfScaleNotCompleted: The scale action in VNF-level was failed.
 
         Examples:
@@ -149,18 +160,18 @@ class Action:
         scale_out = True if scale_action == "scale_out" else False
 
         if not self.allow_scale_action(scale_action=scale_action):
-            raise VnfScaleNotCompleted(
+            raise VnfScaleNotAllowed(
                 'The scaling action of the VNF with index `{}` (part of NS with uuid `{}`) is '
                 'not allowed due to the number of edge vCaches.'.format(vnf_index,
                                                                         self.ns_uuid))
 
         if self.detect_pending_scale_actions(scale_action=scale_action):
-            raise VnfScaleNotCompleted(
+            raise VnfScaleNotAllowed(
                 'The scaling action of the VNF with index `{}` (part of NS with uuid `{}`) is '
                 'not allowed since a pending `{}` was detected.'.format(vnf_index, self.ns_uuid,
                                                                         scale_action))
 
-        network_service = Ns(self.__token)
+        network_service = Ns(self.snapshot.token)
         scale_request = network_service.scale_vnf(ns_uuid=self.ns_uuid, vnf_index=vnf_index,
                                                   scaling_group_name=self.scaling_group_name,
                                                   scale_out=scale_out)
@@ -170,3 +181,9 @@ class Action:
                 'The status code `{}` in the scaling action of the VNF with index `{}` (part '
                 'of NS with uuid `{}`) is not expected. '.format(scale_request.status_code,
                                                                  vnf_index, self.ns_uuid))
+
+        # Block duplicate decisions until the operation is reported in the `ns` topic
+        operation_uuid = scale_request.json().get('id', None)
+        if operation_uuid is not None:
+            operations.index.register(self.ns_uuid, operation_uuid, "scale",
+                                      scale_type=scale_action.upper())
@@ -0,0 +1,142 @@
+import asyncio
+from nbiapi.identity import get_bearer_token
+from nbiapi.operation import NsLcmOperation
+from nbiapi.vnf import Vnf
+from nbiapi.vnfd import Vnfd
+from actions.exceptions import VnfdUnexpectedStatusCode
+
+
+class NsSnapshot:
+    """The NBI resources of a NS, fetched at most once during an action.
+
+    Each resource is fetched lazily on its first use and memoized for the lifetime of the
+    object. Create a new snapshot per action; it is not refreshed.
+
+    Examples:
+        >>> from actions.snapshot import NsSnapshot
+        >>> snapshot = NsSnapshot("07048175-660b-404f-bbc9-5be7581e74de")
+        >>> vnfs_list = snapshot.get_vnfs()
+        >>> vnfs_list is snapshot.get_vnfs()
+        True
+    """
+
+    def __init__(self, ns_uuid):
+        """Constructor
+
+        Args:
+            ns_uuid (str): The uuid of the ns record
+        """
+        self.ns_uuid = ns_uuid
+        self.__token = None
+        self.__vnfs = None
+        self.__vnfds = {}
+        self.__pending_scale_operations = None
+
+    @property
+    def token(self):
+        """str: The bearer token of the OSM admin"""
+        if self.__token is None:
+            self.__token = get_bearer_token()
+        return self.__token
+
+    def prefetch(self, vnfd_uuid=None, pending_scale_operations=False):
+        """ Fetch the VNF records, the VNF descriptor and the pending operations concurrently
+
+        The requests are sent through the pooled async NBI client. The resources that are
+        already memoized are not fetched again.
+
+        Args:
+            vnfd_uuid (str, optional): The uuid of the VNFd record to be fetched
+            pending_scale_operations (bool): Fetch the processing scale operations or not
+
+        Raises:
+            VnfdUnexpectedStatusCode: The retrieval of the VNF descriptor was failed.
+        """
+        # aiohttp is imported on the first prefetch, not at startup (see `warm_up` in worker)
+        from aionbiapi.runner import run
+        run(self.fetch(vnfd_uuid=vnfd_uuid, pending_scale_operations=pending_scale_operations))
+        if vnfd_uuid is not None:
+            self.get_vnfd(vnfd_uuid)
+
+    async def fetch(self, vnfd_uuid=None, pending_scale_operations=False):
+        """ Fetch the missing resources concurrently (coroutine)
+
+        Args:
+            vnfd_uuid (str, optional): The uuid of the VNFd record to be fetched
+            pending_scale_operations (bool): Fetch the processing scale operations or not
+        """
+        from aionbiapi import operation as async_operation, vnf as async_vnf, \
+            vnfd as async_vnfd
+        from aionbiapi.identity import get_bearer_token as get_async_bearer_token
+
+        if self.__token is None:
+            self.__token = await get_async_bearer_token()
+
+        calls = []
+        if self.__vnfs is None:
+            calls.append(("vnfs", async_vnf.Vnf(self.__token).get_list_by_ns(
+                ns_uuid=self.ns_uuid)))
+        if vnfd_uuid is not None and vnfd_uuid not in self.__vnfds:
+            calls.append(("vnfd", async_vnfd.Vnfd(self.__token).get(vnfd_uuid=vnfd_uuid)))
+        if pending_scale_operations and self.__pending_scale_operations is None:
+            calls.append(("operations", async_operation.NsLcmOperation(
+                self.__token).get_list_by_ns(self.ns_uuid, operation_state="PROCESSING",
+                                             lcm_operation_type="scale")))
+        if not calls:
+            return
+
+        responses = await asyncio.gather(*[call for _, call in calls])
+        for (resource, _), response in zip(calls, responses):
+            if resource == "vnfs":
+                self.__vnfs = response.json()
+            elif resource == "operations":
+                self.__pending_scale_operations = response.json()
+            elif response.status_code == 200:
+                self.__vnfds[vnfd_uuid] = response.json()
+
+    def get_vnfs(self):
+        """ Get the VNF records of the NS
+
+        Returns:
+            list: The VNF records
+        """
+        if self.__vnfs is None:
+            vnf = Vnf(self.token)
+            response = vnf.get_list_by_ns(ns_uuid=self.ns_uuid)
+            self.__vnfs = response.json()
+        return self.__vnfs
+
+    def get_vnfd(self, vnfd_uuid):
+        """ Get a VNF descriptor
+
+        Args:
+            vnfd_uuid (str): The uuid of the VNFd record
+
+        Returns:
+            dict: The VNF descriptor
+
+        Raises:
+            VnfdUnexpectedStatusCode: The retrieval of the VNF descriptor was failed.
+        """
+        if vnfd_uuid not in self.__vnfds:
+            vnfd = Vnfd(self.token)
+            response = vnfd.get(vnfd_uuid=vnfd_uuid)
+            if response.status_code != 200:
+                raise VnfdUnexpectedStatusCode(
+                    'The status code `{}` in the retrieval of VNFd details with UUID `{}` is '
+                    'not expected'.format(response.status_code, vnfd_uuid))
+            self.__vnfds[vnfd_uuid] = response.json()
+        return self.__vnfds[vnfd_uuid]
+
+    def get_pending_scale_operations(self):
+        """ Get the scale operations of the NS that are in PROCESSING state
+
+        Returns:
+            list: The ns_lcm_op_occs records
+        """
+        if self.__pending_scale_operations is None:
+            ns_operation = NsLcmOperation(self.token)
+            response = ns_operation.get_list_by_ns(self.ns_uuid, operation_state="PROCESSING",
+                                                   lcm_operation_type="scale")
+            self.__pending_scale_operations = response.json()
+        return self.__pending_scale_operations
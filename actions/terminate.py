@@ -1,26 +1,222 @@
-from soapi.nsr import Nsr
-from soapi.identity import basic_token
-from settings import OSM_ADMIN_CREDENTIALS, LOGGING
-from actions.exceptions import *
-import logging.config
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from nbiapi.identity import get_bearer_token
+from nbiapi.ns import Ns
+from actions import faas_action
+from actions.lifecycle import LifecycleTracker
+from actions.utils import get_vcdn_edges_net_interfaces, get_ip_address
+from actions.vnf_configuration import vdns, vcache
+from httpclient.client import release_upstream
+from influx.queries import get_operations, delete_operation_by_ns
+from plugins.faas_plugin import poll_bootstrap_ingress_url, get_ns_name
+from runtime import metrics, operations
+from utils import generate_event_uuid
+from settings import OSM_IP, VDNS_IP, VDNS_PORT, NS_TERMINATION
+from runtime.logs import configure_logging
+from actions.exceptions import NsTerminationNotCompleted
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("worker")
 
 
+def clean_vdns_from_regular_vnfs(ns_uuid):
+    """ Remove the regular edge vCaches of a terminating vCDN NS from the vDNS
+
+    The HTTP sessions and the circuit breakers of the edge vCaches are released too.
+
+    Args:
+        ns_uuid (str): The NS identifier
+    """
+    instances_number = 0
+    vdns_conf = vdns.Configuration()
+    try:
+        _, edges_interfaces = get_vcdn_edges_net_interfaces(
+            ns_uuid, search_for_mid_cache="vCache_mid_vdu", search_for_edge_cache="vCache_edge_vdu")
+        instances_number = max(edges_interfaces.keys()) + 1
+        for interfaces in edges_interfaces.values():
+            edge_vcache_ip_mgmt_net = get_ip_address(interfaces, '5GMEDIA_MGMT_NET')
+            if edge_vcache_ip_mgmt_net is not None:
+                release_upstream(vcache.get_upstream(edge_vcache_ip_mgmt_net))
+    except Exception as ex:
+        logger.exception("clean_vdns_from_regular_vnfs error: {}".format(ex))
+    finally:
+        for instance_number in range(1, int(instances_number) + 1):
+            vdns_conf.delete_vcache_entry(instance_number)
+            logger.info("Remove the regular Edge vCache VNF with N={} from vDNS VNF. Configuration "
+                        "was sent to vDNS VNF".format(instance_number))
+
+
+def clean_vdns_from_faas_vnfs(instances_number):
+    """ Remove the FaaS edge vCaches of a terminating vCDN NS from the vDNS
+
+    Args:
+        instances_number (int): The number of faas vnfs instances
+    """
+    vdns_conf = vdns.Configuration()
+    for instance_number in range(1, int(instances_number) + 1):
+        try:
+            vdns_conf.delete_faas_vcache_entry(instance_number)
+            logger.info("Remove the FaaS Edge vCache VNF with N={} from vDNS VNF. Configuration "
+                        "was sent to vDNS VNF".format(instance_number))
+        except Exception as ex:
+            logger.error(ex)
+
+
+def terminate_faas_vnfs(ns_uuid, ns_name, faas_operations):
+    """ Terminate the FaaS edge vCaches of a NS through its bootstrap serverless VNF
+
+    Args:
+        ns_uuid (str): The NS identifier
+        ns_name (str): The NS name. If missing, it is fetched from the NBI.
+        faas_operations (list): The spawn operations (event uuid and instance number)
+
+    Returns:
+        dict: the HTTP status (or the error) per spawn event uuid
+    """
+    if ns_name is None:
+        ns_name = get_ns_name(ns_uuid)
+    bootstrap_ingress_url = poll_bootstrap_ingress_url(ns_name, ns_uuid)
+    faas_vnf = faas_action.Action(OSM_IP, ns_uuid, None)
+    faas_vnf.set_bootstrap_ingress_url(bootstrap_ingress_url)
+
+    def terminate(operation):
+        try:
+            return faas_vnf.terminate_edge_vcache(
+                generate_event_uuid(), operation['event_uuid'], ns_name,
+                operation['instance_number'], VDNS_IP, VDNS_PORT)
+        except Exception as ex:
+            logger.error('Failed to terminate the FaaS Edge vCache VNF spawned by event {}: '
+                         '{}'.format(operation['event_uuid'], ex))
+            return '{}'.format(ex)
+
+    workers = min(len(faas_operations), NS_TERMINATION['workers'])
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {operation['event_uuid']: executor.submit(terminate, operation)
+                   for operation in faas_operations}
+    # The bootstrap serverless VNF is removed with the NS
+    release_upstream(faas_action.get_upstream(bootstrap_ingress_url))
+    return {event_uuid: future.result() for event_uuid, future in futures.items()}
+
+
+def run_timed(task):
+    """ Run a cleanup task, measure it and keep its failure
+
+    Args:
+        task (callable): Function without arguments
+
+    Returns:
+        dict: the seconds spent and the error (None on success)
+    """
+    started_at = time.time()
+    error = None
+    try:
+        task()
+    except Exception as ex:
+        logger.exception(ex)
+        error = '{}'.format(ex)
+    return {"seconds": time.time() - started_at, "error": error}
+
+
+def clean_up(ns_uuid, faas_operations, ns_name=None, terminate_faas=False):
+    """ Clean up the resources of a terminating vCDN NS concurrently
+
+    The tasks are the vDNS entries of the regular and of the FaaS edge vCaches, the FaaS
+    edge vCaches (optionally) and the `faas_operations` series of the NS in InfluxDB. They are
+    independent, so they run in parallel; a failed task does not stop the others.
+
+    Args:
+        ns_uuid (str): The NS identifier
+        faas_operations (list): The spawn operations of the FaaS edge vCaches of the NS
+        ns_name (str, optional): The NS name
+        terminate_faas (bool): Terminate the FaaS edge vCaches through the bootstrap VNF
+
+    Returns:
+        OrderedDict: the seconds spent and the error (None on success) per task
+    """
+    tasks = OrderedDict([("vdns_regular", lambda: clean_vdns_from_regular_vnfs(ns_uuid))])
+    if faas_operations:
+        instances_number = max(int(operation['instance_number'] or 0)
+                               for operation in faas_operations)
+        tasks["vdns_faas"] = lambda: clean_vdns_from_faas_vnfs(instances_number)
+        if terminate_faas:
+            tasks["faas_vnfs"] = lambda: terminate_faas_vnfs(ns_uuid, ns_name, faas_operations)
+        tasks["influx"] = lambda: delete_operation_by_ns(ns_uuid)
+
+    with ThreadPoolExecutor(max_workers=min(len(tasks), NS_TERMINATION['workers'])) as executor:
+        futures = OrderedDict((name, executor.submit(run_timed, task))
+                              for name, task in tasks.items())
+    results = OrderedDict((name, future.result()) for name, future in futures.items())
+    for name, result in results.items():
+        metrics.observe('ns_cleanup_seconds', result['seconds'], task=name)
+    return results
+
+
 class Action:
-    def __init__(self, ns_uuid):
+    def __init__(self, ns_uuid, ns_name=None):
         """Constructor
 
         Args:
             ns_uuid (str): The id of the running NS
+            ns_name (str, optional): The name of the running NS
         """
         self.ns_uuid = ns_uuid
-        self.__token = basic_token(OSM_ADMIN_CREDENTIALS.get('username'), OSM_ADMIN_CREDENTIALS.get('username'))
+        self.ns_name = ns_name
+        self.__token = get_bearer_token()
 
     def execute(self):
-        """Execute the instantiation of the NS"""
-        ns = Nsr(self.__token)
-        ns_response = ns.terminate(self.ns_uuid)
-        if ns_response.status_code != 201:
-            raise NsTerminationNotCompleted("Failed to terminate the NS with name `{}`".format(self.ns_uuid))
+        """Terminate the NS and clean up its resources concurrently
+
+        The cleanup starts once the NBI accepts the termination, so that the resources of a
+        NS that keeps running are not removed. The end of the teardown is tracked in the
+        background (see `tracker`).
+
+        Returns:
+            dict: the submitted termination, i.e. the NS uuid, the operation uuid, the timings
+                of the lookup, submit and cleanup phases and the result per cleanup task
+
+        Raises:
+            NsTerminationNotCompleted: The NBI rejected the termination.
+        """
+        started_at = time.time()
+        # Read before the cleanup tasks, since one of them drops the series
+        faas_operations = get_operations(self.ns_uuid)
+        looked_up_at = time.time()
+
+        ns_response = Ns(self.__token).terminate(ns_uuid=self.ns_uuid)
+        if ns_response.status_code not in (200, 201, 202):
+            raise NsTerminationNotCompleted(
+                "Failed to terminate the NS with uuid `{}`: HTTP status {}".format(
+                    self.ns_uuid, ns_response.status_code))
+        submitted_at = time.time()
+
+        cleanup = clean_up(self.ns_uuid, faas_operations, ns_name=self.ns_name,
+                           terminate_faas=True)
+        cleaned_at = time.time()
+
+        termination = {
+            "ns_name": self.ns_name,
+            "ns_uuid": self.ns_uuid,
+            # The body of the accepted termination is the operation record, e.g. {"id": ...}
+            "nslcmop_id": ns_response.json().get('id', None),
+            "started_at": started_at,
+            "submitted_at": submitted_at,
+            "phases": OrderedDict([("lookup", looked_up_at - started_at),
+                                   ("submit", submitted_at - looked_up_at),
+                                   ("cleanup", cleaned_at - submitted_at)]),
+            "cleanup": cleanup,
+        }
+        failed = [name for name, result in cleanup.items() if result['error'] is not None]
+        logger.info('The termination of the NS {} was submitted and its resources were cleaned up '
+                    'in {:.3f} seconds ({}){}'.format(
+                        self.ns_uuid, cleaned_at - started_at,
+                        ', '.join('{}: {:.3f}s'.format(name, result['seconds'])
+                                  for name, result in cleanup.items()),
+                        '. Failed tasks: {}'.format(', '.join(failed)) if failed else ''))
+        return termination
+
+
+# The terminations in flight of the running process
+tracker = LifecycleTracker("termination", operations.index, NS_TERMINATION['timeout'],
+                           completion_phase="teardown")
@@ -1,16 +1,15 @@
-from nbiapi.identity import bearer_token
-from nbiapi.vnf import Vnf
-from settings import OSM_ADMIN_CREDENTIALS
+from actions.snapshot import NsSnapshot
 
 
 def get_vcdn_net_interfaces(ns_uuid, search_for_mid_cache="vCache-mid-vdu",
-                            search_for_edge_cache="vCache-edge-vdu"):
+                            search_for_edge_cache="vCache-edge-vdu", snapshot=None):
     """ Get the network interfaces of scaled VNF as well as the current count-index
 
     Args:
         ns_uuid (str): The NS uuid, in which the scaled VNF belongs to
         search_for_mid_cache (str): Search for the Mid vCache by given explicit name
         search_for_edge_cache (str): Search for scaled Edge vCache by given explicit name
+        snapshot (NsSnapshot, optional): The NBI resources of the NS shared in the action
 
     Returns:
         tuple(dict, int): The details of the VNF interfaces including the VDU index in the VNF
@@ -62,53 +61,71 @@ def get_vcdn_net_interfaces(ns_uuid, search_for_mid_cache="vCache-mid-vdu",
             <int|1>
         )
     """
-    vdus_list = []
     interfaces = {"mid": None, "edge": None}
+    interfaces['mid'], edges_interfaces_all = get_vcdn_edges_net_interfaces(
+        ns_uuid, search_for_mid_cache=search_for_mid_cache,
+        search_for_edge_cache=search_for_edge_cache, snapshot=snapshot)
+
+    # Keep the VDU with the greatest count-index
+    count_index = max(edges_interfaces_all.keys())
+    interfaces['edge'] = edges_interfaces_all[count_index]
+    return interfaces, count_index
+
+
+def get_vcdn_edges_net_interfaces(ns_uuid, search_for_mid_cache="vCache-mid-vdu",
+                                  search_for_edge_cache="vCache-edge-vdu", snapshot=None):
+    """ Get the network interfaces of the Mid vCache and of all the Edge vCaches
+
+    Args:
+        ns_uuid (str): The NS uuid
+        search_for_mid_cache (str): Search for the Mid vCache by given explicit name
+        search_for_edge_cache (str): Search for the Edge vCaches by given explicit name
+        snapshot (NsSnapshot, optional): The NBI resources of the NS shared in the action
+
+    Returns:
+        tuple(dict, dict): The interfaces of the Mid vCache and the interfaces of the Edge
+            vCaches per VDU count-index, e.g. ({"cache": {...}, ...}, {0: {"user": {...}, ...}})
+    """
+    vdus_list = []
+    mid_interfaces = None
     edges_interfaces_all = {}
-    count_index = None
 
     # Fetch the VNFs by given NS instance
-    token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'),
-                         OSM_ADMIN_CREDENTIALS.get('password'))
-    vnf = Vnf(token)
-    response = vnf.get_list_by_ns(ns_uuid=ns_uuid)
-    vnfs_list = response.json()
+    if snapshot is None:
+        snapshot = NsSnapshot(ns_uuid)
+    vnfs_list = snapshot.get_vnfs()
 
     # Keep the VDUs details
     for vnf_instance in vnfs_list:
         vdus_list += vnf_instance.get("vdur", [])
 
-    # Discover the interfaces of the proper scaled Edge VNF and Mid vCache
+    # Discover the interfaces of the Edge VNFs and Mid vCache
     for vdu in vdus_list:
         # Get Mid vCache net details
         if vdu.get('vdu-id-ref', None) is not None and \
                 vdu['vdu-id-ref'] == search_for_mid_cache and \
                 vdu.get('count-index', None) == 0:
-            interfaces['mid'] = format_vdu_interfaces(vdu.get('interfaces', []))
-
-        # Get Edge vCache net details (the new one)
+            mid_interfaces = format_vdu_interfaces(vdu.get('interfaces', []))
 
+        # Get Edge vCache net details
         if vdu.get('vdu-id-ref', None) is not None and \
                 vdu['vdu-id-ref'] == search_for_edge_cache and \
-                vdu.get('count-index', None) >= 0:
-            edges_interfaces_all[str(vdu['count-index'])] = format_vdu_interfaces(
+                vdu.get('count-index', -1) >= 0:
+            edges_interfaces_all[int(vdu['count-index'])] = format_vdu_interfaces(
                 vdu.get('interfaces', []))
 
-    # Keep the VDU with the greatest count-index
-    latest_vdu_index = max([int(k) for k in list(edges_interfaces_all.keys())])
-    count_index = latest_vdu_index
-    interfaces['edge'] = edges_interfaces_all[str(latest_vdu_index)]
-    return interfaces, count_index
+    return mid_interfaces, edges_interfaces_all
 
 
 def get_faas_vcdn_net_interfaces(ns_uuid, search_for_mid_cache="vCache_mid_vdu",
-                            search_for_edge_cache="vCache_edge_vdu"):
+                            search_for_edge_cache="vCache_edge_vdu", snapshot=None):
     """ Get the network interfaces of the VNF
 
     Args:
         ns_uuid (str): The NS uuid, in which the scaled VNF belongs to
         search_for_mid_cache (str): Search for the Mid vCache by given explicit name
         search_for_edge_cache (str): Search for scaled Edge vCache by given explicit name
+        snapshot (NsSnapshot, optional): The NBI resources of the NS shared in the action
 
     Returns:
         dict: The details of the VNF interfaces
@@ -145,11 +162,9 @@ def get_faas_vcdn_net_interfaces(ns_uuid, search_for_mid_cache="vCache_mid_vdu",
     count_index = None
 
     # Fetch the VNFs by given NS instance
-    token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'),
-                         OSM_ADMIN_CREDENTIALS.get('password'))
-    vnf = Vnf(token)
-    response = vnf.get_list_by_ns(ns_uuid=ns_uuid)
-    vnfs_list = response.json()
+    if snapshot is None:
+        snapshot = NsSnapshot(ns_uuid)
+    vnfs_list = snapshot.get_vnfs()
 
     # Keep the VDUs details
     for vnf_instance in vnfs_list:
@@ -173,6 +188,19 @@ def get_faas_vcdn_net_interfaces(ns_uuid, search_for_mid_cache="vCache_mid_vdu",
     return interfaces
 
 
+def get_ip_address(interfaces, network):
+    """ Get the IPv4 of a VDU in a network
+
+    Args:
+        interfaces (dict): The VDU interfaces per network
+        network (str): The network name, e.g. 5GMEDIA_MGMT_NET
+
+    Returns:
+        str: the IPv4 if any. Otherwise, None.
+    """
+    return (interfaces or {}).get(network, {}).get('ip-address', None)
+
+
 def format_vdu_interfaces(interfaces_list):
     """ Convert the list of VDU interfaces in a dict using the name of the interfaces as keys
 
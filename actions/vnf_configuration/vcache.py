@@ -1,12 +1,32 @@
 import json
-import logging.config
-from settings import LOGGING
+import time
+import socket
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from settings import VCACHE_CONFIGURATION
+from runtime.logs import configure_logging
 from httpclient.client import Client as HttpClient
 from actions.exceptions import vCacheConfigurationFailed
+from runtime import metrics
+from runtime.retry import backoff_delay
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger('worker')
 
+VCACHE_PORT = 8888
+
+
+def get_upstream(edge_vcache_ip_mgmt_network):
+    """ Get the upstream name (HTTP session and circuit breaker) of an edge vCache
+
+    Args:
+        edge_vcache_ip_mgmt_network (str): The IP of the Edge vCache in the Management Network
+
+    Returns:
+        str: the upstream name, e.g. "vcache:192.168.111.29"
+    """
+    return "vcache:{}".format(edge_vcache_ip_mgmt_network)
+
 
 class Configuration:
     def __init__(self, edge_vcache_ip_mgmt_network, mid_vcache_ip_cache_network):
@@ -16,10 +36,28 @@ class Configuration:
             edge_vcache_ip_mgmt_network (str): The IP of the Edge vCache in the Management Network
             mid_vcache_ip_cache_network (str): The IP of the Mid vCache in the Cache Network
         """
-        self.__client = HttpClient(verify_ssl_cert=False)
+        self.__client = HttpClient(verify_ssl_cert=False,
+                                   upstream=get_upstream(edge_vcache_ip_mgmt_network))
         self.ip_mgmt_network = edge_vcache_ip_mgmt_network
         self.ip_cache_network = mid_vcache_ip_cache_network
-        self.port = "8888"
+        self.port = str(VCACHE_PORT)
+
+    def is_ready(self, timeout=2):
+        """ Check if the configuration API of the edge vCache accepts connections
+
+        Args:
+            timeout (float): The connect timeout in seconds
+
+        Returns:
+            bool: True if the vCache is ready. Otherwise, False.
+        """
+        try:
+            connection = socket.create_connection((self.ip_mgmt_network, int(self.port)),
+                                                  timeout=timeout)
+            connection.close()
+            return True
+        except (OSError, ValueError):
+            return False
 
     def apply(self, vcache_incremental_counter):
         """ Apply the day 1/2 configuration after vCache instantiation
@@ -64,7 +102,88 @@ class Configuration:
         if int(request.status_code) != 200:
             raise vCacheConfigurationFailed(
                 "Failed to set the day 1, 2 configuration for vCache with N={}. The MGMT_NET was "
-                "{} while the CACHE_NET was {}".format(self.ip_mgmt_network, self.ip_cache_network,
-                                                       vcache_incremental_counter))
+                "{} while the CACHE_NET was {}".format(vcache_incremental_counter,
+                                                       self.ip_mgmt_network, self.ip_cache_network))
 
         return request
+
+
+def configure(edge_vcache_ip_mgmt_network, mid_vcache_ip_cache_network,
+              vcache_incremental_counter, deadline=None):
+    """ Apply the day 1/2 configuration of an edge vCache, retrying until the deadline
+
+    The configuration is sent as soon as the vCache accepts connections. The failed
+    attempts are retried with exponential backoff.
+
+    Args:
+        edge_vcache_ip_mgmt_network (str): The IP of the Edge vCache in the Management Network
+        mid_vcache_ip_cache_network (str): The IP of the Mid vCache in the Cache Network
+        vcache_incremental_counter (int): incremental integer for each vCache edge
+        deadline (float, optional): The epoch after which no attempt is made. By default,
+            the `deadline` seconds of the VCACHE_CONFIGURATION setting from now.
+
+    Returns:
+        bool: True for completion. Otherwise, False.
+    """
+    started_at = time.time()
+    if deadline is None:
+        deadline = started_at + VCACHE_CONFIGURATION['deadline']
+
+    vcache_conf = Configuration(edge_vcache_ip_mgmt_network, mid_vcache_ip_cache_network)
+    attempt = 0
+    while time.time() < deadline:
+        if not vcache_conf.is_ready():
+            time.sleep(min(VCACHE_CONFIGURATION['readiness_interval'],
+                           max(0, deadline - time.time())))
+            continue
+
+        attempt += 1
+        try:
+            vcache_conf.apply(vcache_incremental_counter)
+            logger.info(
+                "Edge vCache VNF with IP `{}` (MGMT network) has been configured wrt the mid "
+                "vCache VNF with IP `{}` (CACHE network) and index `{}` in {:.1f} seconds ({} "
+                "attempts).".format(edge_vcache_ip_mgmt_network, mid_vcache_ip_cache_network,
+                                    vcache_incremental_counter, time.time() - started_at,
+                                    attempt))
+            metrics.observe('vcache_configuration_seconds', time.time() - started_at)
+            return True
+        except Exception as ex:
+            logger.warning("vCache configuration: Attempt #{} failed: {}".format(attempt, ex))
+        time.sleep(min(backoff_delay(attempt, VCACHE_CONFIGURATION['base_delay'],
+                                     VCACHE_CONFIGURATION['max_delay']),
+                       max(0, deadline - time.time())))
+
+    logger.error("The edge vCache VNF with IP `{}` (MGMT network) was not configured until its "
+                 "deadline".format(edge_vcache_ip_mgmt_network))
+    metrics.increment('vcache_configuration_failed')
+    return False
+
+
+def configure_all(targets, deadline=None):
+    """ Apply the day 1/2 configuration of several edge vCaches concurrently
+
+    Args:
+        targets (list): Tuples of (edge vCache IP in MGMT network, mid vCache IP in CACHE
+            network, vcache_incremental_counter)
+        deadline (float, optional): The epoch after which no attempt is made
+
+    Returns:
+        dict: The completion per edge vCache IP in MGMT network
+
+    Examples:
+        >>> from actions.vnf_configuration import vcache
+        >>> vcache.configure_all([("192.168.111.31", "192.168.253.12", 1),
+        ...                       ("192.168.111.32", "192.168.253.12", 2)])
+        {'192.168.111.31': True, '192.168.111.32': True}
+    """
+    if deadline is None:
+        deadline = time.time() + VCACHE_CONFIGURATION['deadline']
+    if not targets:
+        return {}
+
+    workers = min(len(targets), VCACHE_CONFIGURATION['workers'])
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {target[0]: executor.submit(configure, target[0], target[1], target[2],
+                                              deadline) for target in targets}
+    return {ip: future.result() for ip, future in futures.items()}
@@ -1,5 +1,5 @@
 from settings import KAFKA_CONFIGURATION_TOPIC
-from utils import init_producer
+from utils import publish_message, get_configuration_key
 
 
 class Configuration:
@@ -33,19 +33,11 @@ class Configuration:
             >>> configuration.set_bitrate(bitrate)
 
         """
-        completed = True
         message = {
             "mac": self.mac,
             "action": {'bitrate': bitrate}
         }
 
-        kafka_producer = init_producer()
-        operation = kafka_producer.send(KAFKA_CONFIGURATION_TOPIC, value=message,
-                                        key=self.action_key)
-        try:
-            operation.get(timeout=5)
-        except Exception as ex:
-            completed = False
-        finally:
-            kafka_producer.close()
-            return completed
+        completed = publish_message(KAFKA_CONFIGURATION_TOPIC, message,
+                                    key=get_configuration_key(self.mac, self.action_key))
+        return completed
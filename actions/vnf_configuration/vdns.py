@@ -1,10 +1,11 @@
 import json
-import logging.config
-from settings import LOGGING, VDNS_IP
+import logging
+from settings import VDNS_IP
+from runtime.logs import configure_logging
 from httpclient.client import Client as HttpClient
 from actions.exceptions import VdnsConfigurationFailed
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("worker")
 
 
@@ -13,7 +14,7 @@ class Configuration:
         """
         Constructor
         """
-        self.__client = HttpClient(verify_ssl_cert=False)
+        self.__client = HttpClient(verify_ssl_cert=False, upstream="vdns")
         self.vdns_ip = VDNS_IP
         self.vdns_port = "9999"
         self.headers = {"X-Api-Key": "secret", "Content-Type": "application/json"}
@@ -1,5 +1,74 @@
-from settings import KAFKA_CONFIGURATION_TOPIC
-from utils import init_producer
+import json
+import threading
+import logging
+from settings import KAFKA_CONFIGURATION_TOPIC, KAFKA_SERVER, VTRANSCODER_STATE
+from runtime.logs import configure_logging
+from utils import publish_message, init_listener, get_configuration_key
+from runtime import metrics
+from runtime.cache import TtlCache
+
+configure_logging()
+logger = logging.getLogger('worker')
+
+# The last applied configuration per (ns_name, vnfd_name, vnf_index, kind)
+applied_state = TtlCache("vtranscoder_state", ttl=VTRANSCODER_STATE['ttl'],
+                         max_size=VTRANSCODER_STATE['max_size'])
+seeding_lock = threading.Lock()
+seeded = threading.Event()
+
+
+def get_applied_values(message):
+    """ Get the configurations that a configuration message applies
+
+    Args:
+        message (dict): A configuration message of a vTranscoder
+
+    Returns:
+        dict: The applied value per kind ("profile", "placement")
+    """
+    values = {}
+    action_params = message.get('action_params', None) or {}
+    if isinstance(action_params, dict) and action_params.get('produce_profiles') is not None:
+        values["profile"] = tuple(action_params['produce_profiles'])
+    if message.get('invoker-selector', None) is not None:
+        values["placement"] = message['invoker-selector']
+    return values
+
+
+def seed_applied_state(topic=VTRANSCODER_STATE['seed_topic']):
+    """ Load the last applied configurations from a compacted Kafka topic, once per process
+
+    Args:
+        topic (str): The compacted topic of the configuration messages. Empty to disable.
+    """
+    if not topic or seeded.is_set():
+        return
+    with seeding_lock:
+        if seeded.is_set():
+            return
+        loaded = 0
+        try:
+            consumer = init_listener(KAFKA_SERVER, topic, auto_offset_reset='earliest',
+                                     consumer_timeout_ms=VTRANSCODER_STATE['seed_timeout'] * 1000)
+            try:
+                for record in consumer:
+                    try:
+                        message = json.loads(record.value.decode('utf-8', 'ignore'))
+                        entity = (message['ns_name'], message['vnf_name'],
+                                  '{}'.format(message['vnf_index']))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue
+                    for kind, value in get_applied_values(message).items():
+                        applied_state.set(entity + (kind,), value)
+                        loaded += 1
+            finally:
+                consumer.close()
+            logger.info('The state of {} vTranscoder configurations was loaded from the '
+                        'topic {}'.format(loaded, topic))
+        except Exception as ex:
+            logger.error('Failed to load the vTranscoder state from the topic {}: {}'.format(
+                topic, ex))
+        seeded.set()
 
 
 class Configuration:
@@ -21,6 +90,29 @@ class Configuration:
             'vnf_name': self.vnfd_name,
             'vnf_index': '{}'.format(self.vnf_index)
         }
+        self.key = get_configuration_key('{}/{}'.format(self.ns_name, self.vnf_index),
+                                         self.action_key)
+
+    def publish(self, kind, value):
+        """ Publish the configuration message, unless the same value is already applied
+
+        Args:
+            kind (str): The kind of the configuration, e.g. "profile"
+            value (any): The configured value, e.g. the tuple of the profiles
+
+        Returns:
+            bool: If the message published in kafka (or it was already applied) or not
+        """
+        seed_applied_state()
+        key = (self.ns_name, self.vnfd_name, '{}'.format(self.vnf_index), kind)
+        if applied_state.get(key) == value:
+            metrics.increment('vtranscoder_configuration_suppressed', kind=kind)
+            return True
+
+        completed = publish_message(KAFKA_CONFIGURATION_TOPIC, self.action, key=self.key)
+        if completed:
+            applied_state.set(key, value)
+        return completed
 
     def set_transcoder_profile(self, t_qualities):
         """ Compose the configuration message to be sent on Kafka bus
@@ -58,7 +150,6 @@ class Configuration:
             True
 
         """
-        completed = True
         qualities = list(t_qualities)
 
         # Append the profiles, proposed by the CNO
@@ -72,16 +163,8 @@ class Configuration:
         }
         self.action["action_params"] = action_parameters
 
-        kafka_producer = init_producer()
-        operation = kafka_producer.send(KAFKA_CONFIGURATION_TOPIC, value=self.action,
-                                        key=self.action_key)
-        try:
-            operation.get(timeout=5)
-        except Exception:
-            completed = False
-        finally:
-            kafka_producer.close()
-            return completed
+        completed = self.publish("profile", tuple(qualities))
+        return completed
 
     def apply_placement(self, processor="cpu"):
         """ Force vtranscoder placement: CPU vs GPU and vice versa.
@@ -116,7 +199,6 @@ class Configuration:
             True
 
         """
-        completed = True
         gpu_node = "0" if processor == "cpu" else "1"
         action_antiaffinity = "true"
 
@@ -126,16 +208,8 @@ class Configuration:
         action_parameters["gpu_node"] = gpu_node
         self.action["action_params"] = action_parameters
 
-        kafka_producer = init_producer()
-        operation = kafka_producer.send(KAFKA_CONFIGURATION_TOPIC, value=self.action,
-                                        key=self.action_key)
-        try:
-            operation.get(timeout=5)
-        except Exception:
-            completed = False
-        finally:
-            kafka_producer.close()
-            return completed
+        completed = self.publish("placement", processor)
+        return completed
 
     def set_spectator_quality(self, cpu=True):
         """
@@ -149,7 +223,6 @@ class Configuration:
         Returns:
 
         """
-        completed = True
         processor = "cpu" if cpu else "gpu"
 
         configuration_message = {
@@ -166,13 +239,5 @@ class Configuration:
 
         self.action["action_params"] = configuration_message
 
-        kafka_producer = init_producer()
-        operation = kafka_producer.send(KAFKA_CONFIGURATION_TOPIC, value=self.action,
-                                        key=self.action_key)
-        try:
-            operation.get(timeout=5)
-        except Exception:
-            completed = False
-        finally:
-            kafka_producer.close()
-            return completed
+        completed = publish_message(KAFKA_CONFIGURATION_TOPIC, self.action, key=self.key)
+        return completed
@@ -1,5 +1,191 @@
-from settings import KAFKA_SPECTATOR_CONFIGURATION_TOPIC
-from utils import init_producer
+import time
+import threading
+import logging
+from collections import OrderedDict
+from settings import KAFKA_SPECTATOR_CONFIGURATION_TOPIC, SPECTATORS_PUBLISHING
+from utils import publish_message, get_configuration_key
+from runtime import metrics
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+class DeltaPublisher:
+    """Publish the changes of the spectators qualities, coalesced over a short window.
+
+    The last published quality is kept per (client_id, transcoder_id). A decision queues only
+    its changed qualities and returns; the first change of a window starts a timer that
+    publishes all the changes queued within the window, so one message carries them all. The
+    changes that fail to be published are queued again, unless newer ones replaced them.
+
+    Examples:
+        >>> from actions.vtranscoder_spectators import DeltaPublisher
+        >>> publisher = DeltaPublisher("ns.spectators.configuration", window=0.2)
+        >>> publisher.publish([{"client_id": "dfa65ec7", "timestamp": 1558363628608378,
+        ...                     "use_these_qualities": [{"transcoder_id": "1", "quality_id": 0,
+        ...                                              "skip_frames": 1}]}])
+        True
+    """
+
+    def __init__(self, topic, window=0.2, compression_type=None, max_entries=100000,
+                 send=publish_message):
+        """Constructor
+
+        Args:
+            topic (str): The Kafka topic of the spectators configuration
+            window (float): The seconds that the changes are coalesced before their publication
+            compression_type (str, optional): The compression of the messages, e.g. "gzip"
+            max_entries (int): The max number of the kept qualities (oldest are evicted)
+            send (callable): Publishes a message given the topic, the value, the key and the
+                compression type. Default is `publish_message`.
+        """
+        self.topic = topic
+        self.window = window
+        self.compression_type = compression_type
+        self.max_entries = max_entries
+        self.send = send
+        self.__published = OrderedDict()
+        self.__pending = OrderedDict()
+        self.__timer = None
+        self.__lock = threading.Lock()
+
+    def get_changes(self, clients):
+        """ Keep the qualities of the clients that differ from the published or pending ones
+
+        Args:
+            clients (list): The clients of the spectators profile
+
+        Returns:
+            dict: The changed qualities per (client_id, transcoder_id)
+        """
+        changes = OrderedDict()
+        for client in clients:
+            client_id = client.get('client_id', None)
+            for quality in client.get('use_these_qualities', []):
+                key = (client_id, quality.get('transcoder_id', None))
+                value = (quality.get('quality_id', None), quality.get('skip_frames', None))
+                current = self.__pending.get(key, None)
+                if current is None:
+                    current = self.__published.get(key, None)
+                if current is None or current[0] != value:
+                    changes[key] = (value, client.get('timestamp', None))
+        return changes
+
+    def publish(self, clients):
+        """ Queue the changed qualities of the clients for the publication of the window
+
+        Args:
+            clients (list): The clients of the spectators profile
+
+        Returns:
+            bool: True, the changes are published asynchronously
+        """
+        with self.__lock:
+            changes = self.get_changes(clients)
+            unchanged = sum(len(client.get('use_these_qualities', []))
+                            for client in clients) - len(changes)
+            if unchanged:
+                metrics.increment('spectators_qualities_unchanged', value=unchanged)
+            if changes:
+                self.__pending.update(changes)
+                self.schedule()
+        return True
+
+    def schedule(self):
+        """Start the timer of the window, unless it is running (the lock must be held)"""
+        if self.__timer is None:
+            self.__timer = threading.Timer(self.window, self.flush)
+            self.__timer.daemon = True
+            self.__timer.start()
+
+    def pending(self):
+        """ Get the number of the queued changes
+
+        Returns:
+            int: the number of the changed qualities waiting for their publication
+        """
+        with self.__lock:
+            return len(self.__pending)
+
+    def flush(self):
+        """ Publish the queued changes, one message per key
+
+        Returns:
+            bool: If all the changes published in kafka or not (True if nothing was queued)
+        """
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+            pending, self.__pending, self.__timer = self.__pending, OrderedDict(), None
+
+        completed = True
+        for key, qualities in split_per_key(pending).items():
+            if not self.send(self.topic, {"clients": compose_clients(qualities)}, key=key,
+                             compression_type=self.compression_type):
+                completed = False
+                logger.warning('Failed to publish {} spectators qualities. They will be '
+                               'published with the next changes.'.format(len(qualities)))
+                metrics.increment('spectators_qualities_failed', value=len(qualities))
+                with self.__lock:
+                    for entry, value in qualities.items():
+                        # The newer changes of a quality replace the failed one
+                        self.__pending.setdefault(entry, value)
+                    self.schedule()
+                continue
+            metrics.increment('spectators_qualities_published', value=len(qualities))
+            with self.__lock:
+                for entry, (value, _) in qualities.items():
+                    self.__published.pop(entry, None)
+                    self.__published[entry] = (value, time.time())
+                while len(self.__published) > self.max_entries:
+                    self.__published.popitem(last=False)
+        return completed
+
+
+def split_per_key(qualities):
+    """ Split the qualities per message key, so that each transcoder gets its changes in order
+
+    Args:
+        qualities (dict): The (quality_id, skip_frames) and the timestamp per (client_id,
+            transcoder_id)
+
+    Returns:
+        dict: The qualities per message key (a single message without key in legacy mode)
+    """
+    messages = OrderedDict()
+    for (client_id, transcoder_id), value in qualities.items():
+        key = get_configuration_key('{}'.format(transcoder_id))
+        messages.setdefault(key, OrderedDict())[(client_id, transcoder_id)] = value
+    return messages
+
+
+def compose_clients(qualities):
+    """ Group the qualities per client in the format of the spectators profile
+
+    Args:
+        qualities (dict): The (quality_id, skip_frames) and the timestamp per (client_id,
+            transcoder_id)
+
+    Returns:
+        list: the clients
+    """
+    clients = OrderedDict()
+    for (client_id, transcoder_id), ((quality_id, skip_frames), timestamp) in qualities.items():
+        client = clients.get(client_id, None)
+        if client is None:
+            client = clients[client_id] = {"client_id": client_id, "timestamp": timestamp,
+                                           "use_these_qualities": []}
+        client["use_these_qualities"].append(
+            {"transcoder_id": transcoder_id, "quality_id": quality_id,
+             "skip_frames": skip_frames})
+    return list(clients.values())
+
+
+publisher = DeltaPublisher(KAFKA_SPECTATOR_CONFIGURATION_TOPIC,
+                           window=SPECTATORS_PUBLISHING['window'],
+                           compression_type=SPECTATORS_PUBLISHING['compression'],
+                           max_entries=SPECTATORS_PUBLISHING['max_entries'])
 
 
 class Configuration:
@@ -49,10 +235,13 @@ class Configuration:
         self.qualities = qualities
 
     def set_spectators_profile(self):
-        """ Compose the configuration message to be sent on Kafka bus
+        """ Publish the changed qualities of the spectators on Kafka bus
+
+        The changes are published in the background, coalesced with the changes of the other
+        decisions of the window.
 
         Returns:
-            bool: If the message published in kafka or not
+            bool: True, the changes are queued
 
         Examples:
             >>> from actions.vtranscoder_spectators import Configuration
@@ -61,13 +250,5 @@ class Configuration:
             >>> configuration.set_spectators_profile()
 
         """
-        completed = True
-        kafka_producer = init_producer()
-        operation = kafka_producer.send(KAFKA_SPECTATOR_CONFIGURATION_TOPIC, value=self.qualities)
-        try:
-            operation.get(timeout=5)
-        except Exception as e:
-            completed = False
-        finally:
-            kafka_producer.close()
-            return completed
+        completed = publisher.publish(self.qualities.get('clients', []))
+        return completed
@@ -0,0 +1,201 @@
+import json
+import time
+import aiohttp
+from runtime import metrics
+from runtime.breaker import get_breaker
+from runtime.exceptions import CircuitBreakerOpen
+from settings import HTTP_TIMEOUT, NBI_ASYNC_POOL
+
+
+class Response(object):
+    """The response of the async client, with the attributes used from a requests object.
+
+    Attributes:
+        url (str): The requested URL
+        status_code (int): The HTTP status code
+        headers (dict): The response headers
+        text (str): The response body
+    """
+
+    def __init__(self, url, status_code, headers, text):
+        """Constructor"""
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        """Decode the response body
+
+        Returns:
+            any: the decoded JSON body
+        """
+        return json.loads(self.text)
+
+
+class AsyncClient(object):
+    def __init__(self, verify_ssl_cert=False, upstream=None, timeout=HTTP_TIMEOUT,
+                 limit=NBI_ASYNC_POOL.get('limit', 100),
+                 limit_per_host=NBI_ASYNC_POOL.get('limit_per_host', 10)):
+        """Constructor
+
+        The connections are pooled in a single session, created lazily in the running loop.
+
+        Args:
+            verify_ssl_cert (bool): Verify the SSL certificate of the upstream or not
+            upstream (str, optional): The upstream name, e.g. "nbi". If it is set, the requests
+                pass through the circuit breaker of the upstream.
+            timeout (tuple): The connect and read timeouts in seconds
+            limit (int): The max number of open connections
+            limit_per_host (int): The max number of open connections per host
+        """
+        self.verify_ssl_cert = verify_ssl_cert
+        self.upstream = upstream
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.session = None
+
+    def get_session(self):
+        """ Get the pooled session, create it if needed
+
+        Returns:
+            aiohttp.ClientSession: the session
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             ssl=None if self.verify_ssl_cert else False)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0],
+                                            sock_read=self.timeout[1])
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def request(self, method, url, **kwargs):
+        """Send a request, through the circuit breaker of the upstream if any.
+
+        Args:
+            method (str): The HTTP method
+            url (str): the endpoint of the web service
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            Response: the response
+
+        Raises:
+            CircuitBreakerOpen: The upstream is unavailable.
+        """
+        breaker = get_breaker(self.upstream) if self.upstream is not None else None
+        if breaker is not None and not breaker.allow():
+            metrics.increment('circuit_breaker_rejected', upstream=self.upstream)
+            raise CircuitBreakerOpen(
+                'The circuit breaker of the upstream `{}` is {}'.format(self.upstream,
+                                                                        breaker.state))
+
+        started_at = time.time()
+        try:
+            async with self.get_session().request(method, url, **kwargs) as response:
+                text = await response.text()
+                result = Response(str(response.url), response.status, dict(response.headers),
+                                  text)
+        except Exception:
+            if breaker is not None:
+                breaker.record(True)
+            raise
+        if breaker is not None:
+            slow = time.time() - started_at > breaker.slow_call_duration
+            breaker.record(slow or result.status_code >= 500)
+        return result
+
+    async def list(self, url, headers=None, **kwargs):
+        """Fetch a list of entities (a collection).
+
+        Args:
+            url (str): the endpoint of the web service
+            headers (dict): the required HTTP headers, e.g., Accept: application/json
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            Response: the response
+        """
+        return await self.request('GET', url, headers=headers,
+                                  params=kwargs.get('query_params', None))
+
+    async def get(self, url, headers=None, **kwargs):
+        """Fetch an entity.
+
+        Args:
+            url (str): the endpoint of the web service
+            headers (dict): the required HTTP headers, e.g., Accept: application/json
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            Response: the response
+        """
+        return await self.request('GET', url, headers=headers,
+                                  params=kwargs.get('query_params', None))
+
+    async def post(self, url, headers=None, payload=None, **kwargs):
+        """Insert an entity.
+
+        Args:
+            url (str): the endpoint of the web service
+            headers (dict): the required HTTP headers, e.g., Accept: application/json
+            payload (str): the encoded body of the request
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            Response: the response
+        """
+        return await self.request('POST', url, headers=headers, data=payload, **kwargs)
+
+    async def patch(self, url, headers=None, payload=None, **kwargs):
+        """Update partially an entity.
+
+        Args:
+            url (str): the endpoint of the web service
+            headers (dict): the required HTTP headers, e.g., Accept: application/json
+            payload (str): the encoded body of the request
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            Response: the response
+        """
+        return await self.request('PATCH', url, headers=headers, data=payload, **kwargs)
+
+    async def delete(self, url, headers=None, payload=None, **kwargs):
+        """Delete an entity.
+
+        Args:
+            url (str): the endpoint of the web service
+            headers (dict): the required HTTP headers, e.g., Accept: application/json
+            payload (str): the encoded body of the request
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            Response: the response
+        """
+        return await self.request('DELETE', url, headers=headers, data=payload, **kwargs)
+
+    async def close(self):
+        """Close the pooled connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+# The pooled clients of the running process per upstream
+CLIENTS = {}
+
+
+def get_client(upstream="nbi"):
+    """ Get the shared async client of an upstream
+
+    Args:
+        upstream (str): The upstream name
+
+    Returns:
+        AsyncClient: the client
+    """
+    if upstream not in CLIENTS:
+        CLIENTS[upstream] = AsyncClient(verify_ssl_cert=False, upstream=upstream)
+    return CLIENTS[upstream]
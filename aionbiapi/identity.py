@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from aionbiapi.client import get_client
+from nbiapi.identity import tokens
+from settings import OSM_COMPONENTS, OSM_ADMIN_CREDENTIALS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class TokenProvider(object):
+    """Provide the OSM tokens to the async clients.
+
+    The tokens are shared with the blocking client (`nbiapi.identity.tokens`). The
+    concurrent coroutines of a loop wait for a single token request.
+    """
+
+    def __init__(self):
+        """Constructor"""
+        self.locks = {}
+
+    def get_lock(self):
+        """ Get the lock of the running loop
+
+        Returns:
+            asyncio.Lock: the lock
+        """
+        loop = asyncio.get_event_loop()
+        if loop not in self.locks:
+            self.locks[loop] = asyncio.Lock()
+        return self.locks[loop]
+
+    async def get_token(self, username=None, password=None):
+        """Get a cached bearer authorization token from OSM
+
+        Args:
+            username (str, optional): The OSM username. Default is the admin user.
+            password (str, optional): The OSM password. Default is the admin password.
+
+        Returns:
+            token (str): An authorization token
+        """
+        if username is None:
+            username = OSM_ADMIN_CREDENTIALS.get('username')
+            password = OSM_ADMIN_CREDENTIALS.get('password')
+
+        token = tokens.get(username)
+        if token is not None:
+            return token
+        async with self.get_lock():
+            token = tokens.get(username)
+            if token is None:
+                token = await bearer_token(username, password)
+                if token is not None:
+                    tokens.set(username, token)
+        return token
+
+
+async def bearer_token(username, password):
+    """Get bearer authorization token from OSM r4
+
+    Args:
+        username (str): The admin OSM r4 username
+        password (str): The admin OSM r4 password
+
+    Returns:
+        token (str): An authorization token
+    """
+    endpoint = '{}/osm/admin/v1/tokens'.format(OSM_COMPONENTS.get('NBI-API'))
+    params = {'username': username, 'password': password}
+    headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+    response = await get_client("nbi").request('POST', endpoint, params=params, headers=headers)
+    logger.debug("Request `POST {}` returns HTTP status `{}`.".format(endpoint,
+                                                                      response.status_code))
+    if response.status_code == 200:
+        return response.json()['id']
+    return None
+
+
+# The token provider of the running process
+provider = TokenProvider()
+
+
+async def get_bearer_token(username=None, password=None):
+    """Get a cached bearer authorization token from OSM
+
+    Args:
+        username (str, optional): The OSM username. Default is the admin user.
+        password (str, optional): The OSM password. Default is the admin password.
+
+    Returns:
+        token (str): An authorization token
+
+    Examples:
+        >>> from aionbiapi.runner import run
+        >>> from aionbiapi.identity import get_bearer_token
+        >>> token = run(get_bearer_token())
+    """
+    return await provider.get_token(username, password)
@@ -0,0 +1,123 @@
+import json
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class Ns(object):
+    """NS Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Fetch a list of all NS Instances
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.ns import Ns
+            >>> ns = Ns(run(get_bearer_token()))
+            >>> response = run(ns.get_list())
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_instances'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, ns_uuid=None):
+        """Fetch details of a specific NS Instance
+
+        Args:
+            ns_uuid (str): The UUID of the NS to fetch details for
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.ns import Ns
+            >>> ns = Ns(run(get_bearer_token()))
+            >>> response = run(ns.get(ns_uuid='07048175-660b-404f-bbc9-5be7581e74de'))
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_instances/{}'.format(OSM_COMPONENTS.get('NBI-API'), ns_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def scale_vnf(self, ns_uuid, vnf_index, scaling_group_name, scale_out=True):
+        """Scale in or out in VNF level
+
+        Args:
+            ns_uuid (str): The NS uuid
+            vnf_index (int): The VNF index to be scaled
+            scaling_group_name (str): The name in the VNF scaling_group_descriptor
+            scale_out (bool): Decide scale in or out action. By default, scale out is performed.
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.ns import Ns
+            >>> ns = Ns(run(get_bearer_token()))
+            >>> response = run(ns.scale_vnf(ns_uuid='07048175-660b-404f-bbc9-5be7581e74de', vnf_index=2, scaling_group_name='scale_by_one'))
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_instances/{}/scale'.format(OSM_COMPONENTS.get('NBI-API'), ns_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json", "Content-Type": "application/json"}
+        payload = {
+            "scaleVnfData": {
+                "scaleVnfType": "SCALE_OUT" if scale_out else "SCALE_IN",
+                "scaleByStepData": {
+                    "member-vnf-index": str(vnf_index),
+                    "scaling-group-descriptor": str(scaling_group_name)
+                }
+            },
+            "scaleType": "SCALE_VNF"
+        }
+        response = await self.__client.post(endpoint, headers, payload=json.dumps(payload))
+        logger.debug("Request `POST {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def terminate(self, ns_uuid=None):
+        """Terminate a NS Instance
+
+        Args:
+            ns_uuid (str): The UUID of the NS to terminate
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.ns import Ns
+            >>> ns = Ns(run(get_bearer_token()))
+            >>> response = run(ns.terminate(ns_uuid='07048175-660b-404f-bbc9-5be7581e74de'))
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_instances/{}/terminate'.format(OSM_COMPONENTS.get('NBI-API'), ns_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.post(endpoint, headers)
+        logger.debug("Request `POST {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
@@ -0,0 +1,65 @@
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class Nsd(object):
+    """NS descriptor Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Fetch a list of the NS descriptors
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.nsd import Nsd
+            >>> nsd = Nsd(run(get_bearer_token()))
+            >>> response = run(nsd.get_list())
+        """
+        endpoint = '{}/osm/nsd/v1/ns_descriptors'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, nsd_uuid=None):
+        """Fetch details of a specific NS descriptor
+
+        Args:
+            nsd_uuid (str): The UUID of the NSD to fetch details for
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.nsd import Nsd
+            >>> nsd = Nsd(run(get_bearer_token()))
+            >>> response = run(nsd.get(nsd_uuid='8c3b9e36-3e8d-4d7a-8a2b-0c1e7f5a9d21'))
+        """
+        endpoint = '{}/osm/nsd/v1/ns_descriptors/{}'.format(OSM_COMPONENTS.get('NBI-API'), nsd_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
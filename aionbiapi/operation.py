@@ -0,0 +1,94 @@
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class NsLcmOperation(object):
+    """NS LCM operation Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Fetch a list of all NS LCM operations
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.operation import NsLcmOperation
+            >>> ns_operation = NsLcmOperation(run(get_bearer_token()))
+            >>> response = run(ns_operation.get_list())
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_lcm_op_occs'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get_list_by_ns(self, ns_uuid, operation_state=None, lcm_operation_type=None):
+        """Fetch the operations of a NS, filtered on the server side
+
+        Args:
+            ns_uuid (str): The UUID of the NS
+            operation_state (str, optional): The state of the operations, e.g. PROCESSING
+            lcm_operation_type (str, optional): The type of the operations, e.g. scale
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.operation import NsLcmOperation
+            >>> ns_operation = NsLcmOperation(run(get_bearer_token()))
+            >>> response = run(ns_operation.get_list_by_ns('07048175-660b-404f-bbc9-5be7581e74de', operation_state='PROCESSING'))
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_lcm_op_occs'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        query_params = {"nsInstanceId": ns_uuid}
+        if operation_state is not None:
+            query_params["operationState"] = operation_state
+        if lcm_operation_type is not None:
+            query_params["lcmOperationType"] = lcm_operation_type
+        response = await self.__client.list(endpoint, headers, query_params=query_params)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, operation_uuid=None):
+        """Fetch details of a specific NS LCM operation
+
+        Args:
+            operation_uuid (str): The UUID of the operation
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.operation import NsLcmOperation
+            >>> ns_operation = NsLcmOperation(run(get_bearer_token()))
+            >>> response = run(ns_operation.get(operation_uuid='6f8a5f2e-1c7d-4f0a-b6f4-7a3c2b9d8e10'))
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_lcm_op_occs/{}'.format(OSM_COMPONENTS.get('NBI-API'), operation_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
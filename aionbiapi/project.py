@@ -0,0 +1,65 @@
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class Project(object):
+    """Project Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Get the list of the registered Projects
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.project import Project
+            >>> project = Project(run(get_bearer_token()))
+            >>> response = run(project.get_list())
+        """
+        endpoint = '{}/osm/admin/v1/projects'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, project_id=None):
+        """Get details for a project by given project ID
+
+        Args:
+            project_id (str): The project ID or name
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.project import Project
+            >>> project = Project(run(get_bearer_token()))
+            >>> response = run(project.get('admin'))
+        """
+        endpoint = '{}/osm/admin/v1/projects/{}'.format(OSM_COMPONENTS.get('NBI-API'), project_id)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """ Get the event loop of the async NBI client, start it in a daemon thread if needed
+
+    All the pooled sessions live in this loop, so that the blocking code of the handlers
+    can share them.
+
+    Returns:
+        asyncio.AbstractEventLoop: the loop
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="nbi-async-loop",
+                                      daemon=True)
+            thread.start()
+    return _loop
+
+
+def run(coroutine, timeout=None):
+    """ Run a coroutine in the loop of the async NBI client and wait for its result
+
+    Args:
+        coroutine (coroutine): The coroutine
+        timeout (float, optional): The max seconds to wait
+
+    Returns:
+        any: the result of the coroutine
+
+    Examples:
+        >>> import asyncio
+        >>> from aionbiapi.runner import run
+        >>> from aionbiapi.identity import get_bearer_token
+        >>> token = run(get_bearer_token())
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop()).result(timeout)
@@ -0,0 +1,65 @@
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class User(object):
+    """User Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Get the list of the registered users
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.user import User
+            >>> user = User(run(get_bearer_token()))
+            >>> response = run(user.get_list())
+        """
+        endpoint = '{}/osm/admin/v1/users'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, username=None):
+        """Get details for a user by given username
+
+        Args:
+            username (str): The username
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.user import User
+            >>> user = User(run(get_bearer_token()))
+            >>> response = run(user.get('admin'))
+        """
+        endpoint = '{}/osm/admin/v1/users/{}'.format(OSM_COMPONENTS.get('NBI-API'), username)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
@@ -0,0 +1,87 @@
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class Vnf(object):
+    """VNF Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Fetch a list of all VNFs
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.vnf import Vnf
+            >>> vnf = Vnf(run(get_bearer_token()))
+            >>> response = run(vnf.get_list())
+        """
+        endpoint = '{}/osm/nslcm/v1/vnf_instances'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get_list_by_ns(self, ns_uuid=None):
+        """Fetch list of VNFs for specific NS Instance
+
+        Args:
+            ns_uuid (str): The UUID of the NS to fetch VNFs for
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.vnf import Vnf
+            >>> vnf = Vnf(run(get_bearer_token()))
+            >>> response = run(vnf.get_list_by_ns(ns_uuid='07048175-660b-404f-bbc9-5be7581e74de'))
+        """
+        endpoint = '{}/osm/nslcm/v1/vnf_instances'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.list(endpoint, headers, query_params={"nsr-id-ref": ns_uuid})
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, vnf_uuid=None):
+        """Fetch details of a specific VNF
+
+        Args:
+            vnf_uuid (str): The UUID of the VNF to fetch details for
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.vnf import Vnf
+            >>> vnf = Vnf(run(get_bearer_token()))
+            >>> response = run(vnf.get(vnf_uuid='a5f506e9-45c7-42fd-b12d-b5c657ed87fb'))
+        """
+        endpoint = '{}/osm/nslcm/v1/vnf_instances/{}'.format(OSM_COMPONENTS.get('NBI-API'), vnf_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
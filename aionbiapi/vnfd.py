@@ -0,0 +1,65 @@
+import logging
+from aionbiapi.client import get_client
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("osm")
+
+
+class Vnfd(object):
+    """VNF descriptor Class (async).
+
+    Attributes:
+        bearer_token (str): The OSM Authorization Token
+
+    Args:
+        token (str): The OSM Authorization Token
+        client (AsyncClient, optional): The async client. Default is the pooled NBI client.
+    """
+
+    def __init__(self, token, client=None):
+        """Constructor"""
+        self.__client = client if client is not None else get_client("nbi")
+        self.bearer_token = token
+
+    async def get_list(self):
+        """Fetch a list of the VNF descriptors
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.vnfd import Vnfd
+            >>> vnfd = Vnfd(run(get_bearer_token()))
+            >>> response = run(vnfd.get_list())
+        """
+        endpoint = '{}/osm/vnfpkgm/v1/vnf_packages'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
+
+    async def get(self, vnfd_uuid=None):
+        """Fetch details of a specific VNF descriptor
+
+        Args:
+            vnfd_uuid (str): The UUID of the VNFD to fetch details for
+
+        Returns:
+            Response: the response
+
+        Examples:
+            >>> from aionbiapi.runner import run
+            >>> from aionbiapi.identity import get_bearer_token
+            >>> from aionbiapi.vnfd import Vnfd
+            >>> vnfd = Vnfd(run(get_bearer_token()))
+            >>> response = run(vnfd.get(vnfd_uuid='2c33b3ee-5d8b-4a5e-9a84-3b1c6f0c2b14'))
+        """
+        endpoint = '{}/osm/vnfpkgm/v1/vnf_packages/{}'.format(OSM_COMPONENTS.get('NBI-API'), vnfd_uuid)
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
+        response = await self.__client.get(endpoint, headers)
+        logger.debug("Request `GET {}` returns HTTP status `{}`.".format(response.url, response.status_code))
+        return response
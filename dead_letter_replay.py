@@ -0,0 +1,75 @@
+"""
+Copyright 2020 SingularLogic SA
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import argparse
+from kafka import KafkaConsumer
+from utils import init_producer, get_utcnow_timestamp
+from settings import KAFKA_SERVER, KAFKA_CLIENT_ID, KAFKA_API_VERSION, KAFKA_GROUP_ID, \
+    KAFKA_DEAD_LETTER_TOPIC, KAFKA_EXECUTION_TOPIC
+
+APP = "dead_letter_replay"
+
+
+def main():
+    """Re-inject the dead-lettered actions in the execution topic"""
+    parser = argparse.ArgumentParser(
+        description='Re-inject the dead-lettered actions in the execution topic')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='The max number of actions to be re-injected')
+    parser.add_argument('--keep-timestamp', action='store_true',
+                        help='Keep the original `metric.timestamp` (the actions may expire)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the dead-lettered actions without re-injecting them')
+    args = parser.parse_args()
+
+    kafka_consumer = KafkaConsumer(KAFKA_DEAD_LETTER_TOPIC,
+                                   bootstrap_servers=KAFKA_SERVER,
+                                   client_id=KAFKA_CLIENT_ID,
+                                   api_version=KAFKA_API_VERSION,
+                                   group_id=KAFKA_GROUP_ID[APP],
+                                   enable_auto_commit=False,
+                                   auto_offset_reset='earliest',
+                                   consumer_timeout_ms=5000)
+    kafka_producer = init_producer()
+
+    replayed = 0
+    for msg in kafka_consumer:
+        dead_letter = json.loads(msg.value.decode('utf-8', 'ignore'))
+        message = dead_letter.get('message', {})
+        failures = dead_letter.get('failures', [])
+        print("[{}] {} failed {} times. Last error: {}".format(
+            msg.offset, dead_letter.get('planning'), len(failures),
+            failures[-1].get('error') if len(failures) else None))
+        if args.dry_run:
+            continue
+
+        # The TTL of the action is counted from the `metric.timestamp`
+        if not args.keep_timestamp:
+            message.setdefault('metric', {})['timestamp'] = get_utcnow_timestamp()
+        kafka_producer.send(KAFKA_EXECUTION_TOPIC, value=message).get(timeout=5)
+        kafka_consumer.commit()
+        replayed += 1
+        if args.limit is not None and replayed >= args.limit:
+            break
+
+    kafka_producer.close()
+    kafka_consumer.close(autocommit=False)
+    print("{} actions were re-injected in the topic {}".format(replayed, KAFKA_EXECUTION_TOPIC))
+
+
+if __name__ == '__main__':
+    main()
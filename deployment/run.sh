@@ -18,6 +18,12 @@ sed -i "s/ENV_INFLUXDB_PWD/$INFLUXDB_PWD/g" /etc/supervisor/supervisord.conf
 sed -i "s/ENV_INFLUXDB_PORT/$INFLUXDB_PORT/g" /etc/supervisor/supervisord.conf
 sed -i "s/ENV_GRAYLOG_HOST/$GRAYLOG_HOST/g" /etc/supervisor/supervisord.conf
 sed -i "s/ENV_GRAYLOG_PORT/$GRAYLOG_PORT/g" /etc/supervisor/supervisord.conf
+sed -i "s/ENV_WORKER_PROCESSES/${WORKER_PROCESSES:-1}/g" /etc/supervisor/supervisord.conf
+
+# Run the worker and the OSM subscriber in one process
+if [ "${UNIFIED_RUNTIME:-false}" = "true" ]; then
+    cp /opt/actions-execution-engine/deployment/executor.conf /etc/supervisor/conf.d/execution.conf
+fi
 
 # Restart services
 service supervisor start && service supervisor status
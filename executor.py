@@ -0,0 +1,71 @@
+"""
+Copyright 2020 SingularLogic SA
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import time
+import argparse
+import threading
+import logging
+import worker
+import osm_subscriber
+from runtime.logs import configure_logging
+
+APP = "executor"
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+def main():
+    """Run the worker and the OSM subscriber in one process
+
+    Both flows share the OSM token, the caches, the keep-alive HTTP sessions, the circuit
+    breakers and the per-NS locks of the process. The locks are in memory, so the unified
+    runtime is a single process: the worker processes of the multi-process mode would not
+    share them with the subscriber.
+    """
+    subscriber = threading.Thread(target=run_subscriber, name="osm-subscriber", daemon=True)
+    subscriber.start()
+    worker.main()
+
+
+def run_subscriber(restart_delay=10):
+    """ Run the OSM subscriber, restart it after a failure
+
+    Args:
+        restart_delay (int): The seconds to wait before the restart
+    """
+    while True:
+        try:
+            osm_subscriber.main()
+        except Exception as ex:
+            logger.exception('The OSM subscriber failed: {}'.format(ex))
+        time.sleep(restart_delay)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Execute the optimization actions and configure the vCDN services')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='The number of processes. Only 1 is supported, since the per-NS '
+                             'locks are not shared between processes; use the worker and the '
+                             'OSM subscriber programs for the multi-process mode.')
+    args = parser.parse_args()
+
+    if args.processes != 1:
+        parser.error('The unified runtime runs in a single process (--processes 1), so that '
+                     'the per-NS locks serialize the worker and the subscriber flows')
+    main()
@@ -1,8 +1,8 @@
-import logging.config
+import logging
 from httpclient.client import Client
-from settings import LOGGING
+from runtime.logs import configure_logging
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("worker")
 
 
@@ -17,7 +17,7 @@ class NetworkServicePolling:
             osm_faas_port (str): The FaaS VIM port
             ns_name (str): The NS name
         """
-        self.__client = Client()
+        self.__client = Client(upstream="osm-faas")
         self.osm_host = osm_host
         self.faas_polling_host = osm_faas_host
         self.faas_polling_ip = osm_faas_port
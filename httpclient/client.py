@@ -1,15 +1,142 @@
+import threading
 import requests
 from .baseclient import AbstractClient
 import requests.packages.urllib3
+from runtime.breaker import get_breaker, drop_breaker, is_server_error
+from runtime.exceptions import RequestOutcomeUnknown
+from settings import HTTP_TIMEOUT
 
 requests.packages.urllib3.disable_warnings()
 
+# The keep-alive sessions of the running process per upstream
+SESSIONS = {}
+sessions_lock = threading.Lock()
+
+
+def get_session(upstream):
+    """ Get the shared session of an upstream, so that its connections are reused
+
+    Args:
+        upstream (str): The upstream name, e.g. "nbi", "vcache:192.168.111.29"
+
+    Returns:
+        requests.Session: the session
+    """
+    with sessions_lock:
+        if upstream not in SESSIONS:
+            SESSIONS[upstream] = requests.Session()
+        return SESSIONS[upstream]
+
+
+def drop_session(upstream):
+    """ Close the shared session of an upstream, e.g. after the removal of a VNF
+
+    Args:
+        upstream (str): The upstream name
+    """
+    with sessions_lock:
+        session = SESSIONS.pop(upstream, None)
+    if session is not None:
+        session.close()
+
+
+def release_upstream(upstream):
+    """ Close the session and forget the circuit breaker of a removed upstream
+
+    The upstreams of the VNFs (e.g. "vcache:192.168.111.29") are released on their scale in
+    and on the termination of their NS, so that the sessions and the breakers do not grow
+    without bound.
+
+    Args:
+        upstream (str): The upstream name
+    """
+    drop_session(upstream)
+    drop_breaker(upstream)
+
 
 class Client(AbstractClient):
-    def __init__(self, verify_ssl_cert=False):
+    def __init__(self, verify_ssl_cert=False, upstream=None, timeout=HTTP_TIMEOUT, session=None,
+                 refresh_token=None):
+        """Constructor
+
+        Args:
+            verify_ssl_cert (bool): Verify the SSL certificate of the upstream or not
+            upstream (str, optional): The upstream name, e.g. "nbi". If it is set, the requests
+                pass through the circuit breaker of the upstream and they share the
+                keep-alive session of the upstream.
+            timeout (tuple): The connect and read timeouts in seconds
+            session (requests.Session, optional): A session that keeps the connections alive
+                between the requests. By default, the session of the upstream if any.
+            refresh_token (callable, optional): Accepts the bearer token of an unauthorized
+                request (HTTP 401) and returns a new token; the request is resent once with it.
+        """
         self.verify_ssl_cert = verify_ssl_cert
+        self.refresh_token = refresh_token
+        self.upstream = upstream
+        self.timeout = timeout
+        if session is None and upstream is not None:
+            session = get_session(upstream)
+        self.session = session
         super(Client, self).__init__()
 
+    def request(self, method, url, idempotent=True, **kwargs):
+        """Send a request, through the circuit breaker of the upstream if any.
+
+        Args:
+            method (str): The HTTP method
+            url (str): the endpoint of the web service
+            idempotent (bool): Whether the request can be resent safely. A non-idempotent
+                request (e.g. the spawn of a VNF) whose response is lost after it was sent
+                raises `RequestOutcomeUnknown`, so that the action is not retried.
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        An unauthorized request is resent once with a new token (see `refresh_token`).
+
+        Returns:
+            obj: a requests object
+
+        Raises:
+            CircuitBreakerOpen: The upstream is unavailable.
+            RequestOutcomeUnknown: The non-idempotent request was sent, but it timed out.
+        """
+        response = self.send(method, url, idempotent, **kwargs)
+        headers = kwargs.get('headers') or {}
+        if response.status_code != 401 or self.refresh_token is None \
+                or 'Authorization' not in headers:
+            return response
+        # A token revoked or expired before its TTL: the unauthorized request was not applied
+        token = self.refresh_token(headers['Authorization'].partition(' ')[2])
+        if token is None:
+            return response
+        kwargs['headers'] = dict(headers, Authorization='Bearer {}'.format(token))
+        return self.send(method, url, idempotent, **kwargs)
+
+    def send(self, method, url, idempotent=True, **kwargs):
+        """Send a request once, through the circuit breaker of the upstream if any.
+
+        Args:
+            method (str): The HTTP method
+            url (str): the endpoint of the web service
+            idempotent (bool): Whether the request can be resent safely (see `request`)
+            kwargs (dict, optional): Additional arguments will be passed to the request.
+
+        Returns:
+            obj: a requests object
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('verify', self.verify_ssl_cert)
+        transport = self.session if self.session is not None else requests
+        try:
+            if self.upstream is None:
+                return transport.request(method, url, **kwargs)
+            return get_breaker(self.upstream).call(
+                lambda: transport.request(method, url, **kwargs), is_failure=is_server_error)
+        except requests.exceptions.ReadTimeout as ex:
+            if idempotent:
+                raise
+            raise RequestOutcomeUnknown('The request `{} {}` was sent but its response was not '
+                                        'received: {}'.format(method, url, ex))
+
     def list(self, url, headers=None, **kwargs):
         """Fetch a list of entities (a collection).
 
@@ -22,8 +149,7 @@ class Client(AbstractClient):
             obj: a requests object
         """
         query_params = kwargs.get('query_params', None)
-        response = requests.get(url, headers=headers, params=query_params,
-                                verify=self.verify_ssl_cert)
+        response = self.request('GET', url, headers=headers, params=query_params)
         return response
 
     def get(self, url, headers=None, **kwargs):
@@ -38,25 +164,25 @@ class Client(AbstractClient):
             obj: a requests object
         """
         query_params = kwargs.get('query_params', None)
-        response = requests.get(url, headers=headers, params=query_params,
-                                verify=self.verify_ssl_cert)
+        response = self.request('GET', url, headers=headers, params=query_params)
         return response
 
-    def post(self, url, headers=None, payload=None, **kwargs):
+    def post(self, url, headers=None, payload=None, idempotent=True, **kwargs):
         """Insert an entity.
 
         Args:
             url (str): the endpoint of the web service
             headers (dict): the required HTTP headers, e.g., Accept: application/json
             payload (dict): data that will be encoded as JSON and passed in the request
+            idempotent (bool): Whether the request can be resent safely (see `request`)
             kwargs (dict, optional): Additional arguments will be passed to the request.
 
         Returns:
             obj: a requests object
         """
         query_params = kwargs.get('query_params', None)
-        response = requests.post(url, data=payload, headers=headers, params=query_params,
-                                 verify=self.verify_ssl_cert)
+        response = self.request('POST', url, idempotent=idempotent, data=payload,
+                                headers=headers, params=query_params)
         return response
 
     def patch(self, url, headers=None, payload=None, **kwargs):
@@ -72,8 +198,7 @@ class Client(AbstractClient):
             obj: a requests object
         """
         query_params = kwargs.get('query_params', None)
-        response = requests.patch(url, data=payload, headers=headers, params=query_params,
-                                  verify=self.verify_ssl_cert)
+        response = self.request('PATCH', url, data=payload, headers=headers, params=query_params)
         return response
 
     def delete(self, url, headers=None, payload=None, **kwargs):
@@ -89,6 +214,6 @@ class Client(AbstractClient):
             obj: a requests object
         """
         query_params = kwargs.get('query_params', None)
-        response = requests.delete(url=url, data=payload, headers=headers, params=query_params,
-                                   verify=self.verify_ssl_cert)
+        response = self.request('DELETE', url, data=payload, headers=headers,
+                                params=query_params)
         return response
@@ -1,8 +1,12 @@
-import logging.config
-from utils import init_influx_client, get_utcnow_timestamp, get_one_hour_ago
-from settings import LOGGING
-
-logging.config.dictConfig(LOGGING)
+import json
+import logging
+from influx.spool import spool
+from utils import init_influx_client, get_utcnow_timestamp, get_one_hour_ago, \
+    get_utc_timestamp_before
+from settings import FAAS_OPERATIONS_WINDOWS
+from runtime.logs import configure_logging
+
+configure_logging()
 logger = logging.getLogger("worker")
 
 
@@ -19,7 +23,6 @@ def store_operation(operation_type, event_uuid, ns_name, ns_uuid, instance_numbe
     Returns:
         None
     """
-    influx_client = init_influx_client()
     timestamp = get_utcnow_timestamp()
 
     operation = [
@@ -37,7 +40,69 @@ def store_operation(operation_type, event_uuid, ns_name, ns_uuid, instance_numbe
             }
         }
     ]
-    influx_client.write_points(operation)
+    # The operation is visible through `get_pending_operations` until it is written
+    spool.write_points(operation)
+
+
+def get_pending_operations(ns_uuid):
+    """ Get the faas operations of a NS that are spooled but not written in InfluxDB yet
+
+    Args:
+        ns_uuid (str): The NS identifier
+
+    Returns:
+        list: the event identifier and the FaaS VNF instance number per operation, oldest first
+    """
+    return [{"event_uuid": point['tags'].get('event_uuid'),
+             "instance_number": point['fields'].get('instance_number')}
+            for point in spool.pending_points("faas_operations")
+            if point['tags'].get('ns_uuid') == ns_uuid]
+
+
+def select_operations(ns_uuid, order="DESC", since=None, limit=None):
+    """ Select the faas operations of a NS
+
+    The query has bound parameters and selects only the needed columns.
+
+    Args:
+        ns_uuid (str): The NS identifier
+        order (str): "ASC" for the less recent operations first or "DESC" for the most recent
+        since (str, optional): The UTC timestamp that bounds the time window
+        limit (int, optional): The max number of operations
+
+    Returns:
+        list: the event identifier and the FaaS VNF instance number per operation
+    """
+    query = 'SELECT "event_uuid", "instance_number" FROM "faas_operations" ' \
+            'WHERE "ns_uuid" = $ns_uuid'
+    bind_params = {"ns_uuid": ns_uuid}
+    if since is not None:
+        query += ' AND time > $since'
+        bind_params["since"] = since
+    query += ' ORDER BY time {}'.format("ASC" if order == "ASC" else "DESC")
+    if limit is not None:
+        query += ' LIMIT {:d}'.format(limit)
+
+    client = init_influx_client()
+    response = client.query(query, params={"params": json.dumps(bind_params)})
+    return [{"event_uuid": point.get('event_uuid'),
+             "instance_number": point.get('instance_number')}
+            for point in response.get_points()]
+
+
+def select_operation(ns_uuid, order="DESC", since=None):
+    """ Select the first or the last faas operation of a NS
+
+    Args:
+        ns_uuid (str): The NS identifier
+        order (str): "ASC" for the less recent operation or "DESC" for the most recent
+        since (str, optional): The UTC timestamp that bounds the time window
+
+    Returns:
+        dict: the event identifier and the FaaS VNF instance number or None if it is missing
+    """
+    operations = select_operations(ns_uuid, order=order, since=since, limit=1)
+    return operations[0] if operations else None
 
 
 def get_first_operation(ns_uuid):
@@ -48,51 +113,64 @@ def get_first_operation(ns_uuid):
     Returns:
         dict: the event identifier and the FaaS VNF instance number
     """
-    event_uuid, instance_number = None, None
-    one_hour_ago = get_one_hour_ago()
+    operation = None
     try:
-        client = init_influx_client()
-        query = "select * from faas_operations where time> '{}' and ns_uuid='{}' order by time asc limit 1".format(
-            one_hour_ago, ns_uuid)
-        response = client.query(query)
-        series = response.raw['series']
-        serie = series[0]
-        values = serie['values']
-        value = values[0]
-
-        event_uuid = value[1]
-        instance_number = value[2]
+        operation = select_operation(ns_uuid, order="ASC", since=get_one_hour_ago())
     except Exception as ex:
         logger.error(ex)
-    finally:
-        return {"event_uuid": event_uuid, "instance_number": instance_number}
+
+    if operation is None:
+        pending_operations = get_pending_operations(ns_uuid)
+        if pending_operations:
+            return pending_operations[0]
+        return {"event_uuid": None, "instance_number": None}
+    return operation
 
 
 def get_last_operation(ns_uuid):
     """ Fetch information for the most recent spawned event
 
+    The operation is searched in time windows of increasing size (FAAS_OPERATIONS_WINDOWS),
+    so that the lookup does not scan the whole measurement if the NS scaled recently.
+
     ns_uuid (str): The NS identifier
 
     Returns:
         dict: the event identifier and the FaaS VNF instance number
     """
-    event_uuid, instance_number = None, 0
+    # The spooled operations are more recent than the written ones
+    pending_operations = get_pending_operations(ns_uuid)
+    if pending_operations:
+        return pending_operations[-1]
+
+    try:
+        for window in FAAS_OPERATIONS_WINDOWS:
+            since = get_utc_timestamp_before(window) if window else None
+            operation = select_operation(ns_uuid, order="DESC", since=since)
+            if operation is not None:
+                return operation
+    except Exception as ex:
+        logger.error(ex)
+    return {"event_uuid": None, "instance_number": 0}
+
+
+def get_operations(ns_uuid):
+    """ Fetch all the spawned faas operations of a NS, written or spooled
+
+    Args:
+        ns_uuid (str): The NS identifier
+
+    Returns:
+        list: the event identifier and the FaaS VNF instance number per operation, oldest first
+    """
+    operations = []
     try:
-        client = init_influx_client()
-        query = "select * from faas_operations where ns_uuid='{}' order by time desc limit 1".format(
-            ns_uuid)
-        response = client.query(query)
-        series = response.raw['series']
-        serie = series[0]
-        values = serie['values']
-        value = values[0]
-
-        event_uuid = value[1]
-        instance_number = value[2]
+        operations = select_operations(ns_uuid, order="ASC")
     except Exception as ex:
         logger.error(ex)
-    finally:
-        return {"event_uuid": event_uuid, "instance_number": instance_number}
+    written = set(operation['event_uuid'] for operation in operations)
+    return operations + [operation for operation in get_pending_operations(ns_uuid)
+                         if operation['event_uuid'] not in written]
 
 
 def delete_operation(event_uuid):
@@ -102,12 +180,9 @@ def delete_operation(event_uuid):
         event_uuid (str): The event uuid
 
     Returns:
-        bool: True for success. Otherwise, False.
+        bool: True if the series was dropped. False if it is dropped after the spool replay.
     """
-    client = init_influx_client()
-    query = "DROP SERIES FROM faas_operations WHERE event_uuid='{}'".format(event_uuid)
-    response = client.query(query)
-    return response.error is None
+    return spool.discard("faas_operations", {"event_uuid": event_uuid})
 
 
 def delete_operation_by_ns(ns_uuid):
@@ -117,9 +192,6 @@ def delete_operation_by_ns(ns_uuid):
         ns_uuid (str): The NS uuid
 
     Returns:
-        bool: True for success. Otherwise, False.
+        bool: True if the series was dropped. False if it is dropped after the spool replay.
     """
-    client = init_influx_client()
-    query = "DROP SERIES FROM faas_operations WHERE ns_uuid='{}'".format(ns_uuid)
-    response = client.query(query)
-    return response.error is None
+    return spool.discard("faas_operations", {"ns_uuid": ns_uuid})
@@ -0,0 +1,94 @@
+import time
+import threading
+import logging
+from utils import init_influx_client
+from runtime.retry import backoff_delay
+from settings import INFLUX_DATABASES, INFLUX_RETENTION
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The retention policy of the optimization events (None for the default one). The queries of
+# the dedicated policy must be qualified, e.g. "executor_raw"."optimization_event".
+RAW_POLICY = INFLUX_RETENTION['raw_policy'] if INFLUX_RETENTION['enabled'] else None
+
+
+def get_downsampling_query(database, settings=INFLUX_RETENTION):
+    """ Compose the continuous query that counts the actions per NS and interval
+
+    Args:
+        database (str): The database name
+        settings (dict): The retention settings
+
+    Returns:
+        str: the CREATE CONTINUOUS QUERY statement
+
+    Examples:
+        >>> from influx.retention import get_downsampling_query
+        >>> get_downsampling_query("monitoring")
+        'CREATE CONTINUOUS QUERY "optimization_event_1h" ON "monitoring" BEGIN SELECT ...'
+    """
+    return 'CREATE CONTINUOUS QUERY "optimization_event_{interval}" ON "{database}" BEGIN ' \
+           'SELECT count("metric") AS "actions" ' \
+           'INTO "{database}"."{downsampled_policy}"."optimization_event_counts" ' \
+           'FROM "{database}"."{raw_policy}"."optimization_event" ' \
+           'GROUP BY time({interval}), "ns_uuid" END'.format(database=database, **settings)
+
+
+def ensure_retention_policy(client, database, name, duration):
+    """ Create a retention policy or update its duration
+
+    Args:
+        client (obj): The InfluxDB client
+        database (str): The database name
+        name (str): The retention policy
+        duration (str): The duration, e.g. "30d"
+    """
+    policies = {policy['name']: policy for policy in client.get_list_retention_policies(database)}
+    if name not in policies:
+        client.create_retention_policy(name, duration, 1, database=database, default=False)
+        logger.info('The retention policy {} ({}) was created'.format(name, duration))
+    else:
+        client.alter_retention_policy(name, database=database, duration=duration)
+
+
+def ensure_retention(settings=INFLUX_RETENTION):
+    """ Create the retention policies and the downsampling of the optimization events
+
+    The statements are idempotent, so they run on each startup.
+
+    Args:
+        settings (dict): The retention settings
+    """
+    database = INFLUX_DATABASES['default']['NAME']
+    client = init_influx_client()
+    ensure_retention_policy(client, database, settings['raw_policy'],
+                            settings['raw_duration'])
+    ensure_retention_policy(client, database, settings['downsampled_policy'],
+                            settings['downsampled_duration'])
+    client.query(get_downsampling_query(database, settings))
+
+
+def start(settings=INFLUX_RETENTION):
+    """ Apply the retention settings in the background, retrying until InfluxDB is available
+
+    Args:
+        settings (dict): The retention settings
+    """
+    if not settings['enabled']:
+        return
+
+    def run():
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                ensure_retention(settings)
+                return
+            except Exception as ex:
+                logger.warning('Failed to apply the InfluxDB retention (attempt #{}): {}'.format(
+                    attempt, ex))
+            time.sleep(backoff_delay(attempt, 5, 300))
+
+    threading.Thread(target=run, name="influx-retention", daemon=True).start()
@@ -0,0 +1,521 @@
+import os
+import re
+import json
+import time
+import fcntl
+import threading
+import logging
+from runtime import metrics
+from utils import init_influx_client
+from settings import INFLUX_SPOOL
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The unescaped separators of the line protocol
+SPACE = re.compile(r'(?<!\\) ')
+COMMA = re.compile(r'(?<!\\),')
+FIELD = re.compile(r'([^,=]+)=("(?:[^"\\]|\\.)*"|[^,]+)')
+DEFAULT_POLICY = "default"
+# The directory of the points that InfluxDB rejected (e.g. a field type conflict)
+FAILED_DIRECTORY = "failed"
+# The client errors that a new attempt may fix (authentication, throttling)
+TRANSIENT_CLIENT_ERRORS = (401, 403, 408, 429)
+
+
+class Spool:
+    """Disk-backed spool of the InfluxDB writes, replayed in batches by a background thread.
+
+    The points are appended in line protocol to the active segment of their retention policy
+    (`<path>/<policy>/<created>-<pid>.lp`), so a write never waits for InfluxDB. The writer
+    thread rotates the active segment and sends the closed ones, oldest first, in batches. A
+    segment is removed once all its lines are written; a failed segment is sent again later,
+    which is safe since the points have their own timestamp. A batch that InfluxDB rejects
+    (4xx, e.g. a field type conflict or a missing retention policy) is moved to
+    `<path>/failed/<policy>/`, so that it does not block the next segments.
+
+    The segments are locked (flock) while they are active or replayed, so several processes
+    may share the spool directory: the segments of a crashed process are replayed by the
+    others or after the restart.
+
+    Examples:
+        >>> from influx.spool import Spool
+        >>> from utils import init_influx_client
+        >>> spool = Spool("/tmp/influx_spool", init_influx_client)
+        >>> spool.write_points([{"measurement": "optimization_event", "tags": {"ns_uuid": "0c9e"},
+        ...                      "fields": {"metric": "vnf_scale_out"},
+        ...                      "time": "2020-03-12T15:16:07.000000Z"}])
+    """
+
+    def __init__(self, path, client_factory, max_bytes=256 * 1024 * 1024,
+                 segment_bytes=4 * 1024 * 1024, batch_size=5000, flush_interval=1):
+        """Constructor
+
+        Args:
+            path (str): The spool directory
+            client_factory (callable): Returns an InfluxDB client
+            max_bytes (int): The max size of the spool. The oldest segments are dropped.
+            segment_bytes (int): The size after which the active segment is rotated
+            batch_size (int): The max number of points per InfluxDB write
+            flush_interval (float): The seconds between the replays
+        """
+        self.path = path
+        self.client_factory = client_factory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.active = {}
+        self.__lock = threading.Lock()
+        self.__flush = threading.Event()
+        self.__thread = None
+
+    def write_points(self, points, retention_policy=None):
+        """ Append points to the spool
+
+        Args:
+            points (list): The points, as in `InfluxDBClient.write_points`
+            retention_policy (str, optional): The retention policy of the points
+
+        Returns:
+            bool: True, the points are written asynchronously
+        """
+        from influxdb.line_protocol import make_lines
+
+        lines = make_lines({"points": points}).encode('utf-8')
+        policy = retention_policy or DEFAULT_POLICY
+        with self.__lock:
+            segment = self.active.get(policy, None)
+            if segment is None:
+                segment = self.active[policy] = self.open_segment(policy)
+            segment.write(lines)
+            segment.flush()
+            if segment.tell() >= self.segment_bytes:
+                self.close_segment(policy)
+        metrics.increment('influx_spool_points_spooled', value=len(points))
+        self.start()
+        return True
+
+    def open_segment(self, policy):
+        """ Open a new active segment of a retention policy, locked by this process
+
+        Args:
+            policy (str): The retention policy
+
+        Returns:
+            file: the segment
+        """
+        directory = os.path.join(self.path, policy)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        name = '{:019d}-{}.lp'.format(int(time.time() * 1000000), os.getpid())
+        segment = open(os.path.join(directory, name), 'ab')
+        fcntl.flock(segment.fileno(), fcntl.LOCK_EX)
+        return segment
+
+    def close_segment(self, policy):
+        """ Close the active segment of a retention policy, so that it can be replayed
+
+        Args:
+            policy (str): The retention policy
+        """
+        segment = self.active.pop(policy, None)
+        if segment is not None:
+            os.fsync(segment.fileno())
+            segment.close()
+
+    def get_segments(self):
+        """ List the closed and the active segments, oldest first
+
+        Returns:
+            list: Tuples of (retention policy, segment path)
+        """
+        segments = []
+        if not os.path.isdir(self.path):
+            return segments
+        for policy in os.listdir(self.path):
+            directory = os.path.join(self.path, policy)
+            if policy == FAILED_DIRECTORY or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith('.lp'):
+                    segments.append((name, policy, os.path.join(directory, name)))
+        return [(policy, path) for _, policy, path in sorted(segments)]
+
+    def size(self):
+        """ Get the size of the spool
+
+        Returns:
+            int: the size in bytes
+        """
+        total = 0
+        for _, path in self.get_segments():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                continue
+        return total
+
+    def start(self):
+        """Start the writer thread, if it is not running"""
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        with self.__lock:
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__thread = threading.Thread(target=self.run, name="influx-spool",
+                                                 daemon=True)
+                self.__thread.start()
+
+    def run(self):
+        """Replay the spool until the process exits"""
+        while True:
+            self.__flush.wait(self.flush_interval)
+            self.__flush.clear()
+            try:
+                self.replay()
+            except Exception as ex:
+                logger.error('Failed to replay the InfluxDB spool: {}'.format(ex))
+
+    def flush(self):
+        """Wake up the writer thread"""
+        self.__flush.set()
+
+    def replay(self):
+        """ Send the spooled points to InfluxDB
+
+        Returns:
+            bool: True if the spool is empty. Otherwise, False.
+        """
+        with self.__lock:
+            for policy in list(self.active.keys()):
+                self.close_segment(policy)
+
+        self.enforce_max_bytes()
+        client = None
+        tombstones = load_tombstones(self.path)
+        for policy, path in self.get_segments():
+            if client is None:
+                client = self.client_factory()
+            if not self.replay_segment(client, policy, path, tombstones):
+                metrics.set_gauge('influx_spool_bytes', self.size())
+                return False
+
+        # The active segments of the other processes may still hold discarded points
+        remaining = self.get_segments()
+        if tombstones and not remaining:
+            drop_series(client or self.client_factory(), self.path)
+        metrics.set_gauge('influx_spool_bytes', self.size())
+        return not remaining
+
+    def replay_segment(self, client, policy, path, tombstones):
+        """ Send the points of a closed segment and remove it
+
+        Args:
+            client (obj): The InfluxDB client
+            policy (str): The retention policy of the segment
+            path (str): The segment
+            tombstones (list): The discarded series
+
+        Returns:
+            bool: True if the segment was written, moved to the failed points or skipped.
+                False if InfluxDB is unavailable.
+        """
+        try:
+            segment = open(path, 'rb')
+        except FileNotFoundError:
+            return True
+        try:
+            # The active segments of the other processes are skipped
+            try:
+                fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            if os.fstat(segment.fileno()).st_nlink == 0:
+                return True
+
+            lines = [line for line in segment.read().decode('utf-8', 'ignore').split('\n')
+                     if line and not is_discarded(line, tombstones)]
+            started_at = time.time()
+            for index in range(0, len(lines), self.batch_size):
+                batch = lines[index:index + self.batch_size]
+                try:
+                    client.write_points(
+                        batch, protocol='line',
+                        retention_policy=None if policy == DEFAULT_POLICY else policy)
+                except Exception as ex:
+                    if not is_rejected(ex):
+                        logger.warning('The InfluxDB spool will be replayed later: {}'.format(ex))
+                        metrics.increment('influx_spool_replay_failed')
+                        return False
+                    self.quarantine(policy, path, batch, ex)
+                    continue
+                metrics.increment('influx_spool_points_written', value=len(batch))
+            os.remove(path)
+            metrics.observe('influx_spool_replay_seconds', time.time() - started_at)
+            return True
+        finally:
+            segment.close()
+
+    def quarantine(self, policy, path, batch, error):
+        """ Move a batch that InfluxDB rejected to the failed points, instead of retrying it
+
+        Args:
+            policy (str): The retention policy of the segment
+            path (str): The segment
+            batch (list): The rejected points in line protocol
+            error (Exception): The InfluxDB error
+        """
+        directory = os.path.join(self.path, FAILED_DIRECTORY, policy)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        failed_path = os.path.join(directory, os.path.basename(path))
+        with open(failed_path, 'ab') as failed:
+            failed.write(('\n'.join(batch) + '\n').encode('utf-8'))
+            failed.flush()
+            os.fsync(failed.fileno())
+        metrics.increment('influx_spool_points_failed', value=len(batch))
+        logger.error('InfluxDB rejected {} points of the segment {}. They were moved to {}: '
+                     '{}'.format(len(batch), path, failed_path, error))
+
+    def enforce_max_bytes(self):
+        """Drop the oldest closed segments while the spool exceeds its max size"""
+        segments = self.get_segments()
+        total = self.size()
+        for _, path in segments:
+            if total <= self.max_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                with open(path, 'rb') as segment:
+                    fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    dropped = segment.read().count(b'\n')
+                    os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            metrics.increment('influx_spool_points_dropped', value=dropped)
+            logger.error('The InfluxDB spool exceeded {} bytes: {} points of the segment {} '
+                         'were dropped'.format(self.max_bytes, dropped, path))
+
+    def pending_points(self, measurement):
+        """ Get the spooled points of a measurement that are not written in InfluxDB yet
+
+        Args:
+            measurement (str): The measurement, e.g. "faas_operations"
+
+        Returns:
+            list: The points (measurement, tags, fields, time in ns), oldest first
+        """
+        with self.__lock:
+            for segment in self.active.values():
+                segment.flush()
+        tombstones = load_tombstones(self.path)
+        points = []
+        prefix = measurement.replace(',', '\\,').replace(' ', '\\ ') + ','
+        for _, path in self.get_segments():
+            try:
+                with open(path, 'rb') as segment:
+                    content = segment.read().decode('utf-8', 'ignore')
+            except OSError:
+                continue
+            for line in content.split('\n'):
+                if line.startswith(prefix) and not is_discarded(line, tombstones):
+                    point = parse_line(line)
+                    if point is not None:
+                        points.append(point)
+        return sorted(points, key=lambda point: point['time'] or 0)
+
+    def discard(self, measurement, tags):
+        """ Discard the spooled points of a series and drop the series from InfluxDB
+
+        If InfluxDB is not available, the series is dropped after the replay of the spool.
+
+        Args:
+            measurement (str): The measurement
+            tags (dict): The tags of the series, e.g. {"event_uuid": "..."}
+
+        Returns:
+            bool: True if the series was dropped now. False if it is deferred.
+        """
+        tombstone = {"measurement": measurement, "tags": tags}
+        recorded = bool(self.get_segments())
+        if recorded:
+            append_tombstone(self.path, tombstone)
+        try:
+            execute_drop_series(self.client_factory(), tombstone)
+            return True
+        except Exception as ex:
+            logger.warning('The series {} will be dropped after the replay of the InfluxDB '
+                           'spool: {}'.format(tombstone, ex))
+            if not recorded:
+                append_tombstone(self.path, tombstone)
+            self.start()
+            return False
+
+
+def is_rejected(error):
+    """ Check if InfluxDB rejected a write, so that sending it again cannot succeed
+
+    Args:
+        error (Exception): The failure of the write
+
+    Returns:
+        bool: True for a client error (4xx) except the authentication and the throttling
+            ones. False for the unavailability of InfluxDB (e.g. 5xx, connection errors).
+    """
+    from influxdb.exceptions import InfluxDBClientError
+
+    code = getattr(error, 'code', None)
+    return isinstance(error, InfluxDBClientError) and isinstance(code, int) and \
+        400 <= code < 500 and code not in TRANSIENT_CLIENT_ERRORS
+
+
+def parse_line(line):
+    """ Decode a point in line protocol
+
+    Args:
+        line (str): The point, e.g. 'faas_operations,ns_uuid=0c9e instance_number=2i 1584026167'
+
+    Returns:
+        dict: the measurement, tags, fields and time (ns) or None if the line is invalid
+    """
+    parts = SPACE.split(line, 2)
+    if len(parts) < 2:
+        return None
+    series = COMMA.split(parts[0])
+    tags = {}
+    for tag in series[1:]:
+        key, _, value = tag.partition('=')
+        tags[unescape(key)] = unescape(value)
+
+    fields = {}
+    for key, value in FIELD.findall(parts[1]):
+        if value.startswith('"'):
+            fields[key] = value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+        elif value.endswith('i'):
+            fields[key] = int(value[:-1])
+        elif value in ('t', 'T', 'true', 'True', 'TRUE'):
+            fields[key] = True
+        elif value in ('f', 'F', 'false', 'False', 'FALSE'):
+            fields[key] = False
+        else:
+            fields[key] = float(value)
+    timestamp = int(parts[2]) if len(parts) > 2 and parts[2].strip().isdigit() else None
+    return {"measurement": unescape(series[0]), "tags": tags, "fields": fields,
+            "time": timestamp}
+
+
+def unescape(value):
+    """ Remove the escaping of the line protocol from a measurement, tag key or value
+
+    Args:
+        value (str): The escaped value
+
+    Returns:
+        str: the value
+    """
+    return value.replace('\\,', ',').replace('\\=', '=').replace('\\ ', ' ')
+
+
+def is_discarded(line, tombstones):
+    """ Check if a point in line protocol belongs to a discarded series
+
+    Args:
+        line (str): The point
+        tombstones (list): The discarded series
+
+    Returns:
+        bool: True if it is discarded. Otherwise, False.
+    """
+    if not tombstones:
+        return False
+    series = COMMA.split(SPACE.split(line, 1)[0])
+    measurement = unescape(series[0])
+    tags = dict((unescape(key), unescape(value)) for key, _, value in
+                (tag.partition('=') for tag in series[1:]))
+    for tombstone in tombstones:
+        if tombstone['measurement'] == measurement and all(
+                tags.get(key) == '{}'.format(value)
+                for key, value in tombstone['tags'].items()):
+            return True
+    return False
+
+
+def get_tombstones_path(path):
+    return os.path.join(path, 'tombstones')
+
+
+def load_tombstones(path):
+    """ Load the series that are discarded from the spool
+
+    Args:
+        path (str): The spool directory
+
+    Returns:
+        list: The tombstones (measurement, tags)
+    """
+    tombstones = []
+    try:
+        with open(get_tombstones_path(path)) as tombstones_file:
+            for line in tombstones_file:
+                try:
+                    tombstones.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return tombstones
+
+
+def append_tombstone(path, tombstone):
+    """ Record a discarded series
+
+    Args:
+        path (str): The spool directory
+        tombstone (dict): The measurement and the tags of the series
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+    with open(get_tombstones_path(path), 'a') as tombstones_file:
+        fcntl.flock(tombstones_file.fileno(), fcntl.LOCK_EX)
+        tombstones_file.write(json.dumps(tombstone) + '\n')
+        tombstones_file.flush()
+        os.fsync(tombstones_file.fileno())
+
+
+def drop_series(client, path):
+    """ Drop the discarded series from InfluxDB once the spool is empty and forget them
+
+    Args:
+        client (obj): The InfluxDB client
+        path (str): The spool directory
+    """
+    with open(get_tombstones_path(path), 'r+') as tombstones_file:
+        fcntl.flock(tombstones_file.fileno(), fcntl.LOCK_EX)
+        # Keep the tombstones that were added meanwhile
+        current = [json.loads(line) for line in tombstones_file if line.strip()]
+        for tombstone in current:
+            execute_drop_series(client, tombstone)
+        tombstones_file.seek(0)
+        tombstones_file.truncate()
+
+
+def execute_drop_series(client, tombstone):
+    """ Drop a series from InfluxDB
+
+    Args:
+        client (obj): The InfluxDB client
+        tombstone (dict): The measurement and the tags of the series
+
+    Raises:
+        InfluxDBClientError: The query failed.
+    """
+    conditions = ' AND '.join("{}='{}'".format(key, '{}'.format(value).replace("'", "\\'"))
+                              for key, value in sorted(tombstone['tags'].items()))
+    client.query('DROP SERIES FROM "{}" WHERE {}'.format(tombstone['measurement'], conditions))
+
+
+spool = Spool(INFLUX_SPOOL['path'], init_influx_client, max_bytes=INFLUX_SPOOL['max_bytes'],
+              segment_bytes=INFLUX_SPOOL['segment_bytes'], batch_size=INFLUX_SPOOL['batch_size'],
+              flush_interval=INFLUX_SPOOL['flush_interval'])
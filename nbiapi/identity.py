@@ -1,12 +1,18 @@
 import requests
 import urllib3
-import logging.config
-from settings import OSM_COMPONENTS, LOGGING
+import logging
+from runtime.cache import TtlCache
+from runtime.breaker import get_breaker, is_server_error
+from settings import OSM_COMPONENTS, OSM_ADMIN_CREDENTIALS, OSM_TOKEN_TTL, HTTP_TIMEOUT
+from runtime.logs import configure_logging
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("osm")
 
+# The OSM tokens of the running process
+tokens = TtlCache("tokens", ttl=OSM_TOKEN_TTL, max_size=8)
+
 
 def bearer_token(username, password):
     """Get bearer authorization token from OSM r4
@@ -32,9 +38,62 @@ def bearer_token(username, password):
     endpoint = '{}/osm/admin/v1/tokens'.format(OSM_COMPONENTS.get('NBI-API'))
     params = {'username': username, 'password': password}
     headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
-    response = requests.post(url=endpoint, params=params, headers=headers, verify=False)
+    response = get_breaker("nbi").call(
+        lambda: requests.post(url=endpoint, params=params, headers=headers, verify=False,
+                              timeout=HTTP_TIMEOUT), is_failure=is_server_error)
     logger.debug("Request `GET {}` returns HTTP status `{}`, headers `{}` and body `{}`."
                  .format(response.url, response.status_code, response.headers, response.text))
     if response.status_code == 200:
         return response.json()['id']
     return None
+
+
+def get_bearer_token(username=None, password=None):
+    """Get a cached bearer authorization token from OSM r4
+
+    A new token is requested only if there is no valid token in the process cache.
+
+    Args:
+        username (str, optional): The OSM username. Default is the admin user.
+        password (str, optional): The OSM password. Default is the admin password.
+
+    Returns:
+        token (str): An authorization token
+
+    Examples:
+        >>> from nbiapi.identity import get_bearer_token
+        >>> token = get_bearer_token()
+        >>> assert type(token) is str
+    """
+    if username is None:
+        username = OSM_ADMIN_CREDENTIALS.get('username')
+        password = OSM_ADMIN_CREDENTIALS.get('password')
+    return tokens.get_or_load(username, lambda: bearer_token(username, password))
+
+
+def invalidate_bearer_token(username=None):
+    """Drop a cached token, e.g. after an unauthorized response
+
+    Args:
+        username (str, optional): The OSM username. Default is the admin user.
+    """
+    tokens.invalidate(username or OSM_ADMIN_CREDENTIALS.get('username'))
+
+
+def refresh_bearer_token(rejected_token):
+    """Replace the cached admin token after the NBI rejected it (HTTP 401)
+
+    The cached token is dropped only if it is the rejected one, so that the requests that were
+    rejected concurrently with the same token request a single new token.
+
+    Args:
+        rejected_token (str): The token of the unauthorized request
+
+    Returns:
+        token (str): A new authorization token
+    """
+    username = OSM_ADMIN_CREDENTIALS.get('username')
+    if tokens.get(username) == rejected_token:
+        logger.warning('The OSM token was rejected. A new token is requested.')
+        invalidate_bearer_token(username)
+    return get_bearer_token()
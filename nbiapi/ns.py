@@ -1,11 +1,13 @@
-from settings import OSM_COMPONENTS, LOGGING
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
 from httpclient.client import Client
-import logging.config
+from nbiapi.identity import refresh_bearer_token
+import logging
 import urllib3
 import json
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("osm")
 
 
@@ -21,7 +23,8 @@ class Ns(object):
 
     def __init__(self, token):
         """NS LCM Class Constructor."""
-        self.__client = Client(verify_ssl_cert=False)
+        self.__client = Client(verify_ssl_cert=False, upstream="nbi",
+                               refresh_token=refresh_bearer_token)
         self.bearer_token = token
 
     def get_list(self):
@@ -122,7 +125,47 @@ class Ns(object):
             },
             "scaleType": "SCALE_VNF"
         }
-        response = self.__client.post(endpoint, headers, payload=json.dumps(payload))
+        response = self.__client.post(endpoint, headers, payload=json.dumps(payload), idempotent=False)
+        logger.debug("Request `POST {}` returns HTTP status `{}`, headers `{}` and body `{}`."
+                     .format(response.url, response.status_code, response.headers, response.text))
+        return response
+
+    def instantiate(self, nsd_uuid, ns_name, vim_account_uuid, description=None):
+        """Create and instantiate a NS Instance in one request.
+
+        Args:
+            nsd_uuid (str): The UUID of the NS descriptor
+            ns_name (str): The name of the new NS
+            vim_account_uuid (str): The UUID of the VIM account
+            description (str, optional): The description of the new NS. Default is its name.
+
+        Returns:
+            object: A requests object. Its body includes the NS uuid (`id`) and the
+                instantiation operation uuid (`nslcmop_id`).
+
+        Examples:
+            >>> from nbiapi.identity import bearer_token
+            >>> from nbiapi.ns import Ns
+            >>> from settings import OSM_ADMIN_CREDENTIALS
+            >>> token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'), OSM_ADMIN_CREDENTIALS.get('username'))
+            >>> ns = Ns(token)
+            >>> response = ns.instantiate(nsd_uuid="9c4a8f58-8317-40a1-b9fe-1db18cff6965", ns_name="vcdn_test", vim_account_uuid="66000170-7fe9-4ab0-b113-b60a92ee196c")
+            >>> print(response.json())
+            {'id': '199b1fcd-eb32-4c6f-b149-34410acc2a32', 'nslcmop_id': '...'}
+
+        OSM Cli:
+            $ osm ns-create --nsd_name <nsd_name> --ns_name <ns_name> --vim_account <vim_account>
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_instances_content'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json",
+                   "Content-Type": "application/json"}
+        payload = {
+            "nsdId": nsd_uuid,
+            "nsName": ns_name,
+            "nsDescription": description or ns_name,
+            "vimAccountId": vim_account_uuid
+        }
+        response = self.__client.post(endpoint, headers, payload=json.dumps(payload), idempotent=False)
         logger.debug("Request `POST {}` returns HTTP status `{}`, headers `{}` and body `{}`."
                      .format(response.url, response.status_code, response.headers, response.text))
         return response
@@ -147,7 +190,7 @@ class Ns(object):
         """
         endpoint = '{}/osm/nslcm/v1/ns_instances/{}/terminate'.format(OSM_COMPONENTS.get('NBI-API'), ns_uuid)
         headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json"}
-        response = self.__client.post(endpoint, headers)
+        response = self.__client.post(endpoint, headers, idempotent=False)
         logger.debug("Request `GET {}` returns HTTP status `{}`, headers `{}` and body `{}`."
                      .format(response.url, response.status_code, response.headers, response.text))
         return response
@@ -1,10 +1,12 @@
 from httpclient.client import Client
-import logging.config
+from nbiapi.identity import refresh_bearer_token
+import logging
 import urllib3
-from settings import OSM_COMPONENTS, LOGGING
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("osm")
 
 
@@ -20,7 +22,8 @@ class NsLcmOperation(object):
 
     def __init__(self, token):
         """NS LCM Class Constructor."""
-        self.__client = Client(verify_ssl_cert=False)
+        self.__client = Client(verify_ssl_cert=False, upstream="nbi",
+                               refresh_token=refresh_bearer_token)
         self.bearer_token = token
 
     def get_list(self):
@@ -48,6 +51,41 @@ class NsLcmOperation(object):
                      .format(response.url, response.status_code, response.headers, response.text))
         return response
 
+    def get_list_by_ns(self, ns_uuid, operation_state=None, lcm_operation_type=None):
+        """Fetch the operations of a NS, filtered on the server side
+
+        Args:
+            ns_uuid (str): The UUID of the NS
+            operation_state (str, optional): The state of the operations, e.g. PROCESSING
+            lcm_operation_type (str, optional): The type of the operations, e.g. scale
+
+        Returns:
+            object: A requests object
+
+        Examples:
+            >>> from nbiapi.identity import bearer_token
+            >>> from nbiapi.operation import NsLcmOperation
+            >>> from settings import OSM_ADMIN_CREDENTIALS
+            >>> token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'), OSM_ADMIN_CREDENTIALS.get('username'))
+            >>> ns_operation = NsLcmOperation(token)
+            >>> request = ns_operation.get_list_by_ns('07048175-660b-404f-bbc9-5be7581e74de', operation_state='PROCESSING', lcm_operation_type='scale')
+            >>> print(request.status_code)
+            200
+
+        """
+        endpoint = '{}/osm/nslcm/v1/ns_lcm_op_occs'.format(OSM_COMPONENTS.get('NBI-API'))
+        headers = {"Authorization": "Bearer {}".format(self.bearer_token), "Accept": "application/json",
+                   "Content-Type": "application/json"}
+        query_params = {"nsInstanceId": ns_uuid}
+        if operation_state is not None:
+            query_params["operationState"] = operation_state
+        if lcm_operation_type is not None:
+            query_params["lcmOperationType"] = lcm_operation_type
+        response = self.__client.list(endpoint, headers, query_params=query_params)
+        logger.debug("Request `GET {}` returns HTTP status `{}`, headers `{}` and body `{}`."
+                     .format(response.url, response.status_code, response.headers, response.text))
+        return response
+
     def get(self, operation_uuid=None):
         """Fetch details of a specific operation
 
@@ -1,10 +1,12 @@
-from settings import OSM_COMPONENTS, LOGGING
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
 from httpclient.client import Client
-import logging.config
+from nbiapi.identity import refresh_bearer_token
+import logging
 import urllib3
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("osm")
 
 
@@ -13,7 +15,8 @@ class User(object):
 
     def __init__(self, token):
         """Constructor of User class"""
-        self.__client = Client(verify_ssl_cert=False)
+        self.__client = Client(verify_ssl_cert=False, upstream="nbi",
+                               refresh_token=refresh_bearer_token)
         self.bearer_token = token
 
     def get_list(self):
@@ -15,59 +15,155 @@ limitations under the License.
 """
 
 import time
-import logging.config
-import yaml
-from utils import init_consumer, check_ping
+import threading
+import logging
+from contextlib import contextmanager
+from runtime.startup import get_startup_timer
+from utils import init_consumer, decode_yaml, peek_fields
 from actions.vnf_configuration import vdns, vcache
-from actions.utils import get_vcdn_net_interfaces
+from actions.utils import get_vcdn_edges_net_interfaces, get_ip_address
+from actions import terminate as ns_terminate_action
 from actions.exceptions import VnfdUnexpectedStatusCode, VnfScaleNotCompleted, \
     vCacheConfigurationFailed, VdnsConfigurationFailed
-from nbiapi.identity import bearer_token
+from nbiapi.identity import get_bearer_token
 from nbiapi.ns import Ns as NetworkService
 from nbiapi.operation import NsLcmOperation
-from influx.queries import get_last_operation, delete_operation_by_ns
-from settings import OSM_ADMIN_CREDENTIALS, OSM_KAFKA_NS_TOPIC, LOGGING, OSM_KAFKA_SERVER, \
-    vCDN_NSD_PREFIX
+from influx.queries import get_operations
+from runtime import admin, profiling
+from runtime.activity import activity
+from runtime.cache import TtlCache
+from runtime.journal import Journal
+from runtime.locks import ns_locks
+from runtime.retry import backoff_delay
+from settings import OSM_KAFKA_NS_TOPIC, OSM_KAFKA_SERVER, \
+    vCDN_NSD_PREFIX, VCACHE_CONFIGURATION, OSM_NS_METADATA_TTL, SUBSCRIBER_JOURNAL, ADMIN_API
+from runtime.logs import configure_logging
 
 APP = "osm_kafka_subscriber"
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger('worker')
+startup = get_startup_timer(APP)
+startup.mark("imports")
+
+
+# The handled events per key: the required operation state and the fields to be extracted.
+# The events with all the fields found are handled without decoding the whole message.
+EVENTS = {
+    "scale": ("PROCESSING", ("_id", "scaleVnfType")),
+    "scaled": ("COMPLETED", ("nsr_id", "nslcmop_id", "operationState")),
+    "instantiated": ("COMPLETED", ("nsr_id", "nslcmop_id", "operationState")),
+    "terminate": ("PROCESSING", None),
+    "terminated": ("COMPLETED", ("nsr_id", "nslcmop_id", "operationState")),
+}
+
+# The NS metadata (nsd-name-ref, name) per NS record id. The entries are filled on the first
+# lookup and dropped when the NS is terminated.
+ns_metadata = TtlCache("ns_metadata", ttl=OSM_NS_METADATA_TTL, max_size=1024)
+# The scale type (SCALE_IN, SCALE_OUT) per scale operation, kept from the `scale` events
+scale_types = TtlCache("scale_types", ttl=3600, max_size=256)
+# The configuration workflows in progress, resumed after a restart
+journal = Journal(SUBSCRIBER_JOURNAL['path'],
+                  flush_interval=SUBSCRIBER_JOURNAL['flush_interval'],
+                  compaction_ratio=SUBSCRIBER_JOURNAL['compaction_ratio'])
+# The workflows are resumed once per process, even if `main` is restarted (see `executor.py`)
+RESUMED = {"done": False, "thread": None}
+RESUMED_LOCK = threading.Lock()
 
 
 def main():
     """Main process"""
+    admin.register("workflows", journal.pending)
+    resume_workflows()
+    startup.mark("journal")
     kafka_consumer = init_consumer(kafka_server=OSM_KAFKA_SERVER, scope=APP)
     kafka_consumer.subscribe(pattern=OSM_KAFKA_NS_TOPIC)
+    startup.mark("consumer")
+    startup.ready()
 
     for msg in kafka_consumer:
+        startup.first_message()
         action = msg.key.decode('utf-8', 'ignore')
-        # Process the message
-        message = yaml.safe_load(msg.value.decode('utf-8', 'ignore'))
+        # Skip the events that are not handled before decoding them
+        if action not in EVENTS:
+            continue
+
+        message = decode_event(action, msg.value)
+        if message is None:
+            continue
+        logger.debug('Event `{}`: {}'.format(action, message))
+        try:
+            profiling.run(handle_event, action, message)
+        except Exception as ex:
+            logger.exception(ex)
 
-        logger.warning(message)
 
-        if action == "scale":
-            # Valid events are: SCALE_IN, SCALE_OUT
-            pass
+def handle_event(action, message):
+    """ Handle a decoded event of the ns topic
 
-        elif action == "scaled":
-            configure_vcdn_ns_after_scale_out(message)
+    The configuration flows hold the lock of their NS, so that they do not overlap with the
+    lifecycle actions of the worker in the same process (see `executor.py`).
 
-        elif action == "instantiate":
-            # future usage
-            pass
+    Args:
+        action (str): The event key, e.g. scaled
+        message (dict): The event (or its needed fields)
+    """
+    if action == "scale":
+        keep_scale_type(message)
+
+    elif action == "scaled":
+        with track_activity(message.get('nsr_id', None), action):
+            configure_vcdn_ns_after_scale_out(message)
 
-        elif action == "instantiated":
+    elif action == "instantiated":
+        with track_activity(message.get('nsr_id', None), action):
             configure_vcdn_ns_after_instantiation(message)
-            pass
 
-        elif action == "terminate":
+    elif action == "terminate":
+        with track_activity(message.get('nsInstanceId', None), action):
             configure_vcdn_ns_after_termination(message)
 
-        elif action == "terminated":
-            # future usage
-            pass
+    elif action == "terminated" and message.get('nsr_id', None) is not None:
+        ns_metadata.invalidate(message['nsr_id'])
+
+
+@contextmanager
+def track_activity(ns_uuid, action):
+    """ Hold the lock of the NS and expose the flow in the running actions (admin API)
+
+    Args:
+        ns_uuid (str): The NS uuid
+        action (str): The event key, e.g. scaled
+    """
+    activity.start(ns_uuid, action, step="waiting_lock")
+    try:
+        with ns_locks.hold(ns_uuid):
+            activity.step("configuring")
+            yield
+    finally:
+        activity.finish()
+
+
+def decode_event(action, value):
+    """ Decode an event of the ns topic, only if it is in the expected operation state
+
+    Args:
+        action (str): The event key, e.g. scaled
+        value (bytes): The event value (YAML)
+
+    Returns:
+        dict: the event (or its needed fields) if it must be handled. Otherwise, None.
+    """
+    expected_state, fields = EVENTS[action]
+    state = peek_fields(value, ("operationState",)).get("operationState", None)
+    if state is not None and state != expected_state:
+        return None
+
+    if fields is not None:
+        message = peek_fields(value, fields)
+        if len(message) == len(fields):
+            return message
+    return decode_yaml(value)
 
 
 def configure_vcdn_ns_after_scale_out(message):
@@ -81,60 +177,52 @@ def configure_vcdn_ns_after_scale_out(message):
     if event_state != "COMPLETED":
         return
 
+    operation_uuid = message.get('nslcmop_id', None)
+    started = False
     try:
-        token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'),
-                             OSM_ADMIN_CREDENTIALS.get('password'))
         # check nsd
         ns_uuid = message.get('nsr_id', None)
-        nsd_ref_name = get_nsd_ref_name(token, ns_uuid)
-        if not (nsd_ref_name and nsd_ref_name.startswith(vCDN_NSD_PREFIX)):
+        if not is_vcdn_ns(ns_uuid):
             return
 
         # Detect the event: SCALE_IN, SCALE_OUT or something else
-        operation_uuid = message.get('nslcmop_id', None)
-        event = get_scale_event(token, operation_uuid)
+        event = scale_types.get(operation_uuid) or get_scale_event(get_bearer_token(),
+                                                                     operation_uuid)
         # Configure the vCache & vDNS only if SCALE_OUT event
         if not event or event != "SCALE_OUT":
             return
-
-        # Wait 10 seconds: ensure that the new vCache is up and running. Also, be sure
-        # that the vnf record includes the IPv4 of the new vCache.
-        time.sleep(10)
-
-        # Discover the vcache_incremental_counter <N> & the net IFs for UC3
-        net_interfaces, current_vdu_index = get_vcdn_net_interfaces(
-            ns_uuid, search_for_mid_cache="vCache_mid_vdu", search_for_edge_cache="vCache_edge_vdu")
-        edge_net_interfaces = net_interfaces.get('edge', {})
-        mid_net_interfaces = net_interfaces.get('mid', {})
+        journal.record(operation_uuid, "scaled", "started", message)
+        started = True
+
+        # Wait until the vnf record includes the IPv4 of the new vCache
+        deadline = time.time() + VCACHE_CONFIGURATION['deadline']
+        mid_net_interfaces, edges_net_interfaces = discover_vcdn_net_interfaces(ns_uuid,
+                                                                                deadline)
+        current_vdu_index = max(edges_net_interfaces.keys())
+        edge_net_interfaces = edges_net_interfaces[current_vdu_index]
         vcache_incremental_counter = int(current_vdu_index) + 1
-        # discover the CACHE_NET_IP for UC3
-        mid_vcache_ip_cache_net = mid_net_interfaces.get('5GMEDIA-CACHE-NET', {}).get('ip-address',
-                                                                                      None)
-        # discover the MGMT_NET_IP for UC3
-        edge_vcache_ip_mgmt_net = edge_net_interfaces.get('5GMEDIA_MGMT_NET', {}).get(
-            'ip-address', None)
-        # discover the CACHE_USER_IP for UC3
-        edge_vcache_ip_user_net = edge_net_interfaces.get('5GMEDIA-USER-NET', {}).get('ip-address',
-                                                                                      None)
-        # Check edge vCache net availability using ping
-        ping_edge_vcache_ip(edge_vcache_ip_mgmt_net)
-
-        # Set day-1,2... vCache configuration - Try every 18 seconds - totally 3 minutes
-        for i in range(1, 11):
-            logger.debug("vCache configuration: Attempt #{}".format(i))
-            if configure_edge_vcache(edge_vcache_ip_mgmt_net, mid_vcache_ip_cache_net,
-                                     vcache_incremental_counter):
-                break
-            time.sleep(18)
-
-        # Update the vDNS
-        configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter)
+        # discover the CACHE_NET_IP, MGMT_NET_IP and CACHE_USER_IP for UC3
+        mid_vcache_ip_cache_net = get_ip_address(mid_net_interfaces, '5GMEDIA-CACHE-NET')
+        edge_vcache_ip_mgmt_net = get_ip_address(edge_net_interfaces, '5GMEDIA_MGMT_NET')
+        edge_vcache_ip_user_net = get_ip_address(edge_net_interfaces, '5GMEDIA-USER-NET')
+
+        # Set day-1,2... vCache configuration as soon as the vCache is ready
+        if vcache.configure(edge_vcache_ip_mgmt_net, mid_vcache_ip_cache_net,
+                            vcache_incremental_counter, deadline=deadline):
+            journal.record(operation_uuid, "scaled", "vcaches_configured",
+                           {"vdns": [[edge_vcache_ip_user_net, vcache_incremental_counter]]})
+            # Update the vDNS
+            configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter)
 
     except (VnfdUnexpectedStatusCode, VnfScaleNotCompleted, vCacheConfigurationFailed,
             VdnsConfigurationFailed) as ex:
         logger.error(ex)
     except Exception as ex:
         logger.exception(ex)
+    finally:
+        # The workflow is resumed only if the process stops in the middle of it
+        if started:
+            journal.complete(operation_uuid)
 
 
 def configure_vcdn_ns_after_instantiation(message):
@@ -147,61 +235,50 @@ def configure_vcdn_ns_after_instantiation(message):
     # Consider this action only if it is completed
     if event_state != "COMPLETED":
         return
-    logger.info('A new vCDN service just instantiated. Status: {}'.format(event_state))
 
+    operation_uuid = message.get('nslcmop_id', None)
+    started = False
     try:
-        token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'),
-                             OSM_ADMIN_CREDENTIALS.get('password'))
-
-        # check nsd
+        # check nsd. The `instantiated` key is sent only for `instantiate` operations.
         ns_uuid = message.get('nsr_id', None)
-        nsd_ref_name = get_nsd_ref_name(token, ns_uuid)
-        if not (nsd_ref_name and nsd_ref_name.startswith(vCDN_NSD_PREFIX)):
+        if not is_vcdn_ns(ns_uuid):
             return
+        journal.record(operation_uuid, "instantiated", "started", message)
+        started = True
 
+        logger.info('A new vCDN service just instantiated. Status: {}'.format(event_state))
         logger.info('vCDN service uuid is {}'.format(ns_uuid))
 
-        # Check if event is `instantiate`
-        operation_uuid = message.get('nslcmop_id', None)
-        event = get_event(token, operation_uuid)
-        if not event or event != "instantiate":
-            return
-
-        # Wait 10 seconds: ensure that the new vCache is up and running. Also, be sure
-        # that the vnf record includes the IPv4 of the new vCache.
-        time.sleep(10)
-
-        # Discover the vcache_incremental_counter <N> & the net IFs for UC3
-        net_interfaces, current_vdu_index = get_vcdn_net_interfaces(
-            ns_uuid, search_for_mid_cache="vCache_mid_vdu", search_for_edge_cache="vCache_edge_vdu")
-        edge_net_interfaces = net_interfaces.get('edge', {})
-        mid_net_interfaces = net_interfaces.get('mid', {})
-        vcache_incremental_counter = int(current_vdu_index) + 1
+        # Wait until the vnf records include the IPv4 of the vCaches
+        deadline = time.time() + VCACHE_CONFIGURATION['deadline']
+        mid_net_interfaces, edges_net_interfaces = discover_vcdn_net_interfaces(ns_uuid,
+                                                                                deadline)
         # discover the CACHE_NET_IP for UC3
-        mid_vcache_ip_cache_net = mid_net_interfaces.get('5GMEDIA-CACHE-NET', {}).get('ip-address',
-                                                                                      None)
-        # discover the MGMT_NET_IP for UC3
-        edge_vcache_ip_mgmt_net = edge_net_interfaces.get('5GMEDIA_MGMT_NET', {}).get(
-            'ip-address', None)
-        # discover the CACHE_USER_IP for UC3
-        edge_vcache_ip_user_net = edge_net_interfaces.get('5GMEDIA-USER-NET', {}).get('ip-address',
-                                                                                      None)
-        # Check edge vCache net availability using ping
-        ping_edge_vcache_ip(edge_vcache_ip_mgmt_net)
-
-        # Set day-1,2... vCache configuration - Try every 18 seconds - totally 3 minutes
-        for i in range(1, 10):
-            logger.info("vCache VNF configuration: Attempt #{}".format(i))
-            if configure_edge_vcache(edge_vcache_ip_mgmt_net, mid_vcache_ip_cache_net,
-                                     vcache_incremental_counter):
-                break
-            time.sleep(10)
-
-        # Update the vDNS
-        configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter)
+        mid_vcache_ip_cache_net = get_ip_address(mid_net_interfaces, '5GMEDIA-CACHE-NET')
+
+        # Set day-1,2... configuration of all the edge vCaches concurrently
+        targets = []
+        for vdu_index, edge_net_interfaces in sorted(edges_net_interfaces.items()):
+            targets.append((get_ip_address(edge_net_interfaces, '5GMEDIA_MGMT_NET'),
+                            mid_vcache_ip_cache_net, vdu_index + 1))
+        completed = vcache.configure_all(targets, deadline=deadline)
+
+        # Update the vDNS for the configured edge vCaches
+        vdns_entries = []
+        for vdu_index, edge_net_interfaces in sorted(edges_net_interfaces.items()):
+            if completed.get(get_ip_address(edge_net_interfaces, '5GMEDIA_MGMT_NET')):
+                vdns_entries.append([get_ip_address(edge_net_interfaces, '5GMEDIA-USER-NET'),
+                                     vdu_index + 1])
+        journal.record(operation_uuid, "instantiated", "vcaches_configured",
+                       {"vdns": vdns_entries})
+        for edge_vcache_ip_user_net, vcache_incremental_counter in vdns_entries:
+            configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter)
 
     except Exception as ex:
         logger.exception(ex)
+    finally:
+        if started:
+            journal.complete(operation_uuid)
 
 
 def configure_vcdn_ns_after_termination(message):
@@ -214,54 +291,153 @@ def configure_vcdn_ns_after_termination(message):
     # Consider this action only if it is completed
     if event_state != "PROCESSING":
         return
-    logger.info('A running vCDN service is terminating. Status: {}'.format(event_state))
 
     ns_uuid = message.get('nsInstanceId', None)
-    logger.info('vCDN service uuid is {}'.format(ns_uuid))
-    token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'),
-                         OSM_ADMIN_CREDENTIALS.get('password'))
     # check nsd
-    nsd_ref_name = get_nsd_ref_name(token, ns_uuid)
-    if not (nsd_ref_name and nsd_ref_name.startswith(vCDN_NSD_PREFIX)):
+    if not is_vcdn_ns(ns_uuid):
         return
+    logger.info('A running vCDN service is terminating. Status: {}'.format(event_state))
+    logger.info('vCDN service uuid is {}'.format(ns_uuid))
 
+    operation_uuid = message.get('id', None)
+    started = False
     try:
-        # Check if event is `terminate`
-        operation_uuid = message.get('id', None)
+        # Check if event is `terminate`. The event carries the operation record.
         logger.info("The operation uuid is {}".format(operation_uuid))
-        event = get_event(token, operation_uuid)
+        event = message.get('lcmOperationType', None) or get_event(get_bearer_token(),
+                                                                    operation_uuid)
         if not event or event != "terminate":
             return
+        journal.record(operation_uuid, "terminate", "started", {"nsInstanceId": ns_uuid})
+        started = True
+        clean_vcdn_ns(ns_uuid)
+
+    except Exception as ex:
+        logger.exception(ex)
+    finally:
+        if started:
+            journal.complete(operation_uuid)
+
 
-        # update the vDNS properly
-        clean_vdns_from_regular_vnfs(ns_uuid)
+def clean_vcdn_ns(ns_uuid):
+    """ Remove the vCaches of a terminating vCDN NS from the vDNS
 
-        # fetch the number of spawned faas vnfs from db and update the vDNS configuration properly
-        last_operation = get_last_operation(ns_uuid)
-        instances_number = last_operation.get('instance_number', 0)
-        if instances_number > 0:
-            # update the vDNS configuration by deleting the vDNS configuration
-            # related to the faas edge vCaches
-            clean_vdns_from_faas_vnfs(ns_uuid, instances_number)
+    The vDNS entries of the regular and of the FaaS edge vCaches and the faas operations of
+    the NS in InfluxDB are cleaned up concurrently.
 
+    Args:
+        ns_uuid (str): The NS identifier
+    """
+    started_at = time.time()
+    cleanup = ns_terminate_action.clean_up(ns_uuid, get_operations(ns_uuid))
+    logger.info('The vCDN NS {} was cleaned up in {:.3f} seconds ({})'.format(
+        ns_uuid, time.time() - started_at, ', '.join(
+            '{}: {:.3f}s'.format(name, result['seconds']) for name, result in cleanup.items())))
+
+
+def resume_workflows():
+    """ Resume the configuration workflows that were interrupted by a restart, once per process
+
+    The journal is loaded synchronously; the workflows are resumed in the background. The
+    next calls (e.g. after a failure of the consumer) neither reload the journal, which would
+    drop the buffered records, nor resume the same workflows again.
+
+    Returns:
+        threading.Thread: the thread that resumes the workflows, if any
+    """
+    with RESUMED_LOCK:
+        if RESUMED["done"]:
+            return RESUMED["thread"]
+        RESUMED["done"] = True
+        pending = journal.load()
+        if not pending:
+            return None
+        thread = threading.Thread(target=lambda: [resume_workflow(record)
+                                                  for record in pending.values()],
+                                  name="journal-replay", daemon=True)
+        thread.start()
+        RESUMED["thread"] = thread
+        return thread
+
+
+def resume_workflow(record):
+    """ Resume a configuration workflow from its last recorded step
+
+    Args:
+        record (dict): The last journal record of the workflow
+    """
+    kind, step, data = record.get('kind'), record.get('step'), record.get('data') or {}
+    logger.info('Resume the `{}` workflow of the operation {} from the step `{}`'.format(
+        kind, record.get('id'), step))
+    try:
+        if step == "vcaches_configured":
+            # Only the vDNS entries are missing
+            for edge_vcache_ip_user_net, vcache_incremental_counter in data.get('vdns', []):
+                configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter)
+            journal.complete(record.get('id'))
+        elif kind == "terminate":
+            with ns_locks.hold(data.get('nsInstanceId', None)):
+                clean_vcdn_ns(data.get('nsInstanceId', None))
+            journal.complete(record.get('id'))
+        else:
+            # The vCaches are configured from scratch; the configuration is idempotent
+            handle_event(kind, data)
+            # The flow returns early without completing its record, e.g. if the NS is no
+            # longer a vCDN service
+            journal.complete(record.get('id'))
     except Exception as ex:
         logger.exception(ex)
+        journal.complete(record.get('id'))
 
 
-def get_nsd_ref_name(token, ns_uuid):
-    """ Get the nsd reference name by ns identifier
+def get_ns_metadata(ns_uuid):
+    """ Get the metadata of a NS, from the cache if any
 
     Args:
-        token (str): the auth token in OSM
         ns_uuid (str): The identifier of the NS
 
     Returns:
-        str: the nsd reference name
+        dict: the nsd reference name (`nsd-name-ref`) and the name of the NS
     """
-    ns = NetworkService(token)
-    request = ns.get(ns_uuid=ns_uuid)
-    response = request.json()
-    return response.get('nsd-name-ref', None)
+    def load():
+        ns = NetworkService(get_bearer_token())
+        request = ns.get(ns_uuid=ns_uuid)
+        if request.status_code != 200:
+            # Do not cache a failed lookup
+            return None
+        response = request.json()
+        return {"nsd-name-ref": response.get('nsd-name-ref', None),
+                "name": response.get('name', None)}
+
+    return ns_metadata.get_or_load(ns_uuid, load) or {}
+
+
+def is_vcdn_ns(ns_uuid):
+    """ Check if a NS is a vCDN service by its nsd reference name
+
+    Args:
+        ns_uuid (str): The identifier of the NS
+
+    Returns:
+        bool: True for a vCDN service. Otherwise, False.
+    """
+    if ns_uuid is None:
+        return False
+    nsd_ref_name = get_ns_metadata(ns_uuid).get('nsd-name-ref', None)
+    return bool(nsd_ref_name and nsd_ref_name.startswith(vCDN_NSD_PREFIX))
+
+
+def keep_scale_type(message):
+    """ Keep the scale type of a submitted scale operation, for its `scaled` event
+
+    Args:
+        message (dict): The message of scale event in ns topic (or its needed fields)
+    """
+    operation_uuid = message.get('_id', None)
+    scale_type = message.get('scaleVnfType', None) or message.get(
+        'operationParams', {}).get('scaleVnfData', {}).get('scaleVnfType', None)
+    if operation_uuid is not None and scale_type is not None:
+        scale_types.set(operation_uuid, scale_type)
 
 
 def get_event(token, operation_uuid):
@@ -298,49 +474,41 @@ def get_scale_event(token, operation_uuid):
     return event
 
 
-def ping_edge_vcache_ip(edge_vcache_ip_mgmt_net):
-    """ Check edge vCache net availability using ping
+def discover_vcdn_net_interfaces(ns_uuid, deadline):
+    """ Wait until the vnf records include the IPv4 of the mid and edge vCaches
 
     Args:
-        edge_vcache_ip_mgmt_net (str): The edge vCache IP in MGMT network
-    """
-    for attempt in range(1, 20):
-        # Ping the new vCache
-        vcache_ping_status = check_ping(edge_vcache_ip_mgmt_net)
-        logger.info("Ping the vCache VNF IP in MGMT net: {} => {}".format(edge_vcache_ip_mgmt_net,
-                                                                          vcache_ping_status))
-        if vcache_ping_status:
-            logger.info('Ping is available...')
-            break
-        # Try in 10 seconds
-        time.sleep(10)
-
-
-def configure_edge_vcache(edge_vcache_ip_mgmt_net, mid_vcache_ip_cache_net,
-                          vcache_incremental_counter):
-    """ Apply day 1, 2 vCache configuration
-
-    Args:
-        edge_vcache_ip_mgmt_net:
-        mid_vcache_ip_cache_net:
-        vcache_incremental_counter:
+        ns_uuid (str): The NS identifier
+        deadline (float): The epoch after which the discovery fails
 
     Returns:
-        bool: True for completion. Else, False.
+        tuple(dict, dict): The interfaces of the Mid vCache and the interfaces of the Edge
+            vCaches per VDU count-index
+
+    Raises:
+        vCacheConfigurationFailed: The IPv4 of the vCaches were not found until the deadline.
     """
-    completed = True
-    try:
-        vcache_conf = vcache.Configuration(edge_vcache_ip_mgmt_net, mid_vcache_ip_cache_net)
-        vcache_conf.apply(vcache_incremental_counter)
-        logger.info(
-            "Edge vCache VNF with IP `{}` (MGMT network) has been configured wrt the mid vCache "
-            "VNF with IP `{}` (CACHE network) and index `{}`."
-            "".format(edge_vcache_ip_mgmt_net, mid_vcache_ip_cache_net, vcache_incremental_counter))
-    except Exception as ex:
-        logger.error(ex)
-        completed = False
-    finally:
-        return completed
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            mid_net_interfaces, edges_net_interfaces = get_vcdn_edges_net_interfaces(
+                ns_uuid, search_for_mid_cache="vCache_mid_vdu",
+                search_for_edge_cache="vCache_edge_vdu")
+            if get_ip_address(mid_net_interfaces, '5GMEDIA-CACHE-NET') and \
+                    edges_net_interfaces and \
+                    all(get_ip_address(interfaces, '5GMEDIA_MGMT_NET')
+                        for interfaces in edges_net_interfaces.values()):
+                return mid_net_interfaces, edges_net_interfaces
+        except Exception as ex:
+            logger.debug("vCache discovery: Attempt #{} failed: {}".format(attempt, ex))
+
+        if time.time() >= deadline:
+            raise vCacheConfigurationFailed(
+                "The IPv4 of the vCaches of the NS `{}` were not found in the vnf "
+                "records".format(ns_uuid))
+        time.sleep(min(backoff_delay(attempt, base_delay=1, max_delay=10),
+                       max(0, deadline - time.time())))
 
 
 def configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter):
@@ -357,59 +525,7 @@ def configure_vdns(edge_vcache_ip_user_net, vcache_incremental_counter):
                                                 vcache_incremental_counter))
 
 
-def clean_vdns_from_regular_vnfs(ns_uuid):
-    """  Update the vDNS configuration upon vCDN ns termination related to the regular vnfs
-
-    Args:
-        ns_uuid (str): The NS identifier
-
-    Returns:
-        None
-    """
-    instances_number = 0
-    vdns_conf = vdns.Configuration()
-    try:
-        net_interfaces, current_vdu_index = get_vcdn_net_interfaces(
-            ns_uuid, search_for_mid_cache="vCache_mid_vdu", search_for_edge_cache="vCache_edge_vdu")
-        instances_number = int(current_vdu_index) + 1
-    except Exception as ex:
-        logger.exception("clean_vdns_from_regular_vnfs error: {}".format(ex))
-    finally:
-        for instance_number in range(1, int(instances_number) + 1):
-            vdns_conf.delete_vcache_entry(instance_number)
-            logger.info("Remove the regular Edge vCache VNF with N={} from vDNS VNF. Configuration "
-                        "was sent to vDNS VNF".format(instance_number))
-
-
-def clean_vdns_from_faas_vnfs(ns_uuid, instances_number):
-    """ Update the vDNS configuration upon vCDN ns termination related to the faas vnfs
-
-    Args:s
-        ns_uuid (str): The NS identifier
-        instances_number (int): The number of faas vnfs instances
-
-    Returns:
-        None
-    """
-    vdns_conf = vdns.Configuration()
-    for instance_number in range(1, int(instances_number) + 1):
-        try:
-            # Delete the vDNS configuration related to the faas edge vCache
-            vdns_conf.delete_faas_vcache_entry(instance_number)
-            logger.info("Remove the FaaS Edge vCache VNF with N={} from vDNS VNF. Configuration "
-                        "was sent to vDNS VNF".format(instance_number))
-        except Exception as ex:
-            logger.error(ex)
-
-    try:
-        # delete all records from the faas_operations measurement in db
-        status = delete_operation_by_ns(ns_uuid)
-        # logger.debug(
-        #     'Delete the record from faas_operations measurement in influx related to the NS '
-        #     '{}. Status: {}'.format(ns_uuid, status))
-    except Exception as ex:
-        logger.exception(ex)
-
-
 if __name__ == '__main__':
+    admin.start(port=ADMIN_API['subscriber_port'])
+    profiling.install_signal_handlers()
     main()
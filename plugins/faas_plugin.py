@@ -1,17 +1,20 @@
 from time import sleep
-import logging.config
+import logging
 from actions.utils import get_faas_vcdn_net_interfaces
 from actions import faas_action
-from nbiapi.identity import bearer_token
+from nbiapi.identity import get_bearer_token
 from nbiapi.ns import Ns as NetworkService
 from faasapi.ns_polling import NetworkServicePolling
 from influx.queries import get_first_operation, get_last_operation, delete_operation, \
     store_operation
+from actions.exceptions import FaasBootstrapNotReady, FaasVnfNotFound
+from runtime.retry import backoff_delays
 from utils import generate_event_uuid
-from settings import OSM_ADMIN_CREDENTIALS, OSM_IP, OSM_FAAS_IP, OSM_FAAS_PORT, VDNS_IP, \
-    VDNS_PORT, LOGGING
+from settings import OSM_IP, OSM_FAAS_IP, OSM_FAAS_PORT, VDNS_IP, \
+    VDNS_PORT, FAAS_INGRESS_URL_POLLING_ATTEMPTS
+from runtime.logs import configure_logging
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger("worker")
 
 
@@ -33,20 +36,7 @@ def execute_faas_vnf_scale_out(ns_name, ns_uuid, vnfd_uuid):
         'ip-address', None)
 
     # Get the bootstrap details
-    ns_poll = NetworkServicePolling(OSM_IP, OSM_FAAS_IP, OSM_FAAS_PORT, ns_name)
-    # Polling attempts every 10 secs - do 20 attempts
-    bootstrap_ingress_url = None
-    for i in range(1, 20):
-        bootstrap_ingress_url = ns_poll.get_bootstrap_ingress_url()
-        if bootstrap_ingress_url is not None:
-            break
-        sleep(10)
-
-    if bootstrap_ingress_url is None:
-        logger.error('Fail to poll the bootstrap IngressUrl of the vCDN NS')
-        return
-    logger.info('The service-specific serverless orchestration host/port of the vCDN service {} '
-                'was retrieved: {}.'.format(ns_uuid, bootstrap_ingress_url))
+    bootstrap_ingress_url = poll_bootstrap_ingress_url(ns_name, ns_uuid)
 
     # get the number of running FaaS edge vCache VFNss
     running_faas_edge_vcaches = 0
@@ -86,27 +76,15 @@ def execute_faas_vnf_scale_in(ns_name, ns_uuid, vnfd_uuid):
         ns_name = get_ns_name(ns_uuid)
 
     # Get the bootstrap details
-    ns_poll = NetworkServicePolling(OSM_IP, OSM_FAAS_IP, OSM_FAAS_PORT, ns_name)
-    # Polling attempts every 10 secs - do 20 attempts
-    bootstrap_ingress_url = None
-    for i in range(1, 20):
-        bootstrap_ingress_url = ns_poll.get_bootstrap_ingress_url()
-        if bootstrap_ingress_url is not None:
-            break
-        sleep(10)
-
-    if bootstrap_ingress_url is None:
-        logger.error('Fail to poll the bootstrap IngressUrl of the vCDN NS')
-        return
-    logger.info('The service-specific serverless orchestration host/port of the vCDN service {} '
-                'was retrieved: {}.'.format(ns_uuid, bootstrap_ingress_url))
+    bootstrap_ingress_url = poll_bootstrap_ingress_url(ns_name, ns_uuid)
 
     # Get the less recent event uuid related to a spawned vnf
     operation = get_first_operation(ns_uuid)
     spawn_event_uuid = operation.get('event_uuid', None)
     instance_number = operation.get('instance_number', None)
     if spawn_event_uuid is None or instance_number is None:
-        raise Exception('Failed to apply a FaaS scale in operation')
+        raise FaasVnfNotFound('Failed to apply a FaaS scale in operation in the NS {}: no '
+                              'spawned FaaS edge vCache was found'.format(ns_uuid))
 
     # generate a unique uuid for the termination operation
     terminate_event_uuid = generate_event_uuid()
@@ -121,10 +99,37 @@ def execute_faas_vnf_scale_in(ns_name, ns_uuid, vnfd_uuid):
         delete_operation(spawn_event_uuid)
 
 
+def poll_bootstrap_ingress_url(ns_name, ns_uuid):
+    """ Poll the IngressUrl of the bootstrap serverless VNF
+
+    A few attempts are performed with backoff. If the IngressUrl is still missing, the action
+    fails so that it is rescheduled without blocking the execution lane.
+
+    Args:
+        ns_name (str): the NS name
+        ns_uuid (str): The NS uuid
+
+    Returns:
+        str: the IngressUrl
+
+    Raises:
+        FaasBootstrapNotReady: The IngressUrl is not available yet.
+    """
+    ns_poll = NetworkServicePolling(OSM_IP, OSM_FAAS_IP, OSM_FAAS_PORT, ns_name)
+    for delay in backoff_delays(FAAS_INGRESS_URL_POLLING_ATTEMPTS, base_delay=1, max_delay=10):
+        bootstrap_ingress_url = ns_poll.get_bootstrap_ingress_url()
+        if bootstrap_ingress_url is not None:
+            logger.info('The service-specific serverless orchestration host/port of the vCDN '
+                        'service {} was retrieved: {}.'.format(ns_uuid, bootstrap_ingress_url))
+            return bootstrap_ingress_url
+        sleep(delay)
+    raise FaasBootstrapNotReady('Fail to poll the bootstrap IngressUrl of the vCDN NS {}'.format(
+        ns_uuid))
+
+
 def get_ns_name(ns_uuid):
     # Get the NS name based on the NS uuid
-    token = bearer_token(OSM_ADMIN_CREDENTIALS.get('username'),
-                         OSM_ADMIN_CREDENTIALS.get('password'))
+    token = get_bearer_token()
     ns = NetworkService(token)
     response = ns.get(ns_uuid=ns_uuid)
     data = response.json()
@@ -0,0 +1,79 @@
+import time
+import itertools
+import threading
+
+
+class Activity:
+    """Registry of the actions and workflows that are running in the process.
+
+    Each running action has its key (e.g. the NS uuid), its type and its current step. The
+    step of the action of the current thread is updated through `step`.
+
+    Examples:
+        >>> from runtime.activity import activity
+        >>> activity.start("0c9e", "vnf_scale_out", step="waiting_lock")
+        >>> activity.step("scaling")
+        >>> activity.snapshot()
+        {'0c9e': [{'action': 'vnf_scale_out', 'step': 'scaling', 'since': ..., ...}]}
+        >>> activity.finish()
+    """
+
+    def __init__(self):
+        """Constructor"""
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__sequence = itertools.count()
+        self.running = {}
+
+    def start(self, key, action, step="started"):
+        """ Register the action of the current thread
+
+        Args:
+            key (str): The entity of the action, e.g. the NS uuid
+            action (str): The action type, e.g. the planning type or the event key
+            step (str): The initial step
+        """
+        now = time.time()
+        identifier = next(self.__sequence)
+        with self.__lock:
+            self.running[identifier] = {"key": key, "action": action, "step": step,
+                                        "since": now, "step_since": now,
+                                        "thread": threading.current_thread().name}
+        self.__local.identifier = identifier
+
+    def step(self, step):
+        """ Update the step of the action of the current thread
+
+        Args:
+            step (str): The current step, e.g. "configuring_vdns"
+        """
+        identifier = getattr(self.__local, 'identifier', None)
+        with self.__lock:
+            entry = self.running.get(identifier, None)
+            if entry is not None:
+                entry["step"] = step
+                entry["step_since"] = time.time()
+
+    def finish(self):
+        """Unregister the action of the current thread"""
+        identifier = getattr(self.__local, 'identifier', None)
+        self.__local.identifier = None
+        with self.__lock:
+            self.running.pop(identifier, None)
+
+    def snapshot(self):
+        """ Get the running actions per key
+
+        Returns:
+            dict: the running actions (action, step, since, step_since, thread) per key
+        """
+        with self.__lock:
+            entries = [dict(entry) for entry in self.running.values()]
+        actions = {}
+        for entry in entries:
+            actions.setdefault('{}'.format(entry.pop("key")), []).append(entry)
+        return actions
+
+
+# The running actions of the process, shared by the worker and the subscriber flows
+activity = Activity()
@@ -0,0 +1,222 @@
+import hmac
+import json
+import math
+import threading
+import logging
+from socketserver import ThreadingMixIn
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from runtime import metrics, operations, profiling
+from runtime.activity import activity
+from runtime.breaker import BREAKERS
+from runtime.cache import CACHES
+from runtime.locks import ns_locks
+from runtime.startup import TIMERS
+from settings import ADMIN_API, PROFILING
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The views of the process-specific components (e.g. lanes, journal) by name
+PROVIDERS = {}
+SERVER = {"instance": None}
+SERVER_LOCK = threading.Lock()
+
+
+def register(name, provider):
+    """ Expose the state of a component in the admin API as `GET /<name>`
+
+    Args:
+        name (str): The resource name, e.g. "lanes"
+        provider (callable): Function without arguments that returns a JSON-serializable value
+    """
+    PROVIDERS[name] = provider
+
+
+def get_caches():
+    return {name: dict(cache.stats(), ttl=cache.ttl, max_size=cache.max_size)
+            for name, cache in CACHES.items()}
+
+
+def get_cache(name):
+    cache = CACHES[name]
+    return dict(cache.stats(), ttl=cache.ttl, max_size=cache.max_size,
+                keys=['{}'.format(key) for key in cache.keys()])
+
+
+def invalidate_cache(name, key=None):
+    """ Drop an entry (given its string representation) or all the entries of a cache
+
+    Args:
+        name (str): The cache name
+        key (str, optional): The entry key as listed in `GET /caches/<name>`
+
+    Returns:
+        dict: the number of the dropped entries
+    """
+    cache = CACHES[name]
+    if key is None:
+        dropped = len(cache.keys())
+        cache.invalidate()
+    else:
+        matches = [entry for entry in cache.keys() if '{}'.format(entry) == key]
+        for entry in matches:
+            cache.invalidate(entry)
+        dropped = len(matches)
+    logger.info('Admin API: {} entries of the cache {} were invalidated'.format(dropped, name))
+    return {"cache": name, "invalidated": dropped}
+
+
+def parse_duration(value):
+    """ Parse the duration of a profiling window
+
+    Args:
+        value (str): The seconds, e.g. "60". None for the default window.
+
+    Returns:
+        float: the seconds or None for the default window
+
+    Raises:
+        ValueError: The duration is not a number in (0, PROFILING max_window].
+    """
+    if value is None:
+        return None
+    duration = float(value)
+    if not math.isfinite(duration) or not 0 < duration <= PROFILING['max_window']:
+        raise ValueError('The duration must be in (0, {:g}] seconds'.format(
+            PROFILING['max_window']))
+    return duration
+
+
+def is_authorized(token):
+    """ Check the token of a POST request
+
+    Args:
+        token (str): The X-Admin-Token header
+
+    Returns:
+        bool: True if the ADMIN_API token is set and matches
+    """
+    if not ADMIN_API['token'] or token is None:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), ADMIN_API['token'].encode('utf-8'))
+
+
+# The read-only resources of the API
+RESOURCES = {
+    "actions": activity.snapshot,
+    "operations": lambda: operations.index.snapshot(),
+    "caches": get_caches,
+    "breakers": lambda: {name: breaker.status() for name, breaker in BREAKERS.items()},
+    "locks": lambda: {'{}'.format(key): count for key, count in ns_locks.held().items()},
+    "metrics": metrics.snapshot,
+    "startup": lambda: {name: timer.snapshot() for name, timer in TIMERS.items()},
+}
+
+
+class AdminRequestHandler(BaseHTTPRequestHandler):
+    """Serve the state of the process in JSON
+
+    - GET /: the available resources
+    - GET /<resource>, e.g. /actions, /operations, /lanes, /caches, /breakers, /locks, /metrics,
+      /startup
+    - GET /caches/<name>: the statistics and the keys of a cache
+    - POST /caches/<name>/invalidate[?key=<key>]: drop an entry or all the entries of a cache
+    - POST /profile/<kind>[?duration=<seconds>]: start a profiling window (sampling, cprofile,
+      tracemalloc, timings); the result is written in the PROFILING directory
+
+    The POST requests require the ADMIN_API token in the X-Admin-Token header; they are refused
+    if no token is set.
+    """
+    server_version = "mape-executor-admin"
+
+    def do_GET(self):
+        path = urlparse(self.path).path.strip('/').split('/')
+        try:
+            if path == ['']:
+                self.respond(200, sorted(list(RESOURCES.keys()) + list(PROVIDERS.keys())))
+            elif len(path) == 1 and path[0] in RESOURCES:
+                self.respond(200, RESOURCES[path[0]]())
+            elif len(path) == 1 and path[0] in PROVIDERS:
+                self.respond(200, PROVIDERS[path[0]]())
+            elif len(path) == 2 and path[0] == "caches" and path[1] in CACHES:
+                self.respond(200, get_cache(path[1]))
+            else:
+                self.respond(404, {"error": "Not found"})
+        except Exception as ex:
+            logger.exception(ex)
+            self.respond(500, {"error": "{}".format(ex)})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        path = url.path.strip('/').split('/')
+        if not is_authorized(self.headers.get('X-Admin-Token')):
+            self.respond(403, {"error": "Forbidden"})
+            return
+        try:
+            if len(path) == 3 and path[0] == "caches" and path[1] in CACHES and \
+                    path[2] == "invalidate":
+                key = parse_qs(url.query).get('key', [None])[0]
+                self.respond(200, invalidate_cache(path[1], key))
+            elif len(path) == 2 and path[0] == "profile" and path[1] in profiling.KINDS:
+                try:
+                    duration = parse_duration(parse_qs(url.query).get('duration', [None])[0])
+                except ValueError as ex:
+                    self.respond(400, {"error": "Invalid duration: {}".format(ex)})
+                    return
+                started = profiling.trigger(path[1], duration)
+                self.respond(202 if started else 409, {"profile": path[1], "started": started})
+            else:
+                self.respond(404, {"error": "Not found"})
+        except Exception as ex:
+            logger.exception(ex)
+            self.respond(500, {"error": "{}".format(ex)})
+
+    def respond(self, status_code, content):
+        """ Send a JSON response
+
+        Args:
+            status_code (int): The HTTP status code
+            content (any): The response body
+        """
+        body = json.dumps(content, default=str, indent=2).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug('Admin API: {}'.format(format % args))
+
+
+class AdminServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start(port=None):
+    """ Start the admin API of the process in a background thread, once per process
+
+    Args:
+        port (int, optional): The TCP port. Default is the port of the ADMIN_API setting.
+
+    Returns:
+        AdminServer: the server or None if it is disabled or the port is not available
+    """
+    if not ADMIN_API['enabled']:
+        return None
+    with SERVER_LOCK:
+        if SERVER["instance"] is not None:
+            return SERVER["instance"]
+        port = ADMIN_API['port'] if port is None else port
+        try:
+            server = AdminServer((ADMIN_API['host'], port), AdminRequestHandler)
+        except OSError as ex:
+            logger.error('The admin API failed to listen on {}:{}: {}'.format(
+                ADMIN_API['host'], port, ex))
+            return None
+        threading.Thread(target=server.serve_forever, name="admin-api", daemon=True).start()
+        SERVER["instance"] = server
+        logger.info('The admin API listens on {}:{}'.format(ADMIN_API['host'], port))
+        return server
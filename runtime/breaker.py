@@ -0,0 +1,202 @@
+import time
+import threading
+from collections import deque
+from runtime import metrics
+from runtime.exceptions import CircuitBreakerOpen
+from settings import CIRCUIT_BREAKER
+
+# The circuit breakers of the running process by upstream name
+BREAKERS = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """Fail fast the calls to an unavailable upstream (e.g. the OSM NBI).
+
+    The breaker opens when the ratio of the failed or slow calls in the recent window exceeds
+    the threshold. While it is open, the calls are rejected. After `open_duration` seconds,
+    a few probe calls are allowed (half-open): a success closes the breaker while a failure
+    opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, window=60, min_calls=5, failure_ratio=0.5, slow_call_duration=20,
+                 open_duration=30, half_open_calls=1):
+        """Constructor
+
+        Args:
+            name (str): The upstream name, e.g. "nbi", "vdns", "vcache:192.168.111.29"
+            window (int): The seconds of the recent calls that are considered
+            min_calls (int): The min number of recent calls to open the breaker
+            failure_ratio (float): The ratio of the failed/slow calls that opens the breaker
+            slow_call_duration (float): The seconds after which a call is considered as failed
+            open_duration (float): The seconds the breaker stays open before the probe calls
+            half_open_calls (int): The number of concurrent probe calls
+        """
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_duration = slow_call_duration
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.probes = 0
+        self.calls = deque()
+        self.__lock = threading.Lock()
+        self.set_state(self.CLOSED)
+
+    def set_state(self, state):
+        """ Change the state of the breaker and report it
+
+        Args:
+            state (str): The new state
+        """
+        self.state = state
+        metrics.set_gauge('circuit_breaker_state', self.STATES[state], upstream=self.name)
+
+    def allow(self):
+        """ Check if a call can be sent to the upstream
+
+        Returns:
+            bool: True if the call is allowed. Otherwise, False.
+        """
+        with self.__lock:
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.open_duration:
+                    return False
+                self.set_state(self.HALF_OPEN)
+                self.probes = 0
+            if self.state == self.HALF_OPEN:
+                if self.probes >= self.half_open_calls:
+                    return False
+                self.probes += 1
+            return True
+
+    def record(self, failed):
+        """ Record the outcome of a call
+
+        Args:
+            failed (bool): If the call failed or it was slow
+        """
+        now = time.time()
+        with self.__lock:
+            if self.state == self.HALF_OPEN:
+                self.probes = max(0, self.probes - 1)
+                if failed:
+                    self.trip(now)
+                else:
+                    self.calls.clear()
+                    self.set_state(self.CLOSED)
+                return
+
+            self.calls.append((now, failed))
+            while self.calls and self.calls[0][0] < now - self.window:
+                self.calls.popleft()
+            failures = sum(1 for _, call_failed in self.calls if call_failed)
+            if self.state == self.CLOSED and len(self.calls) >= self.min_calls and \
+                    failures / len(self.calls) >= self.failure_ratio:
+                self.trip(now)
+
+    def trip(self, now):
+        """ Open the breaker
+
+        Args:
+            now (float): The current time
+        """
+        self.opened_at = now
+        self.calls.clear()
+        self.set_state(self.OPEN)
+        metrics.increment('circuit_breaker_opened', upstream=self.name)
+
+    def call(self, function, is_failure=None):
+        """ Call the upstream through the breaker
+
+        Args:
+            function (callable): The call, without arguments
+            is_failure (callable, optional): Checks if a returned result is a failure, e.g.
+                an HTTP response with status code 5xx
+
+        Returns:
+            any: the result of the call
+
+        Raises:
+            CircuitBreakerOpen: The breaker is open; the call was not sent.
+
+        Examples:
+            >>> import requests
+            >>> from runtime.breaker import get_breaker
+            >>> breaker = get_breaker("vdns")
+            >>> response = breaker.call(lambda: requests.get("http://192.168.111.20:9999/dns"),
+            ...                         is_failure=lambda r: r.status_code >= 500)
+        """
+        if not self.allow():
+            metrics.increment('circuit_breaker_rejected', upstream=self.name)
+            raise CircuitBreakerOpen(
+                'The circuit breaker of the upstream `{}` is {}'.format(self.name, self.state))
+
+        started_at = time.time()
+        try:
+            result = function()
+        except Exception:
+            self.record(True)
+            raise
+        slow = time.time() - started_at > self.slow_call_duration
+        self.record(slow or bool(is_failure is not None and is_failure(result)))
+        return result
+
+    def status(self):
+        """ Get the current status of the breaker
+
+        Returns:
+            dict: the state and the recent calls
+        """
+        with self.__lock:
+            return {"state": self.state, "opened_at": self.opened_at,
+                    "recent_calls": len(self.calls),
+                    "recent_failures": sum(1 for _, failed in self.calls if failed)}
+
+
+def get_breaker(name):
+    """ Get (or create) the circuit breaker of an upstream
+
+    Args:
+        name (str): The upstream name
+
+    Returns:
+        CircuitBreaker: the breaker of the upstream
+    """
+    breaker = BREAKERS.get(name, None)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = BREAKERS.get(name, None)
+            if breaker is None:
+                breaker = CircuitBreaker(name, **CIRCUIT_BREAKER)
+                BREAKERS[name] = breaker
+    return breaker
+
+
+def drop_breaker(name):
+    """ Forget the circuit breaker of an upstream, e.g. after the removal of a VNF
+
+    Args:
+        name (str): The upstream name
+    """
+    with _breakers_lock:
+        BREAKERS.pop(name, None)
+
+
+def is_server_error(response):
+    """ Check if an HTTP response indicates an upstream failure
+
+    Args:
+        response (obj): A requests object
+
+    Returns:
+        bool: True for 5xx status codes
+    """
+    return response.status_code >= 500
@@ -0,0 +1,115 @@
+import time
+import threading
+from collections import OrderedDict
+
+# The caches of the running process by name
+CACHES = {}
+
+
+class TtlCache:
+    """A thread-safe LRU cache whose entries expire after a time-to-live.
+
+    The caches live per process: each worker process warms its own entries.
+    """
+
+    def __init__(self, name, ttl=300, max_size=1024):
+        """Constructor
+
+        Args:
+            name (str): The cache name, e.g. "tokens"
+            ttl (int): The time-to-live of the entries in seconds. Zero means no expiration.
+            max_size (int): The max number of entries. The least recently used is evicted.
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        CACHES[name] = self
+
+    def get(self, key, default=None):
+        """ Get an entry if it exists and it is not expired
+
+        Args:
+            key (hashable): The entry key
+            default (any, optional): The value if the entry is missing
+
+        Returns:
+            any: the cached value or the default one
+        """
+        with self.__lock:
+            entry = self.__entries.get(key, None)
+            if entry is not None and (not self.ttl or entry[1] > time.time()):
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """ Add or replace an entry
+
+        Args:
+            key (hashable): The entry key
+            value (any): The entry value
+        """
+        with self.__lock:
+            self.__entries[key] = (value, time.time() + self.ttl)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """ Get an entry or load it (and keep it) on a miss
+
+        The loader result is not cached if it is None.
+
+        Args:
+            key (hashable): The entry key
+            loader (callable): Function without arguments that returns the value
+
+        Returns:
+            any: the value
+        """
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """ Drop an entry or all the entries
+
+        Args:
+            key (hashable, optional): The entry key. If missing, the cache is cleared.
+        """
+        with self.__lock:
+            if key is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(key, None)
+
+    def keys(self):
+        """ Get the keys of the cached entries
+
+        Returns:
+            list: the keys
+        """
+        with self.__lock:
+            return list(self.__entries.keys())
+
+    def stats(self):
+        """ Get the usage statistics of the cache
+
+        Returns:
+            dict: the size, hits, misses and hit ratio
+        """
+        with self.__lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.__entries), "hits": self.hits, "misses": self.misses,
+                    "hit_ratio": round(self.hits / lookups, 3) if lookups else None}
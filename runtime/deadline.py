@@ -0,0 +1,77 @@
+from datetime import datetime
+from settings import ACTION_TTL, ACTION_TTL_DEFAULT
+
+
+def parse_timestamp(timestamp):
+    """ Parse the UTC timestamp of an execution message
+
+    Args:
+        timestamp (str): The timestamp, e.g. "2020-03-12T15:16:07.000000Z"
+
+    Returns:
+        datetime: the timestamp or None if it is missing or invalid
+    """
+    if not isinstance(timestamp, str):
+        return None
+    for time_format in ('%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ'):
+        try:
+            return datetime.strptime(timestamp, time_format)
+        except ValueError:
+            continue
+    return None
+
+
+def get_action_age(timestamp, now=None):
+    """ Get the age of an optimization action based on the `metric.timestamp`
+
+    Args:
+        timestamp (str): The `metric.timestamp` of the message from ns.instances.exec
+        now (datetime, optional): The current UTC time. Default is `datetime.utcnow()`.
+
+    Returns:
+        float: the age in seconds or None if the message has no valid timestamp
+    """
+    timestamp = parse_timestamp(timestamp)
+    if timestamp is None:
+        return None
+    if now is None:
+        now = datetime.utcnow()
+    return (now - timestamp).total_seconds()
+
+
+def get_action_ttl(action):
+    """ Get the time-to-live of a planning type
+
+    Args:
+        action (str): The planning type, e.g. "vnf_scale_out"
+
+    Returns:
+        int: the TTL in seconds. Zero means that the action never expires.
+    """
+    return ACTION_TTL.get(action, ACTION_TTL_DEFAULT)
+
+
+def check_deadline(timestamp, action, now=None):
+    """ Check if the deadline of an optimization action has passed
+
+    Messages without a valid timestamp are never considered as expired.
+
+    Args:
+        timestamp (str): The `metric.timestamp` of the message from ns.instances.exec
+        action (str): The planning type
+        now (datetime, optional): The current UTC time
+
+    Returns:
+        tuple(bool, float): The expiration flag and the age of the action in seconds
+
+    Examples:
+        >>> from runtime.deadline import check_deadline
+        >>> expired, age = check_deadline("2020-03-12T15:16:07.000000Z", "set_vce_bitrate")
+        >>> expired
+        True
+    """
+    age = get_action_age(timestamp, now=now)
+    ttl = get_action_ttl(action)
+    if age is None or not ttl:
+        return False, age
+    return age > ttl, age
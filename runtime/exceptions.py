@@ -0,0 +1,13 @@
+class CircuitBreakerOpen(Exception):
+    """The upstream is unavailable; the call was rejected without being sent"""
+    pass
+
+
+class LockTimeout(Exception):
+    """The lock of an entity (e.g. a NS) was not acquired in time"""
+    pass
+
+
+class RequestOutcomeUnknown(Exception):
+    """A non-idempotent request was sent but its response was lost (e.g. read timeout)"""
+    pass
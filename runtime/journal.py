@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+import logging
+from runtime import metrics
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+class Journal:
+    """Append-only journal of the in-progress workflows (one JSON record per line).
+
+    Each record keeps the current step of a workflow. The records are buffered and written
+    with a single fsync per batch. On startup, `load` returns the unfinished workflows and
+    compacts the file, so that it keeps only their last records. The file is compacted again
+    once it holds `compaction_ratio` times the records of the unfinished workflows.
+
+    Examples:
+        >>> from runtime.journal import Journal
+        >>> journal = Journal("/tmp/subscriber.journal")
+        >>> pending = journal.load()
+        >>> journal.record("5d2b", "scaled", "started", {"nsr_id": "0c9e"})
+        >>> journal.record("5d2b", "scaled", "vcaches_configured", {"nsr_id": "0c9e"})
+        >>> journal.complete("5d2b")
+    """
+    DONE = "done"
+
+    def __init__(self, path, flush_interval=0.2, batch_size=100, compaction_ratio=4,
+                 min_compaction_records=1000):
+        """Constructor
+
+        Args:
+            path (str): The journal file
+            flush_interval (float): The max seconds a record waits in the buffer
+            batch_size (int): The number of buffered records that triggers a flush
+            compaction_ratio (float): The ratio of the written records to the records of the
+                unfinished workflows that triggers a compaction
+            min_compaction_records (int): The number of the written records below which the
+                journal is not compacted
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compaction_ratio = compaction_ratio
+        self.min_compaction_records = min_compaction_records
+        self.workflows = {}
+        self.buffer = []
+        self.records = 0
+        self.file = None
+        self.__lock = threading.Lock()
+        self.__flush = threading.Event()
+        self.__thread = None
+
+    def load(self):
+        """ Load the unfinished workflows and compact the journal
+
+        It runs once per process, before any record. The buffered records (if any) are
+        written first, so that they are not lost.
+
+        Returns:
+            dict: The last record per unfinished workflow
+        """
+        started_at = time.time()
+        self.flush()
+        workflows = {}
+        if os.path.exists(self.path):
+            with open(self.path) as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A record that was partially written before a crash
+                        continue
+                    if record.get('step') == self.DONE:
+                        workflows.pop(record.get('id'), None)
+                    else:
+                        workflows[record.get('id')] = record
+
+        self.workflows = workflows
+        self.compact()
+        logger.info('The journal {} was loaded in {:.3f} seconds ({} unfinished '
+                    'workflows)'.format(self.path, time.time() - started_at, len(workflows)))
+        return dict(workflows)
+
+    def compact(self):
+        """Rewrite the journal with the last records of the unfinished workflows"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        with self.__lock:
+            self.rewrite()
+
+    def rewrite(self):
+        """ Replace the journal with the last records of the unfinished workflows
+
+        The lock must be held. The buffered records are dropped, since the workflows already
+        include them.
+        """
+        if self.file is not None:
+            self.file.close()
+        temp_path = '{}.tmp'.format(self.path)
+        with open(temp_path, 'w') as temp_file:
+            for record in self.workflows.values():
+                temp_file.write(json.dumps(record) + '\n')
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, self.path)
+        self.file = open(self.path, 'a')
+        self.buffer = []
+        self.records = len(self.workflows)
+        metrics.increment('journal_compactions')
+
+    def record(self, workflow_id, kind, step, data=None):
+        """ Record the current step of a workflow
+
+        Args:
+            workflow_id (str): The workflow identifier, e.g. the OSM operation id
+            kind (str): The workflow type, e.g. the event key
+            step (str): The current step
+            data (dict, optional): The data needed to resume the workflow from the step
+        """
+        record = {"id": workflow_id, "kind": kind, "step": step, "data": data,
+                  "timestamp": time.time()}
+        self.append(record)
+
+    def complete(self, workflow_id):
+        """ Mark a workflow as finished (completed or abandoned)
+
+        Args:
+            workflow_id (str): The workflow identifier
+        """
+        self.append({"id": workflow_id, "step": self.DONE, "timestamp": time.time()})
+
+    def append(self, record):
+        """ Buffer a record and wake up the writer
+
+        Args:
+            record (dict): The record
+        """
+        with self.__lock:
+            if record['step'] == self.DONE:
+                self.workflows.pop(record['id'], None)
+            else:
+                self.workflows[record['id']] = record
+            self.buffer.append(json.dumps(record))
+            buffered = len(self.buffer)
+        self.start()
+        if buffered >= self.batch_size:
+            self.__flush.set()
+
+    def start(self):
+        """Start the writer thread if it is not running"""
+        if self.__thread is None:
+            with self.__lock:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(target=self.run, name="journal",
+                                                     daemon=True)
+                    self.__thread.start()
+
+    def run(self):
+        """Write the buffered records periodically"""
+        while True:
+            self.__flush.wait(self.flush_interval)
+            self.__flush.clear()
+            try:
+                self.flush()
+            except Exception as ex:
+                logger.error('Failed to write the journal {}: {}'.format(self.path, ex))
+
+    def flush(self):
+        """Write the buffered records with a single fsync, or compact the journal"""
+        with self.__lock:
+            if not self.buffer:
+                return
+            self.records += len(self.buffer)
+            if self.records >= self.min_compaction_records and \
+                    self.records > self.compaction_ratio * len(self.workflows):
+                self.rewrite()
+                return
+            if self.file is None:
+                self.file = open(self.path, 'a')
+            self.file.write('\n'.join(self.buffer) + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            metrics.increment('journal_records_written', len(self.buffer))
+            self.buffer = []
+
+    def pending(self):
+        """ Get the unfinished workflows
+
+        Returns:
+            dict: The last record per unfinished workflow
+        """
+        with self.__lock:
+            return dict(self.workflows)
@@ -0,0 +1,226 @@
+import time
+import queue
+import threading
+import zlib
+import collections
+import logging
+from runtime import metrics
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The max seconds a lane thread waits for an action before it checks the stop event
+STOP_CHECK_INTERVAL = 0.5
+
+
+class Lane:
+    """A set of threads that executes one class of actions (e.g. configuration actions).
+
+    Each thread owns its queue. The actions are routed to the queues by key (e.g. the NS uuid)
+    so the actions of the same entity are applied in the order they were consumed, while the
+    actions of different entities are applied concurrently.
+
+    The submission never blocks: when the queue of a thread is full, the actions are held in
+    the overflow list of the thread, which refills the queue in order. The consumer pauses
+    while a lane holds `max_overflow` actions (see `saturated`).
+    """
+
+    def __init__(self, name, concurrency=1, queue_size=100, max_overflow=1000):
+        """Constructor
+
+        Args:
+            name (str): The lane name
+            concurrency (int): The number of threads of the lane
+            queue_size (int): The max number of waiting actions in the queues of the lane
+            max_overflow (int): The number of the actions held out of the queues of the lane
+                after which the lane is saturated
+        """
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.max_overflow = max_overflow
+        self.queues = [queue.Queue(maxsize=max(1, int(queue_size) // self.concurrency))
+                       for _ in range(self.concurrency)]
+        self.overflows = [collections.deque() for _ in range(self.concurrency)]
+        self.stopping = threading.Event()
+        self.__lock = threading.Lock()
+        self.threads = []
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self.run, args=(index,),
+                                      name="lane-{}-{}".format(name, index), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def depth(self):
+        """ Get the number of the waiting actions
+
+        Returns:
+            int: the queue depth of the lane, including the overflow
+        """
+        return sum(lane_queue.qsize() for lane_queue in self.queues) + self.overflowed()
+
+    def overflowed(self):
+        """ Get the number of the actions held out of the queues
+
+        Returns:
+            int: the overflow depth of the lane
+        """
+        with self.__lock:
+            return sum(len(overflow) for overflow in self.overflows)
+
+    def saturated(self):
+        """ Check if the lane holds `max_overflow` actions out of its queues
+
+        Returns:
+            bool: True if the consumption should pause
+        """
+        return self.overflowed() >= self.max_overflow
+
+    def submit(self, key, function, *args):
+        """ Enqueue an action without blocking. A full queue moves it to the overflow.
+
+        Args:
+            key (str): The routing key, e.g. the NS uuid
+            function (callable): The function to be executed
+            args: The arguments of the function
+        """
+        index = zlib.crc32(str(key).encode('utf-8')) % self.concurrency
+        item = (time.time(), function, args)
+        with self.__lock:
+            # The actions behind an overflow wait there too, so that their order is kept
+            overflow = self.overflows[index]
+            if not overflow:
+                try:
+                    self.queues[index].put_nowait(item)
+                    item = None
+                except queue.Full:
+                    logger.warning('The queue of the lane `{}` is full. The actions are held in '
+                                   'its overflow.'.format(self.name))
+            if item is not None:
+                overflow.append(item)
+        metrics.set_gauge('lane_queue_depth', self.depth(), lane=self.name)
+
+    def refill(self, index):
+        """ Move the actions of the overflow of a thread to its queue, in order
+
+        Args:
+            index (int): The index of the thread
+        """
+        with self.__lock:
+            overflow = self.overflows[index]
+            while overflow:
+                try:
+                    self.queues[index].put_nowait(overflow[0])
+                except queue.Full:
+                    return
+                overflow.popleft()
+
+    def run(self, index):
+        """ Execute the enqueued actions until the lane is stopped and drained
+
+        Args:
+            index (int): The index of the thread
+        """
+        lane_queue = self.queues[index]
+        while True:
+            self.refill(index)
+            try:
+                enqueued_at, function, args = lane_queue.get(timeout=STOP_CHECK_INTERVAL)
+            except queue.Empty:
+                if self.stopping.is_set() and not self.overflows[index]:
+                    break
+                continue
+            started_at = time.time()
+            metrics.set_gauge('lane_queue_depth', self.depth(), lane=self.name)
+            metrics.observe('lane_wait_seconds', started_at - enqueued_at, lane=self.name)
+            try:
+                function(*args)
+            except Exception as ex:
+                logger.exception(ex)
+            finally:
+                metrics.observe('lane_latency_seconds', time.time() - enqueued_at, lane=self.name)
+
+    def stop(self, timeout=None):
+        """ Stop the lane threads after the execution of the enqueued actions
+
+        Args:
+            timeout (float, optional): The max seconds to wait for the threads
+        """
+        self.stopping.set()
+        deadline = None if timeout is None else time.time() + timeout
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+        if any(thread.is_alive() for thread in self.threads):
+            logger.warning('The lane `{}` was stopped with {} actions waiting'.format(
+                self.name, self.depth()))
+
+
+class LaneRouter:
+    """Route each action to its lane given the planning type"""
+
+    def __init__(self, lanes_settings, default_lane):
+        """Constructor
+
+        Args:
+            lanes_settings (dict): The lanes definition. See `settings.EXECUTION_LANES`.
+            default_lane (str): The lane of the actions that are not mapped to any lane
+        """
+        self.lanes = {}
+        self.routes = {}
+        for name, lane_settings in lanes_settings.items():
+            self.lanes[name] = Lane(name, concurrency=lane_settings.get('concurrency', 1),
+                                    queue_size=lane_settings.get('queue_size', 100),
+                                    max_overflow=lane_settings.get('max_overflow', 1000))
+            for action in lane_settings.get('actions', []):
+                self.routes[action] = name
+        self.default_lane = default_lane
+
+    def get_lane(self, action):
+        """ Get the lane of a planning type
+
+        Args:
+            action (str): The planning type
+
+        Returns:
+            Lane: the lane
+        """
+        return self.lanes[self.routes.get(action, self.default_lane)]
+
+    def dispatch(self, action, key, function, *args):
+        """ Enqueue an action in its lane
+
+        Args:
+            action (str): The planning type
+            key (str): The routing key, e.g. the NS uuid
+            function (callable): The function to be executed
+            args: The arguments of the function
+        """
+        self.get_lane(action).submit(key, function, *args)
+
+    def depths(self):
+        """ Get the queue depth per lane
+
+        Returns:
+            dict: the queue depth per lane name
+        """
+        return {name: lane.depth() for name, lane in self.lanes.items()}
+
+    def saturated(self):
+        """ Check if any lane holds too many actions out of its queues
+
+        Returns:
+            bool: True if the consumption should pause
+        """
+        return any(lane.saturated() for lane in self.lanes.values())
+
+    def stop(self, timeout=None):
+        """ Stop all the lanes. They are drained concurrently.
+
+        Args:
+            timeout (float, optional): The max seconds to wait for the lanes
+        """
+        for lane in self.lanes.values():
+            lane.stopping.set()
+        deadline = None if timeout is None else time.time() + timeout
+        for lane in self.lanes.values():
+            lane.stop(None if deadline is None else max(0, deadline - time.time()))
@@ -0,0 +1,77 @@
+import time
+import threading
+from contextlib import contextmanager
+from runtime import metrics
+from runtime.exceptions import LockTimeout
+from settings import NS_LOCK_TIMEOUT
+
+
+class KeyedLocks:
+    """Re-entrant locks per key (e.g. per NS), created on demand and dropped when unused.
+
+    Examples:
+        >>> from runtime.locks import ns_locks
+        >>> with ns_locks.hold("07048175-660b-404f-bbc9-5be7581e74de"):
+        ...     pass
+    """
+
+    def __init__(self, name, timeout=-1):
+        """Constructor
+
+        Args:
+            name (str): The name of the locks, reported in the metrics
+            timeout (float): The default max seconds to wait for a lock. -1 waits forever.
+        """
+        self.name = name
+        self.timeout = timeout
+        self.locks = {}
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key, timeout=None):
+        """ Hold the lock of a key. A None key is not locked.
+
+        Args:
+            key (hashable): The key, e.g. the NS uuid
+            timeout (float, optional): The max seconds to wait. By default, the timeout of
+                the locks.
+
+        Raises:
+            LockTimeout: The lock was not acquired in time.
+        """
+        if key is None:
+            yield
+            return
+
+        with self.__lock:
+            entry = self.locks.setdefault(key, [threading.RLock(), 0])
+            entry[1] += 1
+
+        started_at = time.time()
+        acquired = entry[0].acquire(timeout=self.timeout if timeout is None else timeout)
+        metrics.observe('lock_wait_seconds', time.time() - started_at, lock=self.name)
+        try:
+            if not acquired:
+                raise LockTimeout('The {} lock of `{}` was not acquired in {:.1f} seconds'.format(
+                    self.name, key, time.time() - started_at))
+            yield
+        finally:
+            if acquired:
+                entry[0].release()
+            with self.__lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self.locks.pop(key, None)
+
+    def held(self):
+        """ Get the keys whose lock is held or awaited
+
+        Returns:
+            dict: the number of the holders and waiters per key
+        """
+        with self.__lock:
+            return {key: entry[1] for key, entry in self.locks.items()}
+
+
+# The per-NS locks of the running process, shared by the worker and the subscriber flows
+ns_locks = KeyedLocks("ns", timeout=NS_LOCK_TIMEOUT)
@@ -0,0 +1,36 @@
+import logging.config
+import threading
+from settings import LOGGING
+
+CONFIGURED = {"done": False}
+CONFIGURE_LOCK = threading.Lock()
+
+
+def configure_logging(settings=LOGGING):
+    """ Apply the logging settings once per process
+
+    Each module calls it before getting its logger. Only the first call applies the settings;
+    the next ones return immediately, so the handlers are not rebuilt (and the log file is not
+    truncated) for every imported module.
+
+    Args:
+        settings (dict): The dictConfig settings. Default is the LOGGING setting.
+
+    Returns:
+        bool: True if the settings were applied by this call
+
+    Examples:
+        >>> import logging
+        >>> from runtime.logs import configure_logging
+        >>> configure_logging()
+        False
+        >>> logger = logging.getLogger("worker")
+    """
+    if CONFIGURED["done"]:
+        return False
+    with CONFIGURE_LOCK:
+        if CONFIGURED["done"]:
+            return False
+        logging.config.dictConfig(settings)
+        CONFIGURED["done"] = True
+        return True
@@ -0,0 +1,98 @@
+import threading
+
+
+class Registry:
+    """In-process registry of the executor metrics (counters, gauges and timers).
+
+    Each metric is identified by its name and an optional set of labels, e.g.
+    `actions_expired{planning=vnf_scale_out}`. The registry is thread-safe.
+    """
+
+    def __init__(self):
+        """Constructor"""
+        self.__lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+
+    @staticmethod
+    def key(name, labels):
+        """ Compose the identifier of a metric
+
+        Args:
+            name (str): The metric name
+            labels (dict): The metric labels
+
+        Returns:
+            tuple: the metric identifier
+        """
+        return name, tuple(sorted(labels.items()))
+
+    def increment(self, name, value=1, **labels):
+        """ Increase a counter
+
+        Args:
+            name (str): The counter name
+            value (int): The increment. Default is 1.
+            labels (dict, optional): The counter labels
+        """
+        key = self.key(name, labels)
+        with self.__lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """ Set the current value of a gauge
+
+        Args:
+            name (str): The gauge name
+            value (float): The current value
+            labels (dict, optional): The gauge labels
+        """
+        key = self.key(name, labels)
+        with self.__lock:
+            self.gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        """ Record a duration in a timer
+
+        Args:
+            name (str): The timer name
+            seconds (float): The measured duration in seconds
+            labels (dict, optional): The timer labels
+        """
+        key = self.key(name, labels)
+        with self.__lock:
+            timer = self.timers.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            timer["count"] += 1
+            timer["sum"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+
+    def snapshot(self):
+        """ Get a copy of all the metrics
+
+        Returns:
+            dict: the counters, gauges and timers. Sample:
+                {
+                    "counters": [{"name": "actions_expired", "labels": {"planning": "vnf_scale_in"},
+                                  "value": 2}],
+                    "gauges": [],
+                    "timers": []
+                }
+        """
+        with self.__lock:
+            return {
+                "counters": [{"name": k[0], "labels": dict(k[1]), "value": v}
+                             for k, v in self.counters.items()],
+                "gauges": [{"name": k[0], "labels": dict(k[1]), "value": v}
+                           for k, v in self.gauges.items()],
+                "timers": [dict({"name": k[0], "labels": dict(k[1])}, **v)
+                           for k, v in self.timers.items()],
+            }
+
+
+# The registry of the running process
+registry = Registry()
+increment = registry.increment
+set_gauge = registry.set_gauge
+observe = registry.observe
+snapshot = registry.snapshot
@@ -0,0 +1,111 @@
+import time
+import threading
+import logging
+from kafka.structs import TopicPartition, OffsetAndMetadata
+from runtime import metrics
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+def get_offset_and_metadata(offset):
+    """ Compose the committed position of a partition
+
+    Args:
+        offset (int): The offset of the next record to be consumed
+
+    Returns:
+        OffsetAndMetadata: the position (the leader epoch is unknown, if the client has it)
+    """
+    values = {"offset": offset, "metadata": "", "leader_epoch": -1}
+    return OffsetAndMetadata(*[values[field] for field in OffsetAndMetadata._fields])
+
+
+class OffsetTracker:
+    """The offsets of the consumed records whose actions are not executed yet.
+
+    The consumer commits per partition the offset of its oldest record in flight (or the next
+    offset if none), so a record is committed only after the execution of its action, even
+    if the lanes complete the actions out of order. After a crash, the records in flight
+    are consumed again (at-least-once).
+    """
+
+    def __init__(self, commit_interval=5):
+        """Constructor
+
+        Args:
+            commit_interval (float): The min seconds between two commits
+        """
+        self.commit_interval = commit_interval
+        self.in_flight = {}
+        self.positions = {}
+        self.committed = {}
+        self.committed_at = 0
+        self.__lock = threading.Lock()
+
+    def consumed(self, record):
+        """ Record a consumed record as in flight
+
+        Args:
+            record (obj): The Kafka record
+        """
+        partition = TopicPartition(record.topic, record.partition)
+        with self.__lock:
+            self.in_flight.setdefault(partition, set()).add(record.offset)
+            self.positions[partition] = max(self.positions.get(partition, 0), record.offset + 1)
+
+    def done(self, record):
+        """ Record the end of the execution of a record
+
+        Args:
+            record (obj): The Kafka record
+        """
+        partition = TopicPartition(record.topic, record.partition)
+        with self.__lock:
+            self.in_flight.get(partition, set()).discard(record.offset)
+
+    def pending(self):
+        """ Get the number of the records in flight
+
+        Returns:
+            int: the records whose actions are not executed yet
+        """
+        with self.__lock:
+            return sum(len(offsets) for offsets in self.in_flight.values())
+
+    def committable(self):
+        """ Get the positions that moved since the last commit
+
+        Returns:
+            dict: the offset of the next record to be consumed per partition
+        """
+        with self.__lock:
+            positions = {partition: min(self.in_flight[partition]) if self.in_flight.get(partition)
+                         else position for partition, position in self.positions.items()}
+        return {partition: position for partition, position in positions.items()
+                if self.committed.get(partition) != position}
+
+    def commit(self, consumer, force=False):
+        """ Commit the executed records. It runs in the thread of the consumer.
+
+        Args:
+            consumer (obj): The Kafka consumer
+            force (bool): Ignore the commit interval, e.g. on shutdown
+        """
+        if not force and time.time() - self.committed_at < self.commit_interval:
+            return
+        self.committed_at = time.time()
+        # The partitions that were reassigned are committed by their new consumer
+        assignment = consumer.assignment()
+        positions = {partition: position for partition, position in self.committable().items()
+                     if partition in assignment}
+        if not positions:
+            return
+        try:
+            consumer.commit({partition: get_offset_and_metadata(position)
+                             for partition, position in positions.items()})
+            self.committed.update(positions)
+        except Exception as ex:
+            logger.warning('Failed to commit the offsets of the executed actions: {}'.format(ex))
+            metrics.increment('offsets_commit_failed')
@@ -0,0 +1,258 @@
+import time
+import threading
+import logging
+from utils import init_listener, decode_yaml
+from settings import OSM_KAFKA_SERVER, OSM_KAFKA_NS_TOPIC
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The final states of an OSM LCM operation
+FINAL_STATES = ("COMPLETED", "PARTIALLY_COMPLETED", "FAILED", "FAILED_TEMP")
+# The listener thread of the running process
+LISTENER = {"thread": None}
+LISTENER_LOCK = threading.Lock()
+
+
+class InFlightOperations:
+    """In-memory index of the in-flight OSM LCM operations per NS.
+
+    The index is updated from the events of the OSM Kafka `ns` topic. A NS is tracked once
+    its in-flight operations have been loaded from the NBI; the lookups of the tracked NSs
+    need no HTTP call. If the events listener stops, the index is dropped and all the NSs
+    become untracked.
+
+    The callers may also watch an operation to be notified when it reaches a final state,
+    instead of polling its record.
+    """
+
+    def __init__(self):
+        """Constructor"""
+        self.__lock = threading.Lock()
+        self.operations = {}
+        self.tracked = set()
+        self.watchers = {}
+        self.listening = False
+
+    def is_tracked(self, ns_uuid):
+        """ Check if the in-flight operations of a NS are known
+
+        Args:
+            ns_uuid (str): The NS uuid
+
+        Returns:
+            bool: True if the index can answer for the NS
+        """
+        return self.listening and ns_uuid in self.tracked
+
+    def track(self, ns_uuid, operations):
+        """ Load the in-flight operations of a NS (e.g. fetched from the NBI)
+
+        The fetched records replace the known operations of the NS, so that an operation
+        whose completion event was missed does not stay in the index. Only the processing
+        scale operations of the NS are kept, since some NBI versions ignore the filters.
+
+        Args:
+            ns_uuid (str): The NS uuid
+            operations (list): The ns_lcm_op_occs records in PROCESSING state
+        """
+        with self.__lock:
+            self.operations[ns_uuid] = {
+                operation.get('_id', operation.get('id')): compose_entry(operation)
+                for operation in operations if is_pending_scale(ns_uuid, operation)}
+            if self.listening:
+                self.tracked.add(ns_uuid)
+
+    def register(self, ns_uuid, operation_uuid, lcm_operation_type, scale_type=None):
+        """ Add an operation that was just submitted by the executor
+
+        Args:
+            ns_uuid (str): The NS uuid
+            operation_uuid (str): The nslcmop identifier
+            lcm_operation_type (str): The operation type, e.g. scale
+            scale_type (str, optional): SCALE_IN or SCALE_OUT
+        """
+        with self.__lock:
+            self.operations.setdefault(ns_uuid, {})[operation_uuid] = {
+                "type": lcm_operation_type, "scale_type": scale_type, "since": time.time()}
+
+    def watch(self, operation_uuid, callback):
+        """ Call a function once an operation reaches a final state
+
+        The callback runs in the listener thread; it must not block.
+
+        Args:
+            operation_uuid (str): The nslcmop identifier
+            callback (callable): Accepts the operation state (e.g. COMPLETED) and the event
+        """
+        with self.__lock:
+            self.watchers[operation_uuid] = callback
+
+    def unwatch(self, operation_uuid):
+        """ Stop watching an operation, e.g. after a timeout
+
+        Args:
+            operation_uuid (str): The nslcmop identifier
+
+        Returns:
+            callable: the callback or None if the operation was not watched (any more)
+        """
+        with self.__lock:
+            return self.watchers.pop(operation_uuid, None)
+
+    def get_pending(self, ns_uuid, lcm_operation_type=None, scale_type=None):
+        """ Get the in-flight operations of a NS
+
+        Args:
+            ns_uuid (str): The NS uuid
+            lcm_operation_type (str, optional): Filter by operation type, e.g. scale
+            scale_type (str, optional): Filter by scale type, e.g. SCALE_OUT
+
+        Returns:
+            list: the in-flight operations identifiers
+        """
+        with self.__lock:
+            return [operation_uuid for operation_uuid, entry in
+                    self.operations.get(ns_uuid, {}).items()
+                    if lcm_operation_type in (None, entry['type']) and
+                    scale_type in (None, entry['scale_type'])]
+
+    def update(self, key, message):
+        """ Apply an event of the OSM Kafka `ns` topic
+
+        Args:
+            key (str): The event key, e.g. scale, scaled, terminated
+            message (dict): The event
+        """
+        if not isinstance(message, dict):
+            return
+        callback = None
+        with self.__lock:
+            # Submitted operation (the nslcmop record)
+            if message.get('lcmOperationType') is not None and message.get('_id') is not None:
+                ns_uuid = message.get('nsInstanceId')
+                operation_uuid = message['_id']
+                if message.get('operationState') in FINAL_STATES:
+                    self.operations.get(ns_uuid, {}).pop(operation_uuid, None)
+                    callback = self.watchers.pop(operation_uuid, None)
+                else:
+                    self.operations.setdefault(ns_uuid, {})[operation_uuid] = \
+                        compose_entry(message)
+            else:
+                # Completed operation, e.g. `scaled`, `instantiated`, `terminated`
+                ns_uuid = message.get('nsr_id', None)
+                operation_uuid = message.get('nslcmop_id', None)
+                if message.get('operationState') in FINAL_STATES:
+                    self.operations.get(ns_uuid, {}).pop(operation_uuid, None)
+                    callback = self.watchers.pop(operation_uuid, None)
+                if key == "terminated":
+                    self.operations.pop(ns_uuid, None)
+                    self.tracked.discard(ns_uuid)
+
+        if callback is not None:
+            try:
+                callback(message['operationState'], message)
+            except Exception as ex:
+                logger.exception('The watcher of the operation {} failed: {}'.format(
+                    operation_uuid, ex))
+
+    def snapshot(self):
+        """ Get a copy of the index
+
+        Returns:
+            dict: the in-flight operations per NS, the tracked NSs and the listener state
+        """
+        with self.__lock:
+            return {"listening": self.listening, "tracked": sorted(self.tracked),
+                    "watched": sorted(self.watchers),
+                    "operations": {ns_uuid: dict(entries)
+                                   for ns_uuid, entries in self.operations.items() if entries}}
+
+    def set_listening(self, listening):
+        """ Mark whether the events listener is running
+
+        Args:
+            listening (bool): The listener state
+        """
+        with self.__lock:
+            self.listening = listening
+            if not listening:
+                # The events received while reconnecting are lost
+                self.tracked.clear()
+                self.operations.clear()
+
+
+def is_pending_scale(ns_uuid, operation):
+    """ Check if a nslcmop record is a processing scale operation of a NS
+
+    Args:
+        ns_uuid (str): The NS uuid
+        operation (dict): The nslcmop record
+
+    Returns:
+        bool: True if the operation blocks the scale actions of the NS
+    """
+    return operation.get('nsInstanceId') == ns_uuid and \
+        operation.get('lcmOperationType') == "scale" and \
+        operation.get('operationState') == "PROCESSING"
+
+
+def compose_entry(operation):
+    """ Compose the index entry of a nslcmop record
+
+    Args:
+        operation (dict): The nslcmop record
+
+    Returns:
+        dict: the operation type, the scale type (if any) and the indexing time
+    """
+    return {
+        "type": operation.get('lcmOperationType'),
+        "scale_type": operation.get('operationParams', {}).get('scaleVnfData', {}).get(
+            'scaleVnfType', None),
+        "since": time.time()
+    }
+
+
+def listen(operations_index, retry_delay=10):
+    """ Update the index from the OSM Kafka `ns` topic (runs in a daemon thread)
+
+    Each process receives all the events (no consumer group).
+
+    Args:
+        operations_index (InFlightOperations): The index to be updated
+        retry_delay (int): The seconds to wait before reconnecting after a failure
+    """
+    while True:
+        try:
+            kafka_consumer = init_listener(OSM_KAFKA_SERVER, OSM_KAFKA_NS_TOPIC)
+            operations_index.set_listening(True)
+            for msg in kafka_consumer:
+                key = msg.key.decode('utf-8', 'ignore')
+                operations_index.update(key, decode_yaml(msg.value))
+        except Exception as ex:
+            logger.error('The listener of the OSM operations failed: {}'.format(ex))
+        operations_index.set_listening(False)
+        time.sleep(retry_delay)
+
+
+def start_listener(operations_index):
+    """ Start the listener of the OSM operations in a daemon thread, once per process
+
+    Args:
+        operations_index (InFlightOperations): The index to be updated
+
+    Returns:
+        threading.Thread: the listener thread
+    """
+    with LISTENER_LOCK:
+        if LISTENER["thread"] is None:
+            LISTENER["thread"] = threading.Thread(target=listen, args=(operations_index,),
+                                                  name="osm-operations-listener", daemon=True)
+            LISTENER["thread"].start()
+        return LISTENER["thread"]
+
+
+# The in-flight operations of the running process
+index = InFlightOperations()
@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+import signal
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import logging
+from collections import Counter
+from runtime import metrics
+from settings import PROFILING
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The profiling windows in progress by kind
+ACTIVE = {}
+ACTIVE_LOCK = threading.Lock()
+# The cProfile profiles of the calls of the current window (None when disabled)
+PROFILES = {"calls": None}
+
+
+def get_output_path(kind, extension):
+    """ Get the path of a profiling result in the output directory
+
+    Args:
+        kind (str): The profiling kind, e.g. "sampling"
+        extension (str): The file extension, e.g. "collapsed"
+
+    Returns:
+        str: the path, e.g. logs/sampling-1234-20200312T151607.collapsed
+    """
+    directory = PROFILING['directory']
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, '{}-{}-{}.{}'.format(
+        kind, os.getpid(), time.strftime('%Y%m%dT%H%M%S'), extension))
+
+
+def start_window(kind, target, duration):
+    """ Run a profiling window in a background thread, unless one of the same kind runs
+
+    Args:
+        kind (str): The profiling kind
+        target (callable): Accepts the duration and returns the path of the result
+        duration (float): The window in seconds
+
+    Returns:
+        bool: True if the window started. False if one of the same kind is running.
+    """
+    with ACTIVE_LOCK:
+        if ACTIVE.get(kind, False):
+            return False
+        ACTIVE[kind] = True
+
+    def run():
+        try:
+            path = target(duration)
+            logger.info('Profiling: the {} window of {} seconds was written in {}'.format(
+                kind, duration, path))
+        except Exception as ex:
+            logger.exception('Profiling: the {} window failed: {}'.format(kind, ex))
+        finally:
+            with ACTIVE_LOCK:
+                ACTIVE[kind] = False
+
+    threading.Thread(target=run, name="profiling-{}".format(kind), daemon=True).start()
+    return True
+
+
+def sample_stacks(duration, interval=None):
+    """ Sample the stacks of all the threads and write them in collapsed format
+
+    Each line is `thread;module:function;...;module:function <samples>`, the input of the
+    flame graph tools (e.g. flamegraph.pl, speedscope).
+
+    Args:
+        duration (float): The window in seconds
+        interval (float, optional): The seconds between two samples
+
+    Returns:
+        str: the path of the result
+    """
+    interval = PROFILING['interval'] if interval is None else interval
+    own_thread = threading.get_ident()
+    names = {}
+    stacks = Counter()
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        for thread in threading.enumerate():
+            names[thread.ident] = thread.name
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            functions = []
+            while frame is not None:
+                code = frame.f_code
+                functions.append('{}:{}'.format(
+                    os.path.splitext(os.path.basename(code.co_filename))[0], code.co_name))
+                frame = frame.f_back
+            functions.append(names.get(thread_id, thread_id))
+            stacks[';'.join('{}'.format(name) for name in reversed(functions))] += 1
+        time.sleep(interval)
+
+    path = get_output_path("sampling", "collapsed")
+    with open(path, 'w') as output:
+        for stack, samples in stacks.most_common():
+            output.write('{} {}\n'.format(stack, samples))
+    return path
+
+
+def profile_calls(duration):
+    """ Profile the handler calls (see `run`) with cProfile and write them in pstats format
+
+    The result can be read with `python3 -m pstats <path>` or snakeviz.
+
+    Args:
+        duration (float): The window in seconds
+
+    Returns:
+        str: the path of the result or None if no handler was called
+    """
+    PROFILES["calls"] = []
+    time.sleep(duration)
+    profiles, PROFILES["calls"] = PROFILES["calls"], None
+    if not profiles:
+        return None
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    path = get_output_path("cprofile", "pstats")
+    stats.dump_stats(path)
+    return path
+
+
+def trace_memory(duration):
+    """ Trace the memory allocations and write the snapshot at the end of the window
+
+    The binary snapshot can be loaded with `tracemalloc.Snapshot.load`. A text file with the
+    top allocations per line is written next to it.
+
+    Args:
+        duration (float): The window in seconds
+
+    Returns:
+        str: the path of the snapshot
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(PROFILING['traceback_limit'])
+    try:
+        time.sleep(duration)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    path = get_output_path("tracemalloc", "snapshot")
+    snapshot.dump(path)
+    with open('{}.txt'.format(path), 'w') as output:
+        for statistic in snapshot.statistics('lineno')[:50]:
+            output.write('{}\n'.format(statistic))
+    return path
+
+
+def write_timings(duration=0):
+    """ Write the cumulative time per handler (the `handler_seconds` timers) as a table
+
+    Args:
+        duration (float): Unused, the table covers the whole life of the process
+
+    Returns:
+        str: the path of the result
+    """
+    timers = [timer for timer in metrics.snapshot()['timers']
+              if timer['name'] == 'handler_seconds']
+    timers.sort(key=lambda timer: timer['sum'], reverse=True)
+    path = get_output_path("handlers", "txt")
+    with open(path, 'w') as output:
+        output.write('{:<36} {:>8} {:>12} {:>10} {:>10}\n'.format(
+            'handler', 'calls', 'total (s)', 'mean (s)', 'max (s)'))
+        for timer in timers:
+            output.write('{:<36} {:>8} {:>12.3f} {:>10.3f} {:>10.3f}\n'.format(
+                timer['labels'].get('handler', ''), timer['count'], timer['sum'],
+                timer['sum'] / timer['count'] if timer['count'] else 0, timer['max']))
+    return path
+
+
+# The profiling kinds and their windows
+KINDS = {
+    "sampling": sample_stacks,
+    "cprofile": profile_calls,
+    "tracemalloc": trace_memory,
+    "timings": write_timings,
+}
+
+
+def trigger(kind, duration=None):
+    """ Start a profiling window
+
+    Args:
+        kind (str): One of the KINDS, e.g. "sampling"
+        duration (float, optional): The window in seconds. Default is the PROFILING window.
+
+    Returns:
+        bool: True if the window started. False if one of the same kind is running.
+    """
+    return start_window(kind, KINDS[kind], PROFILING['window'] if duration is None
+                        else float(duration))
+
+
+def run(handler, *args):
+    """ Call a handler, timed per handler and profiled during a cProfile window
+
+    Args:
+        handler (callable): The handler
+        args: The arguments of the handler
+
+    Returns:
+        any: the result of the handler
+    """
+    started_at = time.time()
+    try:
+        profiles = PROFILES["calls"]
+        if profiles is None:
+            return handler(*args)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(handler, *args)
+        finally:
+            profiles.append(profile)
+    finally:
+        metrics.observe('handler_seconds', time.time() - started_at, handler=handler.__name__)
+
+
+def install_signal_handlers():
+    """ Trigger the profiling with signals (main thread only)
+
+    - SIGUSR1: stacks sampling and cProfile of the handlers, plus the handlers timing table
+    - SIGUSR2: tracemalloc snapshot
+    """
+    def on_usr1(signum, frame):
+        for kind in ("sampling", "cprofile", "timings"):
+            trigger(kind)
+
+    signal.signal(signal.SIGUSR1, on_usr1)
+    signal.signal(signal.SIGUSR2, lambda signum, frame: trigger("tracemalloc"))
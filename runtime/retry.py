@@ -0,0 +1,219 @@
+import os
+import time
+import heapq
+import random
+import socket
+import itertools
+import threading
+import logging
+from runtime import metrics
+from utils import publish_message
+from settings import KAFKA_DEAD_LETTER_TOPIC, RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, \
+    RETRY_MAX_DELAY
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+def backoff_delay(attempt, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """ Get the delay before the next attempt using exponential backoff with jitter
+
+    Half of the delay is fixed and the other half is random (equal jitter).
+
+    Args:
+        attempt (int): The number of the failed attempts (1 for the first failure)
+        base_delay (float): The delay after the first failure in seconds
+        max_delay (float): The max delay in seconds
+
+    Returns:
+        float: the delay in seconds
+    """
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def backoff_delays(attempts, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """ Generate the delays of a retry loop
+
+    Args:
+        attempts (int): The number of the attempts
+        base_delay (float): The delay after the first failure in seconds
+        max_delay (float): The max delay in seconds
+
+    Yields:
+        float: the delay after each failed attempt. It is zero after the last attempt.
+
+    Examples:
+        >>> import time
+        >>> from runtime.retry import backoff_delays
+        >>> for delay in backoff_delays(3, base_delay=1):
+        ...     if do_something():
+        ...         break
+        ...     time.sleep(delay)
+    """
+    for attempt in range(1, attempts + 1):
+        yield backoff_delay(attempt, base_delay, max_delay) if attempt < attempts else 0
+
+
+def compose_failure(error, attempt):
+    """ Compose the context of a failed attempt
+
+    Args:
+        error (Exception): The failure
+        attempt (int): The number of the attempt
+
+    Returns:
+        dict: the failure context
+    """
+    return {"attempt": attempt, "type": type(error).__name__, "error": str(error),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+
+
+def publish_dead_letter(message, action, failures):
+    """ Publish an action that failed in all its attempts in the dead-letter topic
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        failures (list): The context of each failed attempt
+
+    Returns:
+        bool: If the message published in kafka or not
+    """
+    dead_letter = {
+        "planning": action,
+        "message": message.raw,
+        "failures": failures,
+        "host": socket.gethostname(),
+        "pid": os.getpid()
+    }
+    completed = publish_message(KAFKA_DEAD_LETTER_TOPIC, dead_letter, key=action)
+    if not completed:
+        logger.error('Failed to publish the dead letter {}'.format(dead_letter))
+    return completed
+
+
+class RetryScheduler:
+    """Reschedule the failed actions on a delay queue, without blocking the consumer.
+
+    A thread waits until the next due action and passes it to the `dispatch` function
+    (e.g. enqueue it in its lane). The actions that fail `max_attempts` times are passed to
+    the `dead_letter` function, as the actions still waiting when the scheduler stops. The
+    `done` callback of an action (e.g. the commit of its Kafka record) is called only once
+    the action is dead-lettered, so a pending retry is not lost in a crash.
+    """
+
+    def __init__(self, dispatch, dead_letter=publish_dead_letter,
+                 max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY):
+        """Constructor
+
+        Args:
+            dispatch (callable): Accepts the message, the planning type, the failures and the
+                `done` callback
+            dead_letter (callable): Accepts the message, the planning type and the failures
+            max_attempts (int): The max number of attempts per action
+            base_delay (float): The delay after the first failure in seconds
+            max_delay (float): The max delay in seconds
+        """
+        self.dispatch = dispatch
+        self.dead_letter = dead_letter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stopped = False
+        self.__queue = []
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(target=self.run, name="retry-scheduler", daemon=True)
+        self.__thread.start()
+
+    def pending(self):
+        """ Get the number of the actions waiting for their next attempt
+
+        Returns:
+            int: the number of the actions
+        """
+        with self.__condition:
+            return len(self.__queue)
+
+    def schedule(self, message, action, failures, error, done=None):
+        """ Reschedule a failed action or send it to the dead-letter topic
+
+        Args:
+            message (ExecutionMessage): The message from ns.instances.exec
+            action (str): The planning type
+            failures (list): The context of the previous failed attempts
+            error (Exception): The failure of the last attempt
+            done (callable, optional): Called once the action is dead-lettered
+        """
+        failures = list(failures) + [compose_failure(error, len(failures) + 1)]
+        if self.stopped:
+            # e.g. an action that failed while the lanes were drained on shutdown
+            logger.error('The action {} failed while the executor was stopping. It is sent to '
+                         'the dead-letter topic.'.format(action))
+            self.give_up(message, action, failures, done)
+            return
+        if len(failures) >= self.max_attempts:
+            logger.error('The action {} failed {} times. It is sent to the dead-letter '
+                         'topic.'.format(action, len(failures)))
+            self.give_up(message, action, failures, done)
+            return
+
+        delay = backoff_delay(len(failures), self.base_delay, self.max_delay)
+        logger.warning('The action {} failed (attempt #{}): {}. Retry in {:.1f} '
+                       'seconds.'.format(action, len(failures), error, delay))
+        metrics.increment('actions_retried', planning=action)
+        with self.__condition:
+            heapq.heappush(self.__queue, (time.time() + delay, next(self.__sequence), message,
+                                          action, failures, done))
+            self.__condition.notify()
+        metrics.set_gauge('retry_queue_depth', self.pending())
+
+    def give_up(self, message, action, failures, done=None):
+        """ Send an action to the dead-letter topic and call its `done` callback
+
+        Args:
+            message (ExecutionMessage): The message from ns.instances.exec
+            action (str): The planning type
+            failures (list): The context of the failed attempts
+            done (callable, optional): Called after the dead letter
+        """
+        metrics.increment('actions_dead_lettered', planning=action)
+        try:
+            self.dead_letter(message, action, failures)
+        finally:
+            if done is not None:
+                done()
+
+    def run(self):
+        """ Dispatch each action when its delay has passed """
+        while True:
+            with self.__condition:
+                while not self.stopped and (
+                        not self.__queue or self.__queue[0][0] > time.time()):
+                    timeout = self.__queue[0][0] - time.time() if self.__queue else None
+                    self.__condition.wait(timeout)
+                if self.stopped:
+                    return
+                _, _, message, action, failures, done = heapq.heappop(self.__queue)
+            metrics.set_gauge('retry_queue_depth', self.pending())
+            try:
+                self.dispatch(message, action, failures, done)
+            except Exception as ex:
+                logger.exception(ex)
+                self.give_up(message, action, list(failures) + [compose_failure(
+                    ex, len(failures) + 1)], done)
+
+    def stop(self):
+        """ Stop the scheduler. The waiting actions are sent to the dead-letter topic. """
+        with self.__condition:
+            self.stopped = True
+            waiting, self.__queue = self.__queue, []
+            self.__condition.notify()
+        self.__thread.join()
+        for _, _, message, action, failures, done in waiting:
+            shutdown = compose_failure(Exception('The executor stopped before the retry'),
+                                       len(failures) + 1)
+            self.give_up(message, action, list(failures) + [shutdown], done)
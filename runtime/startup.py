@@ -0,0 +1,153 @@
+import time
+import threading
+import importlib
+import logging
+from collections import OrderedDict
+from runtime import metrics
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+# The first import of this module, i.e. the start of the imports of the process
+PROCESS_STARTED_AT = time.time()
+# The startup timers of the running process by flow (the executor runs two flows)
+TIMERS = {}
+_timers_lock = threading.Lock()
+
+
+class StartupTimer:
+    """The startup phases of a process, up to its first consumed message.
+
+    Each phase lasts from the previous mark (or the start) to its own mark. The breakdown is
+    logged when the process is ready to consume and when it consumes its first message; it
+    is also exposed as gauges and in `GET /startup` of the admin API.
+
+    Examples:
+        >>> from runtime.startup import StartupTimer
+        >>> timer = StartupTimer("worker")
+        >>> timer.mark("imports")
+        >>> timer.mark("consumer")
+        >>> timer.first_message()
+        True
+        >>> timer.first_message()
+        False
+    """
+
+    def __init__(self, name, started_at=None):
+        """Constructor
+
+        Args:
+            name (str): The flow name, e.g. "worker"
+            started_at (float, optional): The start time (epoch). Default is now.
+        """
+        self.name = name
+        self.__lock = threading.Lock()
+        self.reset(started_at)
+
+    def reset(self, started_at=None):
+        """ Restart the timer, e.g. in a forked worker process that inherits the imports
+
+        Args:
+            started_at (float, optional): The start time (epoch). Default is now.
+        """
+        with self.__lock:
+            self.started_at = time.time() if started_at is None else started_at
+            self.marked_at = self.started_at
+            self.phases = OrderedDict()
+            self.first_message_at = None
+
+    def mark(self, phase):
+        """ End a startup phase
+
+        Args:
+            phase (str): The phase name, e.g. "imports"
+        """
+        now = time.time()
+        with self.__lock:
+            self.phases[phase] = self.phases.get(phase, 0) + now - self.marked_at
+            self.marked_at = now
+        metrics.set_gauge('startup_seconds', self.phases[phase], flow=self.name, phase=phase)
+
+    def ready(self):
+        """ Log the startup breakdown once the flow is ready to consume """
+        logger.info('The {} is ready to consume after {:.3f} seconds ({})'.format(
+            self.name, self.marked_at - self.started_at, self.format_phases()))
+
+    def first_message(self):
+        """ Record the time to the first consumed message, once
+
+        Returns:
+            bool: True on the first consumed message
+        """
+        if self.first_message_at is not None:
+            return False
+        with self.__lock:
+            if self.first_message_at is not None:
+                return False
+            self.first_message_at = time.time()
+        elapsed = self.first_message_at - self.started_at
+        metrics.set_gauge('time_to_first_message_seconds', elapsed, flow=self.name)
+        logger.info('The {} consumed its first message {:.3f} seconds after the start '
+                    '({})'.format(self.name, elapsed, self.format_phases()))
+        return True
+
+    def format_phases(self):
+        """ Format the phases for the logs
+
+        Returns:
+            str: the phases, e.g. "imports: 0.182s, consumer: 0.004s"
+        """
+        return ', '.join('{}: {:.3f}s'.format(phase, seconds)
+                         for phase, seconds in list(self.phases.items()))
+
+    def snapshot(self):
+        """ Get the startup breakdown
+
+        Returns:
+            dict: the phases in seconds and the time to the first message (None before it)
+        """
+        with self.__lock:
+            return {
+                "started_at": self.started_at,
+                "phases": OrderedDict(self.phases),
+                "time_to_first_message": None if self.first_message_at is None
+                else self.first_message_at - self.started_at,
+            }
+
+
+def preload(modules):
+    """ Import the modules that the handlers import on first use
+
+    Args:
+        modules (iterable): The module names, e.g. ["aionbiapi.vnf"]
+
+    Returns:
+        float: the seconds spent
+    """
+    started_at = time.time()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as ex:
+            logger.warning('Failed to preload the module {}: {}'.format(module, ex))
+    return time.time() - started_at
+
+
+def get_startup_timer(name):
+    """ Get (or create) the startup timer of a flow, started with the imports of the process
+
+    Args:
+        name (str): The flow name, e.g. "worker"
+
+    Returns:
+        StartupTimer: the timer of the flow
+    """
+    timer = TIMERS.get(name, None)
+    if timer is None:
+        with _timers_lock:
+            timer = TIMERS.get(name, None)
+            if timer is None:
+                timer = StartupTimer(name, started_at=PROCESS_STARTED_AT)
+                TIMERS[name] = timer
+    return timer
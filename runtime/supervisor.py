@@ -0,0 +1,136 @@
+import os
+import time
+import signal
+import multiprocessing
+import logging
+from runtime.logs import configure_logging
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+def get_partitions_shard(partitions, index, count):
+    """ Pick the partitions of a worker process
+
+    Args:
+        partitions (iterable): The partitions of the topic
+        index (int): The index of the worker process
+        count (int): The number of worker processes
+
+    Returns:
+        list: the partitions of the worker process
+
+    Examples:
+        >>> from runtime.supervisor import get_partitions_shard
+        >>> get_partitions_shard({0, 1, 2, 3, 4}, 1, 2)
+        [1, 3]
+    """
+    return [partition for partition in sorted(partitions) if partition % count == index]
+
+
+def run_child(target, index, count):
+    """ Run the main function of a child with the default signal handlers
+
+    Args:
+        target (callable): The main function of the child
+        index (int): The index of the child
+        count (int): The number of the children
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    target(index, count)
+
+
+class Supervisor:
+    """Fork N worker processes and restart them if they crash.
+
+    Each child is started as `target(index, count)`. SIGTERM and SIGINT stop the children
+    gracefully (they receive SIGTERM and they are joined).
+    """
+
+    def __init__(self, target, processes, restart_delay=1, max_restart_delay=60,
+                 stop_timeout=30):
+        """Constructor
+
+        Args:
+            target (callable): The main function of a child. It accepts the index of the child
+                and the number of the children.
+            processes (int): The number of the children
+            restart_delay (int): The initial delay (seconds) before restarting a crashed child
+            max_restart_delay (int): The max delay (seconds) for children in crash loop
+            stop_timeout (int): The max seconds to wait a child to stop
+        """
+        self.target = target
+        self.processes = processes
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stop_timeout = stop_timeout
+        self.children = {}
+        self.delays = {}
+        self.restarts = {}
+        self.stopping = False
+
+    def spawn(self, index):
+        """ Start the child with the given index
+
+        Args:
+            index (int): The index of the child
+        """
+        process = multiprocessing.Process(target=run_child,
+                                          args=(self.target, index, self.processes),
+                                          name="worker-{}".format(index))
+        process.start()
+        self.children[index] = (process, time.time())
+        logger.info('Worker process #{} started with pid {}'.format(index, process.pid))
+
+    def check(self, now):
+        """ Schedule the restart of the crashed children and restart the due ones
+
+        A crashed child is restarted after its delay, without blocking the restarts of the
+        other children.
+
+        Args:
+            now (float): The current timestamp
+        """
+        for index, (process, started_at) in list(self.children.items()):
+            if self.stopping:
+                return
+            if index in self.restarts:
+                if now >= self.restarts[index]:
+                    del self.restarts[index]
+                    self.spawn(index)
+                continue
+            if process.is_alive():
+                continue
+            # Back off the restarts of the children that crash right after their start
+            delay = self.delays.get(index, self.restart_delay)
+            if now - started_at > self.max_restart_delay:
+                delay = self.restart_delay
+            logger.error('Worker process #{} (pid {}) exited with code {}. Restart in {} '
+                         'seconds.'.format(index, process.pid, process.exitcode, delay))
+            self.delays[index] = min(delay * 2, self.max_restart_delay)
+            self.restarts[index] = now + delay
+
+    def stop(self, signum=None, frame=None):
+        """ Stop the children (signal handler)"""
+        self.stopping = True
+
+    def run(self):
+        """ Start the children and keep them alive until a stop signal """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.processes):
+            self.spawn(index)
+
+        while not self.stopping:
+            time.sleep(1)
+            self.check(time.time())
+
+        logger.info('Stopping {} worker processes'.format(len(self.children)))
+        for process, _ in self.children.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+        for process, _ in self.children.values():
+            process.join(self.stop_timeout)
+            if process.is_alive():
+                process.terminate()
@@ -14,8 +14,31 @@ KAFKA_EXECUTION_TOPIC = os.environ.get("KAFKA_EXECUTION_TOPIC", "ns.instances.ex
 KAFKA_CONFIGURATION_TOPIC = os.environ.get("KAFKA_CONFIGURATION_TOPIC", "ns.instances.conf")
 KAFKA_SPECTATOR_CONFIGURATION_TOPIC = os.environ.get("KAFKA_SPECTATOR_CONFIGURATION_TOPIC",
                                                      "spectators.vtranscoder3d.conf")
+KAFKA_DEAD_LETTER_TOPIC = os.environ.get("KAFKA_DEAD_LETTER_TOPIC", "ns.instances.exec.dlq")
+# The key of the configuration messages: "entity" (VNF mac, ns_name/vnf_index, transcoder id)
+# or "legacy" (a fixed key per VNF type, no key for the spectators)
+KAFKA_CONFIGURATION_KEY_MODE = os.environ.get("KAFKA_CONFIGURATION_KEY_MODE", "entity")
+# The partitioner of the producer as "module:function" (key bytes, all partitions, available
+# partitions). Empty for the default murmur2 partitioner of kafka-python (as in Java clients).
+KAFKA_PRODUCER_PARTITIONER = os.environ.get("KAFKA_PRODUCER_PARTITIONER", "")
+# Only the changed spectator qualities are published, coalesced per window (seconds). The
+# compression may be any type of kafka-python, e.g. gzip; empty for no compression.
+SPECTATORS_PUBLISHING = {
+    "window": float(os.environ.get("SPECTATORS_PUBLISHING_WINDOW", 0.2)),
+    "compression": os.environ.get("SPECTATORS_PUBLISHING_COMPRESSION", "") or None,
+    "max_entries": int(os.environ.get("SPECTATORS_PUBLISHING_MAX_ENTRIES", 100000)),
+}
+# The last applied configuration per vTranscoder; identical configurations are not published.
+# The state may be seeded from a compacted topic of the configurations (empty to disable).
+VTRANSCODER_STATE = {
+    "ttl": int(os.environ.get("VTRANSCODER_STATE_TTL", 3600)),
+    "max_size": int(os.environ.get("VTRANSCODER_STATE_MAX_SIZE", 4096)),
+    "seed_topic": os.environ.get("VTRANSCODER_STATE_SEED_TOPIC", ""),
+    "seed_timeout": int(os.environ.get("VTRANSCODER_STATE_SEED_TIMEOUT", 5)),
+}
 # Use unique consumer group per UC
-KAFKA_GROUP_ID = {"worker": "MAPE_ACTIONS_CG", "osm_kafka_subscriber": "5GMEDIA_EXECUTION_CG"}
+KAFKA_GROUP_ID = {"worker": "MAPE_ACTIONS_CG", "osm_kafka_subscriber": "5GMEDIA_EXECUTION_CG",
+                  "dead_letter_replay": "MAPE_ACTIONS_DLQ_REPLAY_CG"}
 
 # =================================
 # OSM SETTINGS
@@ -28,8 +51,35 @@ OSM_ADMIN_CREDENTIALS = {"username": os.environ.get("OSM_USER", "admin"),
 OSM_COMPONENTS = {"UI": 'http://{}:80'.format(OSM_IP),
                   "NBI-API": 'https://{}:9999'.format(OSM_IP),
                   "RO-API": 'http://{}:9090'.format(OSM_IP)}
+# The OSM tokens are cached per process (in seconds). Keep it lower than the token expiration.
+# A token rejected by the NBI (HTTP 401) before its TTL is replaced and the request is resent once.
+OSM_TOKEN_TTL = int(os.environ.get("OSM_TOKEN_TTL", 1800))
+# The VNF descriptors are cached per process (in seconds)
+OSM_DESCRIPTOR_TTL = int(os.environ.get("OSM_DESCRIPTOR_TTL", 3600))
+# The max seconds an action waits for the lock of its NS (e.g. a scaling in waits for the
+# configuration after a scaling out of the same NS). -1 waits forever.
+NS_LOCK_TIMEOUT = float(os.environ.get("NS_LOCK_TIMEOUT", 300))
+# The NS metadata (nsd-name-ref, name) are cached until the NS termination or this TTL
+OSM_NS_METADATA_TTL = int(os.environ.get("OSM_NS_METADATA_TTL", 86400))
 OSM_KAFKA_SERVER = "{}:{}".format(OSM_IP, os.environ.get("OSM_KAFKA_PORT", "9094"))
 OSM_KAFKA_NS_TOPIC = 'ns'
+# Track the in-flight OSM operations from the `ns` topic instead of polling the NBI
+OSM_OPERATIONS_LISTENER = os.environ.get("OSM_OPERATIONS_LISTENER", "true").lower() == "true"
+# Without the listener, the NS instantiations and terminations in flight are checked through
+# the NBI every N seconds until their timeout
+OSM_OPERATIONS_POLL_INTERVAL = int(os.environ.get("OSM_OPERATIONS_POLL_INTERVAL", 30))
+# The NSD and VIM account indexes are cached per process (in seconds). An instantiation without
+# `instantiated` event after `timeout` seconds is checked once through the NBI.
+NS_INSTANTIATION = {
+    "catalog_ttl": int(os.environ.get("OSM_CATALOG_TTL", 600)),
+    "timeout": int(os.environ.get("NS_INSTANTIATION_TIMEOUT", 1800)),
+}
+# The concurrent cleanup tasks of a NS termination and the max seconds to wait its
+# `terminated` event (then it is checked once through the NBI)
+NS_TERMINATION = {
+    "workers": int(os.environ.get("NS_TERMINATION_WORKERS", 8)),
+    "timeout": int(os.environ.get("NS_TERMINATION_TIMEOUT", 1800)),
+}
 
 # =================================
 # UC3
@@ -37,6 +87,144 @@ OSM_KAFKA_NS_TOPIC = 'ns'
 vCDN_NSD_PREFIX = 'faas_vm_vCDN'
 VDNS_IP = os.environ.get("VDNS_IP", '192.168.111.20')
 VDNS_PORT = '9999'
+# The day 1/2 configuration of the edge vCaches: the total deadline (in seconds) after the
+# OSM event, the concurrent configurations, the readiness polling interval and the backoff
+# of the failed attempts.
+VCACHE_CONFIGURATION = {
+    "deadline": int(os.environ.get("VCACHE_CONFIGURATION_DEADLINE", 180)),
+    "workers": int(os.environ.get("VCACHE_CONFIGURATION_WORKERS", 8)),
+    "readiness_interval": float(os.environ.get("VCACHE_READINESS_INTERVAL", 2)),
+    "base_delay": float(os.environ.get("VCACHE_RETRY_BASE_DELAY", 2)),
+    "max_delay": float(os.environ.get("VCACHE_RETRY_MAX_DELAY", 20)),
+}
+
+# The journal of the subscriber configuration workflows (vCache, vDNS), resumed after a
+# restart. The records are written in batches, every `flush_interval` seconds. The file is
+# compacted once it holds `compaction_ratio` times the records of the unfinished workflows.
+SUBSCRIBER_JOURNAL = {
+    "path": os.environ.get("SUBSCRIBER_JOURNAL_PATH",
+                           "{}/logs/subscriber.journal".format(PROJECT_ROOT)),
+    "flush_interval": float(os.environ.get("SUBSCRIBER_JOURNAL_FLUSH_INTERVAL", 0.2)),
+    "compaction_ratio": float(os.environ.get("SUBSCRIBER_JOURNAL_COMPACTION_RATIO", 4)),
+}
+
+# =================================
+# EXECUTION DEADLINES
+# =================================
+# Time-to-live (in seconds) per planning type, counted from the `metric.timestamp` of the
+# execution message. Expired actions are skipped before any upstream call. Zero disables it.
+ACTION_TTL_DEFAULT = int(os.environ.get("ACTION_TTL_DEFAULT", 300))
+ACTION_TTL = {
+    "vnf_scale_out": int(os.environ.get("ACTION_TTL_VNF_SCALE", 300)),
+    "vnf_scale_in": int(os.environ.get("ACTION_TTL_VNF_SCALE", 300)),
+    "faas_vnf_scale_out": int(os.environ.get("ACTION_TTL_FAAS_VNF_SCALE", 300)),
+    "faas_vnf_scale_in": int(os.environ.get("ACTION_TTL_FAAS_VNF_SCALE", 300)),
+    "set_vce_bitrate": int(os.environ.get("ACTION_TTL_VCE", 30)),
+    "set_vtranscoder_profile": int(os.environ.get("ACTION_TTL_VTRANSCODER", 60)),
+    "set_vtranscoder_processing_unit": int(os.environ.get("ACTION_TTL_VTRANSCODER", 60)),
+    "set_vtranscoder_client_profile": int(os.environ.get("ACTION_TTL_VTRANSCODER_CLIENT", 30)),
+}
+
+# =================================
+# EXECUTION LANES
+# =================================
+# The configuration actions (Kafka publishes) never wait behind the lifecycle actions
+# (NFVO/FaaS operations). Each lane has its own threads and queue. The consumer never blocks
+# on a full queue: the actions are held in the overflow of the lane, and the consumption pauses
+# while a lane holds `max_overflow` actions.
+EXECUTION_LANES = {
+    "configuration": {
+        "actions": ["set_vce_bitrate", "set_vtranscoder_profile",
+                    "set_vtranscoder_processing_unit", "set_vtranscoder_client_profile"],
+        "concurrency": int(os.environ.get("CONFIGURATION_LANE_CONCURRENCY", 4)),
+        "queue_size": int(os.environ.get("CONFIGURATION_LANE_QUEUE_SIZE", 1000)),
+        "max_overflow": int(os.environ.get("CONFIGURATION_LANE_MAX_OVERFLOW", 10000)),
+    },
+    "lifecycle": {
+        "actions": ["vnf_scale_out", "vnf_scale_in", "faas_vnf_scale_out", "faas_vnf_scale_in",
+                    "ns_scale", "ns_instantiate", "ns_terminate"],
+        "concurrency": int(os.environ.get("LIFECYCLE_LANE_CONCURRENCY", 2)),
+        "queue_size": int(os.environ.get("LIFECYCLE_LANE_QUEUE_SIZE", 100)),
+        "max_overflow": int(os.environ.get("LIFECYCLE_LANE_MAX_OVERFLOW", 1000)),
+    },
+}
+EXECUTION_DEFAULT_LANE = "lifecycle"
+# The offsets of the execution topic are committed once the actions are executed (every
+# `commit_interval` seconds), so the actions waiting in the lanes are consumed again after a
+# crash. On SIGTERM, the consumption stops and the lanes are drained for up to
+# `drain_timeout` seconds.
+EXECUTION_OFFSETS = {
+    "commit_interval": float(os.environ.get("EXECUTION_OFFSETS_COMMIT_INTERVAL", 5)),
+    "drain_timeout": float(os.environ.get("EXECUTION_DRAIN_TIMEOUT", 30)),
+}
+
+# The number of worker processes. Each process consumes a shard of the partitions of the
+# execution topic. One process consumes the whole topic using the consumer group.
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", 1))
+# How often (in seconds) each worker process checks for new partitions in the execution topic
+WORKER_REBALANCE_INTERVAL = int(os.environ.get("WORKER_REBALANCE_INTERVAL", 60))
+
+# =================================
+# PROFILING
+# =================================
+# The profiling windows are triggered by SIGUSR1 (stacks sampling, cProfile of the handlers,
+# handlers timing table), SIGUSR2 (tracemalloc) or the admin API. The results are written in
+# the `directory`.
+PROFILING = {
+    "directory": os.environ.get("PROFILING_DIRECTORY", "{}/logs".format(PROJECT_ROOT)),
+    "window": float(os.environ.get("PROFILING_WINDOW", 30)),
+    "max_window": float(os.environ.get("PROFILING_MAX_WINDOW", 600)),
+    "interval": float(os.environ.get("PROFILING_INTERVAL", 0.01)),
+    "traceback_limit": int(os.environ.get("PROFILING_TRACEBACK_LIMIT", 10)),
+}
+
+# =================================
+# ADMIN API
+# =================================
+# The worker process #N listens on `port` + N; the standalone OSM subscriber on
+# `subscriber_port`. The POST requests (e.g. cache invalidation) require the `token` (in the
+# X-Admin-Token header); they are refused if it is not set.
+ADMIN_API = {
+    "enabled": os.environ.get("ADMIN_API_ENABLED", "true").lower() == "true",
+    "host": os.environ.get("ADMIN_API_HOST", "127.0.0.1"),
+    "port": int(os.environ.get("ADMIN_API_PORT", 8080)),
+    "subscriber_port": int(os.environ.get("ADMIN_API_SUBSCRIBER_PORT", 8079)),
+    "token": os.environ.get("ADMIN_API_TOKEN", ""),
+}
+
+# =================================
+# UPSTREAMS
+# =================================
+# The connect and read timeouts (in seconds) of the HTTP requests
+HTTP_TIMEOUT = (float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5)),
+                float(os.environ.get("HTTP_READ_TIMEOUT", 60)))
+# The connection pool of the async NBI client (`aionbiapi`)
+NBI_ASYNC_POOL = {
+    "limit": int(os.environ.get("NBI_ASYNC_POOL_LIMIT", 100)),
+    "limit_per_host": int(os.environ.get("NBI_ASYNC_POOL_LIMIT_PER_HOST", 10)),
+}
+# The circuit breaker per upstream (NBI, vDNS, each vCache, FaaS bootstrap, InfluxDB, Kafka
+# producer). It opens if the ratio of the failed or slow calls in the `window` (seconds)
+# exceeds the `failure_ratio` and it probes the upstream after `open_duration` seconds.
+CIRCUIT_BREAKER = {
+    "window": int(os.environ.get("CIRCUIT_BREAKER_WINDOW", 60)),
+    "min_calls": int(os.environ.get("CIRCUIT_BREAKER_MIN_CALLS", 5)),
+    "failure_ratio": float(os.environ.get("CIRCUIT_BREAKER_FAILURE_RATIO", 0.5)),
+    "slow_call_duration": float(os.environ.get("CIRCUIT_BREAKER_SLOW_CALL_DURATION", 20)),
+    "open_duration": float(os.environ.get("CIRCUIT_BREAKER_OPEN_DURATION", 30)),
+    "half_open_calls": int(os.environ.get("CIRCUIT_BREAKER_HALF_OPEN_CALLS", 1)),
+}
+
+# =================================
+# RETRIES
+# =================================
+# A failed action is retried with exponential backoff and jitter. After the max attempts,
+# it is published in the dead-letter topic (see `dead_letter_replay.py`).
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", 5))
+RETRY_BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY", 2))
+RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", 120))
+# Attempts to poll the bootstrap IngressUrl of a FaaS vCDN before the action is rescheduled
+FAAS_INGRESS_URL_POLLING_ATTEMPTS = int(os.environ.get("FAAS_INGRESS_URL_POLLING_ATTEMPTS", 4))
 
 # =================================
 # INFLUXDB SETTINGS
@@ -52,6 +240,32 @@ INFLUX_DATABASES = {
         'PORT': os.environ.get("INFLUXDB_PORT", 8086)
     }
 }
+# The timeout (in seconds) of the InfluxDB requests
+INFLUX_TIMEOUT = int(os.environ.get("INFLUXDB_TIMEOUT", 10))
+# The time windows (seconds) of the faas operations lookups, widened until a match. Zero means
+# no time bound.
+FAAS_OPERATIONS_WINDOWS = [int(window) for window in os.environ.get(
+    "FAAS_OPERATIONS_WINDOWS", "3600,86400,2592000,0").split(',') if window.strip()]
+# If enabled (opt-in), the optimization events are kept in their own retention policy and
+# downsampled by a continuous query into per-NS action counts per interval. The string fields
+# are capped.
+INFLUX_RETENTION = {
+    "enabled": os.environ.get("INFLUX_RETENTION_ENABLED", "false").lower() == "true",
+    "raw_policy": os.environ.get("INFLUX_RAW_POLICY", "executor_raw"),
+    "raw_duration": os.environ.get("INFLUX_RAW_DURATION", "30d"),
+    "downsampled_policy": os.environ.get("INFLUX_DOWNSAMPLED_POLICY", "executor_downsampled"),
+    "downsampled_duration": os.environ.get("INFLUX_DOWNSAMPLED_DURATION", "104w"),
+    "interval": os.environ.get("INFLUX_DOWNSAMPLING_INTERVAL", "1h"),
+}
+INFLUX_MAX_FIELD_LENGTH = int(os.environ.get("INFLUX_MAX_FIELD_LENGTH", 1024))
+# The writes are appended to a disk spool and sent in batches by a background thread
+INFLUX_SPOOL = {
+    "path": os.environ.get("INFLUX_SPOOL_PATH", "{}/logs/influx_spool".format(PROJECT_ROOT)),
+    "max_bytes": int(os.environ.get("INFLUX_SPOOL_MAX_BYTES", 256 * 1024 * 1024)),
+    "segment_bytes": int(os.environ.get("INFLUX_SPOOL_SEGMENT_BYTES", 4 * 1024 * 1024)),
+    "batch_size": int(os.environ.get("INFLUX_SPOOL_BATCH_SIZE", 5000)),
+    "flush_interval": float(os.environ.get("INFLUX_SPOOL_FLUSH_INTERVAL", 1)),
+}
 
 # =================================
 # GRAYLOG SETTINGS
@@ -1,10 +1,11 @@
 import json
 import uuid
-import logging.config
-from settings import OSM_COMPONENTS, LOGGING
+import logging
+from settings import OSM_COMPONENTS
+from runtime.logs import configure_logging
 from httpclient.client import Client
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -13,7 +14,7 @@ class Nsr(object):
 
     def __init__(self, token):
         """Constructor of Nsr class"""
-        self.__client = Client(verify_ssl_cert=False)
+        self.__client = Client(verify_ssl_cert=False, upstream="so")
         self.basic_token = token
 
     def get_list(self):
@@ -1,9 +1,9 @@
 from settings import OSM_COMPONENTS
 from httpclient.client import Client
-import logging.config
-from settings import LOGGING
+import logging
+from runtime.logs import configure_logging
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -12,7 +12,7 @@ class Vnfr(object):
 
     def __init__(self, token):
         """Constructor of Vnfr class"""
-        self.__client = Client(verify_ssl_cert=False)
+        self.__client = Client(verify_ssl_cert=False, upstream="so")
         self.basic_token = token
 
     def get_list(self):
@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+from httpclient.client import Client
+from nbiapi import identity
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeSession:
+    """A session that returns the given statuses and records the sent headers"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.headers = []
+
+    def request(self, method, url, **kwargs):
+        self.headers.append(kwargs.get('headers'))
+        return FakeResponse(self.statuses.pop(0))
+
+
+class UnauthorizedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.rejected = []
+
+    def refresh_token(self, rejected_token):
+        self.rejected.append(rejected_token)
+        return "new-token"
+
+    def test_unauthorized_request_is_resent_once_with_a_new_token(self):
+        session = FakeSession([401, 200])
+        client = Client(session=session, refresh_token=self.refresh_token)
+        response = client.get("http://nbi/ns", {"Authorization": "Bearer old-token"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rejected, ["old-token"])
+        self.assertEqual(session.headers[1], {"Authorization": "Bearer new-token"})
+
+    def test_request_rejected_again_is_not_resent(self):
+        session = FakeSession([401, 401])
+        client = Client(session=session, refresh_token=self.refresh_token)
+        response = client.get("http://nbi/ns", {"Authorization": "Bearer old-token"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(session.headers), 2)
+
+    def test_client_without_refresh_returns_the_unauthorized_response(self):
+        session = FakeSession([401])
+        response = Client(session=session).get("http://nbi/ns",
+                                               {"Authorization": "Bearer old-token"})
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshBearerTokenTest(unittest.TestCase):
+    def setUp(self):
+        self.username = identity.OSM_ADMIN_CREDENTIALS.get('username')
+        identity.tokens.set(self.username, "old-token")
+
+    def tearDown(self):
+        identity.invalidate_bearer_token()
+
+    def test_rejected_token_is_replaced(self):
+        with mock.patch.object(identity, "bearer_token", return_value="new-token"):
+            self.assertEqual(identity.refresh_bearer_token("old-token"), "new-token")
+
+    def test_token_refreshed_by_another_request_is_kept(self):
+        identity.tokens.set(self.username, "newer-token")
+        with mock.patch.object(identity, "bearer_token", return_value="new-token") as request:
+            self.assertEqual(identity.refresh_bearer_token("old-token"), "newer-token")
+        request.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from runtime.journal import Journal
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "subscriber.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_journal(self, **kwargs):
+        # The writer thread is not expected to run during the tests
+        return Journal(self.path, flush_interval=3600, **kwargs)
+
+    def read_lines(self):
+        with open(self.path) as journal_file:
+            return [line for line in journal_file if line.strip()]
+
+    def test_load_returns_the_last_step_of_the_unfinished_workflows(self):
+        journal = self.create_journal()
+        journal.load()
+        journal.record("op-1", "scaled", "started", {"nsr_id": "ns-1"})
+        journal.record("op-1", "scaled", "vcaches_configured", {"nsr_id": "ns-1"})
+        journal.record("op-2", "instantiated", "started", {"nsr_id": "ns-2"})
+        journal.complete("op-2")
+        journal.flush()
+
+        pending = self.create_journal().load()
+        self.assertEqual(list(pending.keys()), ["op-1"])
+        self.assertEqual(pending["op-1"]["step"], "vcaches_configured")
+        self.assertEqual(pending["op-1"]["data"], {"nsr_id": "ns-1"})
+
+    def test_load_compacts_the_journal(self):
+        journal = self.create_journal()
+        journal.load()
+        for step in ("started", "vcaches_configured"):
+            journal.record("op-1", "scaled", step)
+        journal.record("op-2", "scaled", "started")
+        journal.complete("op-2")
+        journal.flush()
+        self.assertEqual(len(self.read_lines()), 4)
+
+        self.create_journal().load()
+        self.assertEqual(len(self.read_lines()), 1)
+
+    def test_load_skips_a_partially_written_record(self):
+        with open(self.path, 'w') as journal_file:
+            journal_file.write('{"id": "op-1", "kind": "scaled", "step": "started"}\n{"id": "op-')
+        pending = self.create_journal().load()
+        self.assertEqual(list(pending.keys()), ["op-1"])
+
+    def test_load_keeps_the_buffered_records(self):
+        journal = self.create_journal()
+        journal.record("op-1", "scaled", "started")
+        pending = journal.load()
+        self.assertEqual(list(pending.keys()), ["op-1"])
+        self.assertEqual(len(self.read_lines()), 1)
+
+    def test_journal_is_compacted_while_running(self):
+        journal = self.create_journal(compaction_ratio=2, min_compaction_records=10)
+        journal.load()
+        for number in range(20):
+            journal.record("op-{}".format(number), "scaled", "started")
+            journal.complete("op-{}".format(number))
+            journal.flush()
+        journal.record("op-live", "scaled", "started")
+        journal.flush()
+        self.assertLess(len(self.read_lines()), 10)
+        self.assertEqual(list(self.create_journal().load().keys()), ["op-live"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import threading
+import unittest
+from runtime.lanes import Lane, LaneRouter
+
+
+class LaneTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.executed = []
+        self.lane = Lane("test", concurrency=1, queue_size=1, max_overflow=2)
+
+    def tearDown(self):
+        self.release.set()
+        self.lane.stop(5)
+
+    def block(self):
+        self.release.wait(5)
+
+    def wait_started(self):
+        deadline = time.time() + 5
+        while self.lane.queues[0].qsize() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_submit_does_not_block_on_a_full_queue(self):
+        self.lane.submit("ns-1", self.block)
+        self.wait_started()
+        started_at = time.time()
+        for number in range(3):
+            self.lane.submit("ns-1", self.executed.append, number)
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual(self.lane.overflowed(), 2)
+        self.assertTrue(self.lane.saturated())
+
+    def test_overflow_keeps_the_order_of_the_key(self):
+        self.lane.submit("ns-1", self.block)
+        self.wait_started()
+        for number in range(5):
+            self.lane.submit("ns-1", self.executed.append, number)
+        self.release.set()
+        self.lane.stop(5)
+        self.assertEqual(self.executed, [0, 1, 2, 3, 4])
+        self.assertEqual(self.lane.depth(), 0)
+
+    def test_stop_with_a_full_queue_respects_the_timeout(self):
+        self.lane.submit("ns-1", self.block)
+        self.wait_started()
+        for number in range(3):
+            self.lane.submit("ns-1", self.executed.append, number)
+        started_at = time.time()
+        self.lane.stop(0.2)
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual(self.executed, [])
+
+
+class LaneRouterTest(unittest.TestCase):
+    def test_stop_drains_the_lanes(self):
+        router = LaneRouter({"configuration": {"actions": ["set_vce_bitrate"], "queue_size": 1},
+                             "lifecycle": {"actions": ["vnf_scale_out"]}}, "lifecycle")
+        executed = []
+        for number in range(3):
+            router.dispatch("set_vce_bitrate", "vce-1", executed.append, number)
+        router.dispatch("ns_scale", "ns-1", executed.append, "scale")
+        router.stop(5)
+        self.assertEqual(sorted(executed, key=str), [0, 1, 2, "scale"])
+        self.assertEqual(router.depths(), {"configuration": 0, "lifecycle": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
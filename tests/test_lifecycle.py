@@ -0,0 +1,67 @@
+import time
+import unittest
+from actions.lifecycle import LifecycleTracker
+
+
+class FakeIndex:
+    """An in-flight operations index that must not be used without the listener"""
+
+    def __getattr__(self, name):
+        raise AssertionError("The index was used without the listener: {}".format(name))
+
+
+class FakeNbi:
+    """The NBI states of an operation, one per check"""
+
+    def __init__(self, states):
+        self.states = list(states)
+        self.checks = 0
+
+    def get_state(self, operation_uuid):
+        self.checks += 1
+        state = self.states.pop(0) if self.states else None
+        if isinstance(state, Exception):
+            raise state
+        return state
+
+
+def compose_operation(operation_uuid="nslcmop-1"):
+    now = time.time()
+    return {"ns_name": "vCDN", "ns_uuid": "ns-1", "nslcmop_id": operation_uuid,
+            "started_at": now, "submitted_at": now, "phases": {}}
+
+
+class LifecycleTrackerWithoutListenerTest(unittest.TestCase):
+    def track(self, states, timeout=5):
+        self.nbi = FakeNbi(states)
+        self.tracker = LifecycleTracker("instantiation", FakeIndex(), timeout, listening=False,
+                                        poll_interval=0.01, get_state=self.nbi.get_state)
+        self.tracker.track(compose_operation())
+
+    def wait_completion(self, timeout=5):
+        deadline = time.time() + timeout
+        while self.tracker.snapshot() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.tracker.snapshot(), [])
+
+    def test_operation_is_polled_until_its_final_state(self):
+        self.track([None, None, "COMPLETED"])
+        self.wait_completion()
+        self.assertEqual(self.nbi.checks, 3)
+
+    def test_failed_check_is_retried(self):
+        self.track([Exception("NBI unavailable"), "FAILED"])
+        self.wait_completion()
+        self.assertEqual(self.nbi.checks, 2)
+
+    def test_operation_without_final_state_times_out(self):
+        self.track([], timeout=0.05)
+        self.wait_completion()
+        self.assertGreater(self.nbi.checks, 1)
+        checks = self.nbi.checks
+        time.sleep(0.05)
+        self.assertEqual(self.nbi.checks, checks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import time
+import threading
+import unittest
+from runtime.exceptions import LockTimeout
+from runtime.locks import KeyedLocks
+
+
+class KeyedLocksTest(unittest.TestCase):
+    def setUp(self):
+        self.locks = KeyedLocks("test", timeout=5)
+
+    def test_none_key_is_not_locked(self):
+        with self.locks.hold(None):
+            self.assertEqual(self.locks.held(), {})
+
+    def test_lock_is_reentrant_and_dropped_when_unused(self):
+        with self.locks.hold("ns-1"):
+            with self.locks.hold("ns-1"):
+                self.assertEqual(self.locks.held(), {"ns-1": 2})
+        self.assertEqual(self.locks.held(), {})
+
+    def test_same_key_is_serialized(self):
+        events = []
+        entered = threading.Event()
+
+        def hold():
+            with self.locks.hold("ns-1"):
+                entered.set()
+                time.sleep(0.1)
+                events.append("first")
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait(5)
+        with self.locks.hold("ns-1"):
+            events.append("second")
+        thread.join()
+        self.assertEqual(events, ["first", "second"])
+
+    def test_other_keys_are_not_blocked(self):
+        entered, release = threading.Event(), threading.Event()
+
+        def hold():
+            with self.locks.hold("ns-1"):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait(5)
+        try:
+            with self.locks.hold("ns-2", timeout=0.1):
+                self.assertEqual(self.locks.held(), {"ns-1": 1, "ns-2": 1})
+        finally:
+            release.set()
+            thread.join()
+
+    def test_timeout_raises_and_releases_the_entry(self):
+        entered, release = threading.Event(), threading.Event()
+
+        def hold():
+            with self.locks.hold("ns-1"):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait(5)
+        try:
+            with self.assertRaises(LockTimeout):
+                with self.locks.hold("ns-1", timeout=0.05):
+                    pass
+            self.assertEqual(self.locks.held(), {"ns-1": 1})
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.locks.held(), {})
+
+    def test_failure_inside_the_lock_releases_it(self):
+        with self.assertRaises(ValueError):
+            with self.locks.hold("ns-1"):
+                raise ValueError()
+        self.assertEqual(self.locks.held(), {})
+        with self.locks.hold("ns-1", timeout=0.1):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from collections import namedtuple
+from kafka.structs import TopicPartition
+from runtime.offsets import OffsetTracker
+
+Record = namedtuple("Record", ["topic", "partition", "offset"])
+
+PARTITION = TopicPartition("ns.instances.exec", 0)
+
+
+class FakeConsumer:
+    """A consumer that records the committed offsets"""
+
+    def __init__(self, assignment=(PARTITION,), error=None):
+        self.partitions = set(assignment)
+        self.error = error
+        self.commits = []
+
+    def assignment(self):
+        return self.partitions
+
+    def commit(self, offsets):
+        if self.error is not None:
+            raise self.error
+        self.commits.append({partition: position.offset
+                             for partition, position in offsets.items()})
+
+
+class OffsetTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.offsets = OffsetTracker(commit_interval=3600)
+        self.consumer = FakeConsumer()
+        self.records = [Record("ns.instances.exec", 0, offset) for offset in range(3)]
+        for record in self.records:
+            self.offsets.consumed(record)
+
+    def test_records_in_flight_are_not_committed(self):
+        self.offsets.commit(self.consumer, force=True)
+        self.assertEqual(self.consumer.commits, [{PARTITION: 0}])
+        self.assertEqual(self.offsets.pending(), 3)
+
+    def test_commit_stops_at_the_oldest_record_in_flight(self):
+        self.offsets.done(self.records[0])
+        self.offsets.done(self.records[2])
+        self.offsets.commit(self.consumer, force=True)
+        self.assertEqual(self.consumer.commits, [{PARTITION: 1}])
+
+    def test_executed_records_are_committed(self):
+        for record in self.records:
+            self.offsets.done(record)
+        self.offsets.commit(self.consumer, force=True)
+        self.assertEqual(self.consumer.commits, [{PARTITION: 3}])
+        self.assertEqual(self.offsets.pending(), 0)
+
+    def test_unchanged_positions_are_not_committed_again(self):
+        self.offsets.commit(self.consumer, force=True)
+        self.offsets.commit(self.consumer, force=True)
+        self.assertEqual(len(self.consumer.commits), 1)
+
+    def test_commit_waits_for_the_interval(self):
+        self.offsets.commit(self.consumer, force=True)
+        self.offsets.done(self.records[0])
+        self.offsets.commit(self.consumer)
+        self.assertEqual(len(self.consumer.commits), 1)
+
+    def test_revoked_partitions_are_not_committed(self):
+        consumer = FakeConsumer(assignment=())
+        self.offsets.commit(consumer, force=True)
+        self.assertEqual(consumer.commits, [])
+
+    def test_failed_commit_is_retried(self):
+        self.offsets.commit(FakeConsumer(error=Exception("rebalance")), force=True)
+        self.offsets.commit(self.consumer, force=True)
+        self.assertEqual(self.consumer.commits, [{PARTITION: 0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
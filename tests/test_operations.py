@@ -0,0 +1,80 @@
+import unittest
+from runtime.operations import InFlightOperations
+
+NS_UUID = "199b1fcd-eb32-4c6f-b149-34410acc2a32"
+
+
+def compose_operation(operation_uuid, ns_uuid=NS_UUID, lcm_operation_type="scale",
+                      state="PROCESSING", scale_type="SCALE_OUT"):
+    return {"_id": operation_uuid, "nsInstanceId": ns_uuid, "lcmOperationType": lcm_operation_type,
+            "operationState": state,
+            "operationParams": {"scaleVnfData": {"scaleVnfType": scale_type}}}
+
+
+class InFlightOperationsTest(unittest.TestCase):
+    def setUp(self):
+        self.index = InFlightOperations()
+        self.index.set_listening(True)
+
+    def test_track_keeps_only_the_processing_scale_operations_of_the_ns(self):
+        self.index.track(NS_UUID, [
+            compose_operation("op-1"),
+            compose_operation("op-2", ns_uuid="another-ns"),
+            compose_operation("op-3", state="COMPLETED"),
+            compose_operation("op-4", lcm_operation_type="instantiate"),
+        ])
+        self.assertTrue(self.index.is_tracked(NS_UUID))
+        self.assertEqual(self.index.get_pending(NS_UUID), ["op-1"])
+
+    def test_track_replaces_the_known_operations(self):
+        self.index.track(NS_UUID, [compose_operation("op-1")])
+        self.index.track(NS_UUID, [compose_operation("op-2")])
+        self.assertEqual(self.index.get_pending(NS_UUID), ["op-2"])
+
+    def test_reconnection_drops_the_missed_operations(self):
+        self.index.track(NS_UUID, [compose_operation("op-1")])
+        self.index.set_listening(False)
+        self.assertFalse(self.index.is_tracked(NS_UUID))
+        self.index.set_listening(True)
+        self.index.track(NS_UUID, [])
+        self.assertEqual(self.index.get_pending(NS_UUID), [])
+
+    def test_untracked_ns_without_listener(self):
+        self.index.set_listening(False)
+        self.index.track(NS_UUID, [compose_operation("op-1")])
+        self.assertFalse(self.index.is_tracked(NS_UUID))
+
+    def test_scaled_event_removes_the_operation(self):
+        self.index.track(NS_UUID, [compose_operation("op-1", scale_type="SCALE_IN")])
+        self.assertEqual(self.index.get_pending(NS_UUID, "scale", "SCALE_IN"), ["op-1"])
+        self.assertEqual(self.index.get_pending(NS_UUID, "scale", "SCALE_OUT"), [])
+        self.index.update("scaled", {"nsr_id": NS_UUID, "nslcmop_id": "op-1",
+                                     "operationState": "COMPLETED"})
+        self.assertEqual(self.index.get_pending(NS_UUID), [])
+
+    def test_submitted_operation_event(self):
+        self.index.update("scale", compose_operation("op-1"))
+        self.assertEqual(self.index.get_pending(NS_UUID, "scale", "SCALE_OUT"), ["op-1"])
+        self.index.update("scale", compose_operation("op-1", state="FAILED"))
+        self.assertEqual(self.index.get_pending(NS_UUID), [])
+
+    def test_terminated_event_untracks_the_ns(self):
+        self.index.track(NS_UUID, [compose_operation("op-1")])
+        self.index.update("terminated", {"nsr_id": NS_UUID, "nslcmop_id": "op-9",
+                                         "operationState": "COMPLETED"})
+        self.assertFalse(self.index.is_tracked(NS_UUID))
+        self.assertEqual(self.index.get_pending(NS_UUID), [])
+
+    def test_watcher_is_called_once_on_the_final_state(self):
+        states = []
+        self.index.watch("op-1", lambda state, event: states.append(state))
+        self.index.update("instantiated", {"nsr_id": NS_UUID, "nslcmop_id": "op-1",
+                                           "operationState": "COMPLETED"})
+        self.index.update("instantiated", {"nsr_id": NS_UUID, "nslcmop_id": "op-1",
+                                           "operationState": "COMPLETED"})
+        self.assertEqual(states, ["COMPLETED"])
+        self.assertIsNone(self.index.unwatch("op-1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import osm_subscriber
+from runtime.journal import Journal
+
+
+class ResumeWorkflowTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "subscriber.journal")
+        self.journal = Journal(self.path, flush_interval=3600)
+        self.journal.load()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def resume(self, record, ns_metadata):
+        with mock.patch.object(osm_subscriber, "journal", self.journal), \
+                mock.patch.object(osm_subscriber, "get_ns_metadata", return_value=ns_metadata):
+            osm_subscriber.resume_workflow(record)
+
+    def test_workflow_of_a_ns_that_is_no_longer_a_vcdn_is_completed(self):
+        message = {"nsr_id": "ns-1", "nslcmop_id": "op-1", "operationState": "COMPLETED"}
+        self.journal.record("op-1", "scaled", "started", message)
+        self.resume(self.journal.pending()["op-1"], {"nsd-name-ref": "other_nsd"})
+
+        self.assertEqual(self.journal.pending(), {})
+        self.journal.flush()
+        self.assertEqual(Journal(self.path, flush_interval=3600).load(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
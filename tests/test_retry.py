@@ -0,0 +1,56 @@
+import time
+import unittest
+from runtime.retry import RetryScheduler
+
+
+class RetrySchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.dispatched = []
+        self.dead_letters = []
+        self.done = []
+        self.scheduler = RetryScheduler(
+            lambda message, action, failures, done: self.dispatched.append((message, done)),
+            dead_letter=lambda message, action, failures: self.dead_letters.append(
+                (message, len(failures))),
+            max_attempts=3, base_delay=0.01, max_delay=0.01)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def mark_done(self):
+        self.done.append(True)
+
+    def wait_dispatched(self, count, timeout=5):
+        deadline = time.time() + timeout
+        while len(self.dispatched) < count and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_rescheduled_action_carries_its_done_callback(self):
+        self.scheduler.schedule("message", "ns_scale", [], Exception("failure"), self.mark_done)
+        self.wait_dispatched(1)
+        self.assertEqual(self.dispatched, [("message", self.mark_done)])
+        self.assertEqual(self.done, [])
+
+    def test_dead_lettered_action_is_done(self):
+        self.scheduler.schedule("message", "ns_scale", [{}, {}], Exception("failure"),
+                                self.mark_done)
+        self.assertEqual(self.dead_letters, [("message", 3)])
+        self.assertEqual(self.done, [True])
+
+    def test_stop_dead_letters_the_waiting_actions(self):
+        self.scheduler.base_delay = self.scheduler.max_delay = 3600
+        self.scheduler.schedule("message", "ns_scale", [], Exception("failure"), self.mark_done)
+        self.scheduler.stop()
+        self.assertEqual(self.dead_letters, [("message", 2)])
+        self.assertEqual(self.done, [True])
+        self.assertEqual(self.dispatched, [])
+
+    def test_action_failed_after_the_stop_is_dead_lettered(self):
+        self.scheduler.stop()
+        self.scheduler.schedule("message", "ns_scale", [], Exception("failure"), self.mark_done)
+        self.assertEqual(self.dead_letters, [("message", 1)])
+        self.assertEqual(self.done, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+from influx.spool import Spool, FAILED_DIRECTORY
+
+
+def compose_point(instance_number, ns_uuid="0c9e"):
+    return {"measurement": "faas_operations", "tags": {"ns_uuid": ns_uuid},
+            "fields": {"instance_number": instance_number},
+            "time": 1584026167000000000 + instance_number}
+
+
+class FakeInfluxClient:
+    """Records the written batches and fails the ones that match `fail`"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.batches = []
+        self.queries = []
+
+    def write_points(self, points, protocol='json', retention_policy=None):
+        if self.fail is not None:
+            error = self.fail(points)
+            if error is not None:
+                raise error
+        self.batches.append((retention_policy, list(points)))
+        return True
+
+    def query(self, query):
+        self.queries.append(query)
+
+
+class SpoolReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.client = FakeInfluxClient()
+        # The writer thread is not expected to run during the tests
+        self.spool = Spool(self.path, lambda: self.client, batch_size=2, flush_interval=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def written_points(self):
+        return [line for _, batch in self.client.batches for line in batch]
+
+    def test_replay_writes_the_points_in_batches(self):
+        self.spool.write_points([compose_point(number) for number in range(1, 6)])
+        self.spool.write_points([compose_point(6)], retention_policy="executor_raw")
+        self.assertTrue(self.spool.replay())
+        self.assertEqual(len(self.written_points()), 6)
+        self.assertEqual([len(batch) for policy, batch in self.client.batches
+                          if policy is None], [2, 2, 1])
+        self.assertEqual(self.spool.get_segments(), [])
+
+    def test_unavailable_influxdb_keeps_the_segments(self):
+        self.spool.write_points([compose_point(1)])
+        self.client.fail = lambda points: InfluxDBServerError("timeout")
+        self.assertFalse(self.spool.replay())
+        self.assertEqual(len(self.spool.get_segments()), 1)
+        self.assertEqual(len(self.spool.pending_points("faas_operations")), 1)
+
+        self.client.fail = None
+        self.assertTrue(self.spool.replay())
+        self.assertEqual(len(self.written_points()), 1)
+
+    def test_rejected_batch_does_not_block_the_next_segments(self):
+        self.spool.write_points([compose_point(1)], retention_policy="executor_raw")
+        self.spool.replay()
+        self.client.batches = []
+        self.client.fail = lambda points: InfluxDBClientError(
+            "retention policy not found", code=400) if "instance_number=1i" in points[0] else None
+        self.spool.write_points([compose_point(1)], retention_policy="executor_raw")
+        self.spool.write_points([compose_point(2)])
+
+        self.assertTrue(self.spool.replay())
+        self.assertEqual(len(self.written_points()), 1)
+        failed = os.path.join(self.path, FAILED_DIRECTORY, "executor_raw")
+        self.assertEqual(len(os.listdir(failed)), 1)
+        with open(os.path.join(failed, os.listdir(failed)[0])) as segment:
+            self.assertIn("instance_number=1i", segment.read())
+        # The failed points are not replayed again
+        self.assertEqual(self.spool.get_segments(), [])
+
+    def test_rejected_batch_keeps_the_other_batches_of_the_segment(self):
+        self.client.fail = lambda points: InfluxDBClientError(
+            "field type conflict", code=400) if "instance_number=3i" in points[0] else None
+        self.spool.write_points([compose_point(number) for number in range(1, 6)])
+        self.assertTrue(self.spool.replay())
+        self.assertEqual(len(self.written_points()), 3)
+
+    def test_authentication_error_is_retried(self):
+        self.spool.write_points([compose_point(1)])
+        self.client.fail = lambda points: InfluxDBClientError("authorization failed", code=401)
+        self.assertFalse(self.spool.replay())
+        self.assertFalse(os.path.isdir(os.path.join(self.path, FAILED_DIRECTORY)))
+
+    def test_discarded_series_are_not_replayed(self):
+        self.spool.write_points([compose_point(1, ns_uuid="a"), compose_point(2, ns_uuid="b")])
+        self.client.fail = lambda points: InfluxDBServerError("unavailable")
+        self.spool.discard("faas_operations", {"ns_uuid": "a"})
+        self.client.fail = None
+        self.assertTrue(self.spool.replay())
+        self.assertEqual(len(self.written_points()), 1)
+        self.assertIn("ns_uuid=b", self.written_points()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
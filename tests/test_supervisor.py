@@ -0,0 +1,75 @@
+import unittest
+from runtime.supervisor import Supervisor
+
+
+class FakeProcess:
+    """A child process that is alive until it is killed"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def kill(self):
+        self.exitcode = 1
+
+
+class FakeSupervisor(Supervisor):
+    """A supervisor that records the spawned children instead of forking them"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.now = 1000.0
+        self.spawned = []
+
+    def spawn(self, index):
+        self.spawned.append(index)
+        self.children[index] = (FakeProcess(len(self.spawned)), self.now)
+
+
+class SupervisorTest(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = FakeSupervisor(target=None, processes=2, restart_delay=1,
+                                         max_restart_delay=60)
+        for index in range(2):
+            self.supervisor.spawn(index)
+        self.supervisor.spawned = []
+
+    def crash(self, index):
+        self.supervisor.children[index][0].kill()
+
+    def test_crashed_child_is_restarted_after_its_delay(self):
+        self.crash(0)
+        self.supervisor.check(1000.5)
+        self.assertEqual(self.supervisor.spawned, [])
+        self.supervisor.check(1001.5)
+        self.assertEqual(self.supervisor.spawned, [0])
+
+    def test_backoff_of_a_child_does_not_delay_the_others(self):
+        self.supervisor.delays[0] = 60
+        self.crash(0)
+        self.crash(1)
+        self.supervisor.check(1000.5)
+        self.supervisor.check(1001.5)
+        self.assertEqual(self.supervisor.spawned, [1])
+        self.supervisor.check(1060.5)
+        self.assertEqual(self.supervisor.spawned, [1, 0])
+
+    def test_delay_doubles_for_a_crash_loop(self):
+        self.crash(0)
+        self.supervisor.check(1000.5)
+        self.assertEqual(self.supervisor.delays[0], 2)
+        self.assertEqual(self.supervisor.restarts[0], 1001.5)
+
+    def test_stopping_supervisor_does_not_restart(self):
+        self.crash(0)
+        self.supervisor.check(1000.5)
+        self.supervisor.stop()
+        self.supervisor.check(1002)
+        self.assertEqual(self.supervisor.spawned, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import time
+import threading
+import unittest
+from actions.vtranscoder_spectators import DeltaPublisher
+
+
+def compose_client(client_id, qualities, timestamp=1558363628608378):
+    return {"client_id": client_id, "timestamp": timestamp,
+            "use_these_qualities": [{"transcoder_id": transcoder_id, "quality_id": quality_id,
+                                     "skip_frames": 1}
+                                    for transcoder_id, quality_id in qualities]}
+
+
+class FakeProducer:
+    """Records the published messages; fails while `available` is False"""
+
+    def __init__(self):
+        self.available = True
+        self.messages = []
+        self.sent = threading.Event()
+
+    def send(self, topic, value, key=None, compression_type=None):
+        if not self.available:
+            return False
+        self.messages.append((key, value))
+        self.sent.set()
+        return True
+
+    def qualities(self):
+        return sorted((client["client_id"], quality["transcoder_id"], quality["quality_id"])
+                      for _, value in self.messages for client in value["clients"]
+                      for quality in client["use_these_qualities"])
+
+
+class DeltaPublisherTest(unittest.TestCase):
+    def setUp(self):
+        self.producer = FakeProducer()
+        # A long window, so that the tests flush the changes themselves
+        self.publisher = DeltaPublisher("spectators", window=60, send=self.producer.send)
+
+    def test_publish_returns_without_waiting_the_window(self):
+        started_at = time.time()
+        self.assertTrue(self.publisher.publish([compose_client("a", [("1", 0)])]))
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual(self.producer.messages, [])
+        self.assertEqual(self.publisher.pending(), 1)
+
+    def test_changes_of_the_window_are_coalesced(self):
+        self.publisher.publish([compose_client("a", [("1", 0)])])
+        self.publisher.publish([compose_client("b", [("1", 2)])])
+        self.publisher.publish([compose_client("a", [("1", 1)])])
+        self.assertTrue(self.publisher.flush())
+        self.assertEqual(len(self.producer.messages), 1)
+        self.assertEqual(self.producer.qualities(), [("a", "1", 1), ("b", "1", 2)])
+
+    def test_only_the_changed_qualities_are_published(self):
+        self.publisher.publish([compose_client("a", [("1", 0), ("2", 0)])])
+        self.publisher.flush()
+        self.producer.messages = []
+        self.publisher.publish([compose_client("a", [("1", 0), ("2", 3)])])
+        self.assertEqual(self.publisher.pending(), 1)
+        self.publisher.flush()
+        self.assertEqual(self.producer.qualities(), [("a", "2", 3)])
+
+    def test_failed_changes_are_published_with_the_next_ones(self):
+        self.producer.available = False
+        self.publisher.publish([compose_client("a", [("1", 0), ("2", 0)])])
+        self.assertFalse(self.publisher.flush())
+        self.assertEqual(self.publisher.pending(), 2)
+
+        self.producer.available = True
+        self.publisher.publish([compose_client("a", [("2", 5)])])
+        self.assertTrue(self.publisher.flush())
+        self.assertEqual(self.producer.qualities(), [("a", "1", 0), ("a", "2", 5)])
+        self.assertEqual(self.publisher.pending(), 0)
+
+    def test_timer_publishes_the_window(self):
+        publisher = DeltaPublisher("spectators", window=0.05, send=self.producer.send)
+        publisher.publish([compose_client("a", [("1", 0)])])
+        self.assertTrue(self.producer.sent.wait(5))
+        self.assertEqual(self.producer.qualities(), [("a", "1", 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,45 +1,200 @@
 import os
+import re
 import sys
 import json
 import uuid
+import threading
+import importlib
 from datetime import datetime, timedelta
 from kafka import KafkaProducer, KafkaConsumer
-from influxdb import InfluxDBClient
+from runtime.breaker import get_breaker
 from settings import KAFKA_SERVER, KAFKA_CLIENT_ID, KAFKA_API_VERSION, KAFKA_GROUP_ID, \
-    INFLUX_DATABASES
+    INFLUX_DATABASES, INFLUX_TIMEOUT, KAFKA_CONFIGURATION_KEY_MODE, KAFKA_PRODUCER_PARTITIONER, \
+    INFLUX_MAX_FIELD_LENGTH
 
+# The YAML module and its loader, imported on first use (the worker decodes JSON messages)
+YAML = {}
 
-def init_consumer(kafka_server, scope):
+
+# The InfluxDB client class, defined on first use to keep influxdb out of the startup imports
+INFLUX_CLIENT_CLASS = {}
+
+
+def get_influx_client_class():
+    """ Get the InfluxDB client class whose requests pass through the circuit breaker
+
+    Returns:
+        type: a subclass of `influxdb.InfluxDBClient`
+    """
+    if "class" not in INFLUX_CLIENT_CLASS:
+        from influxdb import InfluxDBClient
+
+        class InfluxClient(InfluxDBClient):
+            """InfluxDB client whose requests pass through the circuit breaker of InfluxDB"""
+
+            def request(self, *args, **kwargs):
+                return get_breaker("influxdb").call(
+                    lambda: super(InfluxClient, self).request(*args, **kwargs))
+
+        INFLUX_CLIENT_CLASS["class"] = InfluxClient
+    return INFLUX_CLIENT_CLASS["class"]
+
+
+def init_consumer(kafka_server, scope, enable_auto_commit=True):
     """ Init a Kafka consumer that consumes the optimization actions given scope (UC)
 
     See more: https://kafka-python.readthedocs.io/en/master/apidoc/KafkaConsumer.html
 
+    Args:
+        kafka_server (str): The host and port of the Kafka broker
+        scope (str): The application, e.g. executor
+        enable_auto_commit (bool): Commit the consumed offsets in the background. Disable it
+            to commit the offsets once the records are processed.
+
     Returns:
         Iterator:  A KafkaConsumer Iterator
     """
     consumer = KafkaConsumer(bootstrap_servers=kafka_server,
                              client_id=KAFKA_CLIENT_ID,
-                             enable_auto_commit=True,
+                             enable_auto_commit=enable_auto_commit,
                              api_version=KAFKA_API_VERSION,
                              group_id=KAFKA_GROUP_ID[scope])
     return consumer
 
 
-def init_producer():
+def init_listener(kafka_server, topic, auto_offset_reset='latest',
+                  consumer_timeout_ms=float('inf')):
+    """ Init a Kafka consumer that receives all the new messages of a topic (no consumer group)
+
+    See more: https://kafka-python.readthedocs.io/en/master/apidoc/KafkaConsumer.html
+
+    Args:
+        kafka_server (str): The host and port of the Kafka broker
+        topic (str): The topic
+        auto_offset_reset (str): Where to start from: 'latest' (new messages) or 'earliest'
+        consumer_timeout_ms (float): Stop the iteration after this idle time in ms
+
+    Returns:
+        Iterator:  A KafkaConsumer Iterator
+    """
+    consumer = KafkaConsumer(topic,
+                             bootstrap_servers=kafka_server,
+                             client_id=KAFKA_CLIENT_ID,
+                             api_version=KAFKA_API_VERSION,
+                             group_id=None,
+                             enable_auto_commit=False,
+                             auto_offset_reset=auto_offset_reset,
+                             consumer_timeout_ms=consumer_timeout_ms)
+    return consumer
+
+
+def init_producer(compression_type=None):
     """ Init a Kafka Producer
 
     See more: https://kafka-python.readthedocs.io/en/master/apidoc/KafkaProducer.html
 
+    Args:
+        compression_type (str, optional): The compression of the batches, e.g. "gzip"
+
     Returns:
         Iterator: the Kafka producer
     """
+    options = {}
+    if KAFKA_PRODUCER_PARTITIONER:
+        options["partitioner"] = load_callable(KAFKA_PRODUCER_PARTITIONER)
     producer = KafkaProducer(bootstrap_servers=KAFKA_SERVER,
                              api_version=KAFKA_API_VERSION,
+                             compression_type=compression_type,
                              value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                             key_serializer=lambda v: json.dumps(v).encode('utf-8'))
+                             key_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                             **options)
     return producer
 
 
+def load_callable(path):
+    """ Import a function given its path
+
+    Args:
+        path (str): The path as "module:function", e.g. "json:dumps"
+
+    Returns:
+        callable: the function
+    """
+    module_name, _, name = path.partition(':')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def get_configuration_key(entity, legacy_key=None):
+    """ Get the key of a configuration message according to the KAFKA_CONFIGURATION_KEY_MODE
+
+    The messages of the same entity share a key, so they are consumed in order while the
+    entities are spread over the partitions.
+
+    Args:
+        entity (str): The target entity, e.g. the VNF mac or "ns_name/vnf_index"
+        legacy_key (str, optional): The key of the legacy mode, e.g. "vce"
+
+    Returns:
+        str: the message key
+
+    Examples:
+        >>> from utils import get_configuration_key
+        >>> get_configuration_key("fa:16:3e:12:ab:01", legacy_key="vce")
+        'fa:16:3e:12:ab:01'
+    """
+    if KAFKA_CONFIGURATION_KEY_MODE == "legacy":
+        return legacy_key
+    return entity
+
+
+# The long-lived Kafka producers of the process per compression type
+PRODUCERS = {}
+PRODUCERS_LOCK = threading.Lock()
+
+
+def get_producer(compression_type=None):
+    """ Get the shared Kafka producer of the process for a compression type
+
+    The producer is thread-safe, so it is reused by all the publications instead of opening
+    a new connection per message.
+
+    Args:
+        compression_type (str, optional): The compression of the batches, e.g. "gzip"
+
+    Returns:
+        Iterator: the Kafka producer
+    """
+    with PRODUCERS_LOCK:
+        producer = PRODUCERS.get(compression_type, None)
+        if producer is None:
+            producer = PRODUCERS[compression_type] = init_producer(compression_type)
+        return producer
+
+
+def publish_message(topic, value, key=None, compression_type=None):
+    """ Publish a message in Kafka through the circuit breaker of the Kafka producer
+
+    Args:
+        topic (str): The Kafka topic
+        value (dict): The message
+        key (str, optional): The message key
+        compression_type (str, optional): The compression of the message, e.g. "gzip"
+
+    Returns:
+        bool: If the message published in kafka or not
+    """
+    def send():
+        # A failed send keeps the shared producer, since the other threads may be sending on
+        # it; the producer reconnects by itself and the breaker counts the failure
+        get_producer(compression_type).send(topic, value=value, key=key).get(timeout=5)
+
+    try:
+        get_breaker("kafka-producer").call(send)
+        return True
+    except Exception:
+        return False
+
+
 def init_producer_without_value_serialiazer():
     """ Init a Kafka Producer
 
@@ -54,6 +209,53 @@ def init_producer_without_value_serialiazer():
     return producer
 
 
+def decode_yaml(value):
+    """ Decode a YAML message, e.g. from the OSM Kafka bus, using the libyaml loader if any
+
+    Args:
+        value (bytes): The message value
+
+    Returns:
+        any: the decoded message
+    """
+    if "loader" not in YAML:
+        import yaml
+
+        # The libyaml loader is much faster than the pure-Python one; fall back if it is missing
+        YAML["module"] = yaml
+        YAML["loader"] = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return YAML["module"].load(value.decode('utf-8', 'ignore'), Loader=YAML["loader"])
+
+
+def peek_fields(value, fields):
+    """ Extract scalar fields of a YAML message without decoding the whole message
+
+    It supports both the block and the flow style. Only the first occurrence of each field is
+    kept, so use it on flat messages or on fields that are unique in the message.
+
+    Args:
+        value (bytes): The message value
+        fields (tuple): The field names
+
+    Returns:
+        dict: the found fields. The missing fields are not included.
+
+    Examples:
+        >>> from utils import peek_fields
+        >>> peek_fields(b"{nslcmop_id: 5d2b, nsr_id: 0c9e, operationState: COMPLETED}",
+        ...             ("nsr_id", "operationState"))
+        {'nsr_id': '0c9e', 'operationState': 'COMPLETED'}
+    """
+    text = value.decode('utf-8', 'ignore')
+    found = {}
+    for field in fields:
+        match = re.search(r'(?:^|[{,\s])' + re.escape(field) + r':\s+[\'"]?([^\'",}\s]+)',
+                          text)
+        if match is not None:
+            found[field] = match.group(1)
+    return found
+
+
 def get_host_type():
     """ Detect the type of the host machine
 
@@ -84,48 +286,46 @@ def init_influx_client():
     Returns:
         obj: the client
     """
-    influx_client = InfluxDBClient(host=INFLUX_DATABASES['default']['HOST'],
-                                   port=INFLUX_DATABASES['default']['PORT'],
-                                   username=INFLUX_DATABASES['default']['USERNAME'],
-                                   password=INFLUX_DATABASES['default']['PASSWORD'],
-                                   database=INFLUX_DATABASES['default']['NAME'], )
+    influx_client_class = get_influx_client_class()
+    influx_client = influx_client_class(host=INFLUX_DATABASES['default']['HOST'],
+                                        port=INFLUX_DATABASES['default']['PORT'],
+                                        username=INFLUX_DATABASES['default']['USERNAME'],
+                                        password=INFLUX_DATABASES['default']['PASSWORD'],
+                                        database=INFLUX_DATABASES['default']['NAME'],
+                                        timeout=INFLUX_TIMEOUT)
     return influx_client
 
 
-def compose_optimization_event(kafka_message, event):
+def compose_optimization_event(message, event):
     """ Compose the optimization event
 
     Args:
-        kafka_message (dict): The message from ns.instances.exec
+        message (ExecutionMessage): The message from ns.instances.exec
         event (str): The optimization event
 
     Returns:
         list: one optimization event
     """
-
-    vim = kafka_message.get('mano', {}).get('vim', {})
-    network_service = kafka_message.get('mano', {}).get('ns', {})
-    vnf = kafka_message.get('mano', {}).get('vnf', {})
-    timestamp = get_utcnow_timestamp()
-
     description = "Not set"
     if event not in ["vnf_scale_out", "vnf_scale_in"]:
-        value = kafka_message.get('execution', {}).get('value', "Not set")
-        description = "{}".format(value)
+        description = cap_field("{}".format(message.value if message.value is not None
+                                            else "Not set"))
 
     optimization_event = [
         {
             "measurement": "optimization_event",
-            "time": timestamp,
+            "time": get_utcnow_timestamp(),
             "tags": {
-                "vim_type": vim['type'],
-                "vim_name": vim.get('name'),
-                "ns_uuid": network_service['id']
+                "vim_type": message.vim_type,
+                "vim_name": message.vim_name,
+                "ns_uuid": message.ns_id
             },
             "fields": {
-                "source_origin": vim.get('tag', ""),
-                "ns_name": network_service.get('nsd_name', ""),
-                "vnf_name": "{}.{}".format(vnf.get('vnfd_name', ""), vnf.get('index', "")),
+                "source_origin": message.vim_tag or "",
+                "ns_name": message.nsd_name or "",
+                "vnf_name": "{}.{}".format(message.vnfd_name or "",
+                                           message.vnf_index if message.vnf_index is not None
+                                           else ""),
                 "metric": event,
                 "value": description
             }
@@ -134,6 +334,61 @@ def compose_optimization_event(kafka_message, event):
     return optimization_event
 
 
+def cap_field(value, max_length=INFLUX_MAX_FIELD_LENGTH):
+    """ Truncate a string field of a point, e.g. the value of a spectators profile
+
+    Args:
+        value (str): The field value
+        max_length (int): The max number of characters. Zero means no limit.
+
+    Returns:
+        str: the value or its first characters followed by the number of the dropped ones
+
+    Examples:
+        >>> from utils import cap_field
+        >>> cap_field("[0, 2, 4, 6]", max_length=6)
+        '[0, 2,...(+6)'
+    """
+    if not max_length or len(value) <= max_length:
+        return value
+    return '{}...(+{})'.format(value[:max_length], len(value) - max_length)
+
+
+def compose_skipped_event(message, event, reason, age=None):
+    """ Compose the event of an optimization action that was not applied
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        event (str): The optimization event
+        reason (str): Why the action was skipped, e.g. "expired"
+        age (float, optional): The age of the action in seconds
+
+    Returns:
+        list: one skipped optimization event
+    """
+    skipped_event = [
+        {
+            "measurement": "skipped_optimization_event",
+            "time": get_utcnow_timestamp(),
+            "tags": {
+                "vim_type": message.vim_type or "",
+                "vim_name": message.vim_name,
+                "ns_uuid": message.ns_id,
+                "reason": reason
+            },
+            "fields": {
+                "ns_name": message.nsd_name or "",
+                "vnf_name": "{}.{}".format(message.vnfd_name or "",
+                                           message.vnf_index if message.vnf_index is not None
+                                           else ""),
+                "metric": event,
+                "age": float(age) if age is not None else -1.0
+            }
+        }
+    ]
+    return skipped_event
+
+
 def get_utcnow_timestamp():
     """ Get the current timestamp in UTC
 
@@ -154,6 +409,19 @@ def get_one_hour_ago():
     return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
 
 
+def get_utc_timestamp_before(seconds):
+    """ Get the UTC timestamp some seconds ago
+
+    Args:
+        seconds (int): The seconds before now
+
+    Returns:
+        str: the timestamp, e.g. "2020-03-12T15:16:07.000000Z"
+    """
+    timestamp = datetime.utcnow() - timedelta(seconds=seconds)
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
 def generate_event_uuid():
     """ Generate the identifier of the event (FaaS)
 
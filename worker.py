@@ -14,270 +14,683 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import json
-import logging.config
-from utils import init_consumer, init_influx_client, compose_optimization_event
-from actions import scale as vnf_scale_action, vtranscoder_spectators
-from actions.vnf_configuration import vdns, vce, vtranscoder
+import time
+import signal
+import argparse
+import threading
+import importlib
+import functools
+import logging
+from runtime.startup import get_startup_timer, preload
+from kafka import TopicPartition
+from utils import init_consumer, compose_optimization_event, compose_skipped_event
 from actions.exceptions import VnfdUnexpectedStatusCode, ScalingGroupNotFound, \
     vCacheConfigurationFailed, VdnsConfigurationFailed, TranscoderProfileUpdateFailed, \
     TranscoderPlacementFailed, CompressionEngineConfigurationFailed, VnfScaleNotCompleted, \
-    TranscoderSpectatorsQualityConfigurationFailed, InvalidTranscoderSpectatorsQualities
-from plugins import faas_plugin
-from actions.utils import get_vcdn_net_interfaces
-from settings import KAFKA_EXECUTION_TOPIC, LOGGING, KAFKA_SERVER
+    TranscoderSpectatorsQualityConfigurationFailed, InvalidTranscoderSpectatorsQualities, \
+    VnfScaleNotAllowed, FaasBootstrapNotReady, FaasVnfNotFound, InvalidExecutionMessage, \
+    NsDescriptorNotFound, VimAccountNotFound, NsInstantiationNotCompleted, \
+    NsTerminationNotCompleted
+from actions.message import ExecutionMessage
+from influx import retention
+from influx.spool import spool
+from runtime import admin, metrics, operations, profiling
+from runtime.activity import activity
+from runtime.exceptions import CircuitBreakerOpen, LockTimeout, RequestOutcomeUnknown
+from runtime.locks import ns_locks
+from runtime.deadline import check_deadline
+from runtime.lanes import LaneRouter
+from runtime.offsets import OffsetTracker
+from runtime.retry import RetryScheduler
+from runtime.supervisor import Supervisor, get_partitions_shard
+from settings import KAFKA_EXECUTION_TOPIC, KAFKA_SERVER, EXECUTION_LANES, \
+    EXECUTION_DEFAULT_LANE, EXECUTION_OFFSETS, WORKER_PROCESSES, WORKER_REBALANCE_INTERVAL, OSM_OPERATIONS_LISTENER, \
+    ADMIN_API
+from runtime.logs import configure_logging
 
 APP = "worker"
 
-logging.config.dictConfig(LOGGING)
+configure_logging()
 logger = logging.getLogger(APP)
-
-
-def main():
-    """Main process"""
-    kafka_consumer = init_consumer(kafka_server=KAFKA_SERVER, scope=APP)
-    kafka_consumer.subscribe(pattern=KAFKA_EXECUTION_TOPIC)
-
-    for msg in kafka_consumer:
+startup = get_startup_timer(APP)
+startup.mark("imports")
+
+# The modules that the handlers import on first use (the actions and their NBI, HTTP, aiohttp
+# and influxdb clients), loaded by `warm_up`. The consumer needs kafka at startup, so it is
+# imported eagerly.
+DEFERRED_MODULES = ("nbiapi.identity", "actions.snapshot", "actions.scale", "actions.utils",
+                    "actions.vnf_configuration.vcache", "actions.vnf_configuration.vdns",
+                    "actions.vnf_configuration.vce", "actions.vnf_configuration.vtranscoder",
+                    "actions.vtranscoder_spectators", "actions.instantiate", "actions.terminate",
+                    "plugins.faas_plugin", "aionbiapi.identity", "aionbiapi.operation",
+                    "aionbiapi.vnf", "aionbiapi.vnfd", "aionbiapi.runner", "influxdb",
+                    "influxdb.line_protocol")
+
+
+def main(worker_index=None, workers=None):
+    """Main process
+
+    Args:
+        worker_index (int, optional): The index of the worker process (supervisor mode)
+        workers (int, optional): The number of the worker processes (supervisor mode)
+    """
+    if worker_index is not None:
+        # The forked worker process inherits the imports of the supervisor
+        startup.reset()
+    lanes = LaneRouter(EXECUTION_LANES, EXECUTION_DEFAULT_LANE)
+    # The failed actions return to their lane after their backoff delay
+    retries = RetryScheduler(
+        lambda message, action, failures, done: lanes.dispatch(
+            action, message.routing_key, execute, message, action, retries, failures, done))
+    # The offsets are committed once the actions are executed, not once they are enqueued
+    offsets = OffsetTracker(EXECUTION_OFFSETS['commit_interval'])
+    kafka_consumer = init_consumer(kafka_server=KAFKA_SERVER, scope=APP, enable_auto_commit=False)
+    startup.mark("consumer")
+    # Replay the InfluxDB writes that were spooled before a restart
+    spool.start()
+    retention.start()
+    admin.register("lanes", lanes.depths)
+    admin.register("retries", retries.pending)
+    admin.register("offsets", offsets.pending)
+    admin.register("instantiations", lambda: get_tracker("actions.instantiate").snapshot())
+    admin.register("terminations", lambda: get_tracker("actions.terminate").snapshot())
+    admin.start(port=ADMIN_API['port'] + (worker_index or 0))
+    profiling.install_signal_handlers()
+    if OSM_OPERATIONS_LISTENER:
+        operations.start_listener(operations.index)
+    startup.mark("services")
+    # The caches and the deferred modules are loaded while the consumer joins its group
+    warm_up()
+
+    # SIGTERM stops the consumption and drains the lanes
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        if workers is None:
+            kafka_consumer.subscribe(pattern=KAFKA_EXECUTION_TOPIC)
+            startup.ready()
+            while not stop.is_set():
+                consume(kafka_consumer, lanes, retries, offsets)
+        else:
+            consume_partitions_shard(kafka_consumer, lanes, retries, offsets, stop, worker_index,
+                                     workers)
+    finally:
+        retries.stop()
+        logger.info('Draining the execution lanes ({} actions in flight)'.format(
+            offsets.pending()))
+        lanes.stop(EXECUTION_OFFSETS['drain_timeout'])
+        offsets.commit(kafka_consumer, force=True)
+        kafka_consumer.close(autocommit=False)
+
+
+def consume(kafka_consumer, lanes, retries, offsets):
+    """ Poll the execution records, dispatch them to their lanes and commit the executed ones
+
+    The dispatch never blocks. The assigned partitions are paused while a lane is saturated,
+    so that the consumer keeps polling (and stays in its group) without reading more records.
+
+    Args:
+        kafka_consumer (obj): The Kafka consumer
+        lanes (LaneRouter): The execution lanes
+        retries (RetryScheduler): The scheduler of the failed actions
+        offsets (OffsetTracker): The records in flight
+    """
+    records = kafka_consumer.poll(timeout_ms=1000)
+    for messages in records.values():
+        for msg in messages:
+            process_record(msg, lanes, retries, offsets)
+    paused = kafka_consumer.paused()
+    if lanes.saturated():
+        if not paused:
+            logger.warning('The execution lanes are saturated. Consumption is paused.')
+            kafka_consumer.pause(*kafka_consumer.assignment())
+    elif paused:
+        logger.info('Consumption is resumed')
+        kafka_consumer.resume(*paused)
+    offsets.commit(kafka_consumer)
+
+
+def consume_partitions_shard(kafka_consumer, lanes, retries, offsets, stop, worker_index,
+                             workers):
+    """ Consume the partitions of the execution topic that are pinned to this worker process
+
+    The assignment is refreshed periodically to follow the new partitions of the topic.
+
+    Args:
+        kafka_consumer (obj): The Kafka consumer
+        lanes (LaneRouter): The execution lanes
+        retries (RetryScheduler): The scheduler of the failed actions
+        offsets (OffsetTracker): The records in flight
+        stop (threading.Event): Stops the consumption (set on SIGTERM)
+        worker_index (int): The index of the worker process
+        workers (int): The number of the worker processes
+    """
+    startup.ready()
+
+    assigned_partitions, checked_at = [], 0
+    while not stop.is_set():
+        if time.time() - checked_at > WORKER_REBALANCE_INTERVAL:
+            partitions = kafka_consumer.partitions_for_topic(KAFKA_EXECUTION_TOPIC) or set()
+            shard = get_partitions_shard(partitions, worker_index, workers)
+            if shard != assigned_partitions:
+                kafka_consumer.assign(
+                    [TopicPartition(KAFKA_EXECUTION_TOPIC, partition) for partition in shard])
+                assigned_partitions = shard
+                logger.info('Worker process #{} consumes the partitions {} of the topic '
+                            '{}'.format(worker_index, shard, KAFKA_EXECUTION_TOPIC))
+            checked_at = time.time()
+
+        if not assigned_partitions:
+            stop.wait(WORKER_REBALANCE_INTERVAL)
+            continue
+
+        consume(kafka_consumer, lanes, retries, offsets)
+
+
+def warm_up():
+    """ Fill the caches and import the deferred modules of the process in the background
+
+    It runs while the consumer joins its group, so that neither the startup nor the first
+    message waits for it.
+
+    Returns:
+        threading.Thread: the warm-up thread
+    """
+    def run():
+        started_at = time.time()
+        preloaded = preload(DEFERRED_MODULES)
         try:
-            # Process the message
-            message = json.loads(msg.value.decode('utf-8', 'ignore'))
-            # Get the action to be applied
-            action = message.get('execution', {}).get('planning', None)
-            if action is None:
-                continue
-
-            action_to_be_applied = message.get('analysis', {}).get('action', False)
-            if not action_to_be_applied:
-                continue
-
-            influx_client = init_influx_client()
-
-            if action == "vnf_scale_out":
-                try:
-                    ns_uuid = message.get('mano', {}).get('ns', {}).get('id', None)
-                    vnfd_uuid = message.get('mano', {}).get('vnf', {}).get('vnfd_id', None)
-                    vnf_index = message.get('mano', {}).get('vnf', {}).get('index', None)
-
-                    # Execute the scaling out - Launch new VDU
-                    vnf_scale = vnf_scale_action.Action(ns_uuid, vnfd_uuid)
-                    vnf_scale.apply(vnf_index, scale_action="scale_out")
-
-                    # Two steps must be performed when the new VM will be spawn and the edge
-                    # vCache will be operational:
-                    # (1) the mid vCache configuration, and
-                    # (2) the vDNS configuration
-                    # Both of them will be performed through the `osm_subscriber` after a
-                    # relevant event in the intra-OSM kafka bus `ns` topic.
-
-                    # Store the optimization events
-                    # influx_client = init_influx_client()
-                    optimization_event = compose_optimization_event(message, action)
-                    influx_client.write_points(optimization_event)
-
-                except (VnfdUnexpectedStatusCode, ScalingGroupNotFound, VnfScaleNotCompleted,
-                        vCacheConfigurationFailed,
-                        VdnsConfigurationFailed) as ex:
-                    logger.error(ex)
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "vnf_scale_in":
-                try:
-                    ns_uuid = message.get('mano', {}).get('ns', {}).get('id', None)
-                    vnfd_uuid = message.get('mano', {}).get('vnf', {}).get('vnfd_id', None)
-                    vnf_index = message.get('mano', {}).get('vnf', {}).get('index', None)
-
-                    # Discover the vcache_incremental_counter <N> & the CACHE_USER_IP for UC3
-                    net_interfaces, current_vdu_index = get_vcdn_net_interfaces(ns_uuid)
-                    edge_vcache_ip_user_net = net_interfaces.get('user', {}).get('ip-address', None)
-                    vcache_incremental_counter = int(current_vdu_index) + 1
-
-                    # Execute the scaling in - Remove VDU
-                    vnf_scale = vnf_scale_action.Action(ns_uuid, vnfd_uuid)
-                    vnf_scale.apply(vnf_index, scale_action="scale_in")
-                    # Remove existing entry in DNS for the new vCache
-                    vdns_conf = vdns.Configuration(edge_vcache_ip_user_net)
-                    vdns_conf.delete_vcache_entry(vcache_incremental_counter)
-
-                    # Store the optimization events
-                    # influx_client = init_influx_client()
-                    optimization_event = compose_optimization_event(message, action)
-                    influx_client.write_points(optimization_event)
-
-                except (VnfdUnexpectedStatusCode, ScalingGroupNotFound, VnfScaleNotCompleted,
-                        VdnsConfigurationFailed) as ex:
-                    logger.error(ex)
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "faas_vnf_scale_out":
-                try:
-                    ns_name = message.get('mano', {}).get('ns', {}).get('name', None)
-                    ns_uuid = message.get('mano', {}).get('ns', {}).get('id', None)
-                    vnfd_uuid = message.get('mano', {}).get('vnf', {}).get('vnfd_id', None)
-
-                    logger.info('Scale out action was sent by the SS-CNO for the vCDN service {} '
-                                'and uuid {}'.format(ns_name, ns_uuid))
-
-                    # Apply faas scale out action
-                    faas_plugin.execute_faas_vnf_scale_out(ns_name, ns_uuid, vnfd_uuid)
-                    # Store the optimization events
-                    optimization_event = compose_optimization_event(message, action)
-                    influx_client.write_points(optimization_event)
-                    logger.info('Event was stored in the database')
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "faas_vnf_scale_in":
-                # future usage: use terminate operation
-                try:
-                    ns_name = message.get('mano', {}).get('ns', {}).get('name', None)
-                    ns_uuid = message.get('mano', {}).get('ns', {}).get('id', None)
-                    vnfd_uuid = message.get('mano', {}).get('vnf', {}).get('vnfd_id', None)
-
-                    logger.info('Scale in action was sent by the SS-CNO for the vCDN service {} '
-                                'and uuid {}'.format(ns_name, ns_uuid))
-
-                    # Apply faas scale in action
-                    faas_plugin.execute_faas_vnf_scale_in(ns_name, ns_uuid, vnfd_uuid)
-                    # Store the optimization events
-                    optimization_event = compose_optimization_event(message, action)
-                    influx_client.write_points(optimization_event)
-                    logger.info('Event was stored in the database')
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "set_vce_bitrate":
-                try:
-                    # Pick the profile or bitrate value
-                    bitrate = message.get('execution', {}).get('value', None)
-                    # fixme: when vCE is deployed through OSM
-                    vdu_uuid = message.get('execution', {}).get('mac', None)
-
-                    if int(bitrate) < 0:
-                        logger.warning(
-                            "The suggested vCE bitrate is negative (actual value: {})".format(
-                                bitrate))
-                        continue
-
-                    # Apply the new vCE profile
-                    configuration = vce.Configuration(vdu_uuid)
-                    completed = configuration.set_bitrate(bitrate)
-                    if not completed:
-                        raise CompressionEngineConfigurationFailed('Failed to set the vCE profile')
-
-                    # Store the optimization events
-                    # optimization_event = compose_optimization_event(message, action)
-                    # influx_client.write_points(optimization_event)
-
-                except CompressionEngineConfigurationFailed as ex:
-                    logger.error(ex)
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "set_vtranscoder_profile":
-                try:
-                    # Pick the profiles
-                    qualities = message.get('execution', {}).get('value', [])
-                    ns_name = message.get('mano', {}).get('ns', {}).get('name', None)
-                    vnfd_name = message.get('mano', {}).get('vnf', {}).get('vnfd_name', None)
-                    vnf_index = message.get('mano', {}).get('vnf', {}).get('index', None)
-
-                    # Apply the new vTranscoder profile
-                    configuration = vtranscoder.Configuration(ns_name, vnfd_name, vnf_index)
-                    completed = configuration.set_transcoder_profile(tuple(qualities))
-                    logger.debug(
-                        "Action {} with status {}. Configuration: {}".format(action, completed,
-                                                                             qualities))
-                    if not completed:
-                        raise TranscoderProfileUpdateFailed(
-                            'Failed to set the vTranscoder qualities {}'.format(qualities))
-
-                    # Store the optimization events
-                    # influx_client = init_influx_client()
-                    optimization_event = compose_optimization_event(message, action)
-                    influx_client.write_points(optimization_event)
-
-                except TranscoderProfileUpdateFailed as ex:
-                    logger.error(ex)
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "set_vtranscoder_processing_unit":
-                try:
-                    # Pick the processor: "cpu|gpu"
-                    processor = message.get('execution', {}).get('value', "cpu")
-                    ns_name = message.get('mano', {}).get('ns', {}).get('name', None)
-                    vnfd_name = message.get('mano', {}).get('vnf', {}).get('vnfd_name', None)
-                    vnf_index = message.get('mano', {}).get('vnf', {}).get('index', None)
-
-                    # Transcoder placement (CPU or GPU)
-                    configuration = vtranscoder.Configuration(ns_name, vnfd_name, vnf_index)
-                    completed = configuration.apply_placement(processor=processor)
-                    logger.debug(
-                        "Action {} with status {}. Configuration: {}".format(action, completed,
-                                                                             processor))
-                    if not completed:
-                        raise TranscoderPlacementFailed(
-                            "Failed apply the vTranscoder placement in {} processor".format(
-                                processor))
-
-                    # Store the optimization events
-                    # influx_client = init_influx_client()
-                    optimization_event = compose_optimization_event(message, action)
-                    influx_client.write_points(optimization_event)
-
-                except TranscoderPlacementFailed as ex:
-                    logger.error(ex)
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "set_vtranscoder_client_profile":
-                try:
-                    # Fetch the spectators profile
-                    spectators_qualities = message.get('execution', {}).get('value', {})
-                    if not len(spectators_qualities.keys()) or \
-                            spectators_qualities.get('clients', None) is None or \
-                            not len(spectators_qualities['clients']):
-                        raise InvalidTranscoderSpectatorsQualities(
-                            'Invalid input for the spectators qualities in vTranscoder{}'.format(
-                                spectators_qualities))
-                    configuration = vtranscoder_spectators.Configuration(spectators_qualities)
-                    completed = configuration.set_spectators_profile()
-                    logger.debug(
-                        "Action {} with status {}. Configuration: {}".format(action, completed,
-                                                                             spectators_qualities))
-                    if not completed:
-                        raise TranscoderSpectatorsQualityConfigurationFailed(
-                            'Failed to set the spectators qualities in vTranscoder{}'.format(
-                                spectators_qualities))
-                except TranscoderSpectatorsQualityConfigurationFailed as ex:
-                    logger.error(ex)
-                except InvalidTranscoderSpectatorsQualities as ex:
-                    logger.error(ex)
-                except Exception as ex:
-                    logger.exception(ex)
-
-            elif action == "ns_scale":
-                # TODO: future usage
-                pass
-
-            elif action == "ns_instantiate":
-                # TODO: future usage
-                pass
-
-            elif action == "ns_terminate":
-                # TODO: future usage
-                pass
-
-            # raise Exception('Action {} is not supported'.format(action))
-
-        except json.decoder.JSONDecodeError as ex:
-            logger.warning("JSONDecodeError: {}".format(ex))
+            from nbiapi.identity import get_bearer_token
+            get_bearer_token()
+            logger.info('The caches were warmed up in {:.3f} seconds ({:.3f} seconds to import '
+                        'the deferred modules)'.format(time.time() - started_at, preloaded))
         except Exception as ex:
+            logger.error('Failed to warm up the caches: {}'.format(ex))
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_tracker(module):
+    """ Get the tracker of the NS lifecycle operations of an action module
+
+    Args:
+        module (str): The action module, e.g. "actions.instantiate"
+
+    Returns:
+        LifecycleTracker: the tracker of the module
+    """
+    return importlib.import_module(module).tracker
+
+
+def process_record(msg, lanes, retries, offsets):
+    """ Decode an execution message and dispatch it to its lane
+
+    The record stays in flight until its action ends for good (see `execute`); the skipped
+    records are done at once.
+
+    Args:
+        msg (obj): The Kafka record
+        lanes (LaneRouter): The execution lanes
+        retries (RetryScheduler): The scheduler of the failed actions
+        offsets (OffsetTracker): The records in flight
+    """
+    startup.first_message()
+    offsets.consumed(msg)
+    dispatched = False
+    try:
+        # Extract the fields of the message once
+        message = ExecutionMessage.from_record(msg.value)
+        # Get the action to be applied
+        action = message.planning
+        if action is None or action not in HANDLERS:
+            return
+        if not message.to_be_applied:
+            return
+        message.validate()
+
+        # Fast configuration actions never wait behind the slow lifecycle actions
+        lanes.dispatch(action, message.routing_key, execute, message, action, retries, (),
+                       functools.partial(offsets.done, msg))
+        dispatched = True
+
+    except InvalidExecutionMessage as ex:
+        logger.warning("Invalid execution message: {}".format(ex))
+        metrics.increment('messages_rejected')
+    except Exception as ex:
+        logger.exception(ex)
+    finally:
+        if not dispatched:
+            offsets.done(msg)
+
+
+def execute(message, action, retries=None, failures=(), done=None):
+    """ Apply an optimization action, unless it is expired
+
+    If the action fails, it is rescheduled. The actions that can never succeed (e.g.
+    invalid input, not allowed scaling) are not retried.
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        retries (RetryScheduler, optional): The scheduler of the failed actions
+        failures (tuple): The context of the previous failed attempts
+        done (callable, optional): Called once the action ends for good: it is applied,
+            skipped, not retried or dead-lettered (e.g. it marks its Kafka record as executed).
+            A rescheduled action carries it to its next attempt.
+    """
+    rescheduled = False
+    try:
+        rescheduled = apply_action(message, action, retries, failures, done)
+    finally:
+        if done is not None and not rescheduled:
+            done()
+
+
+def apply_action(message, action, retries, failures, done):
+    """ Apply an optimization action, or reschedule it on failure
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        retries (RetryScheduler, optional): The scheduler of the failed actions
+        failures (tuple): The context of the previous failed attempts
+        done (callable, optional): Passed to the retry scheduler with a rescheduled action
+
+    Returns:
+        bool: True if the action was passed to the retry scheduler
+    """
+    # The events are spooled on disk, so the actions never wait for InfluxDB
+    influx_client = spool
+
+    # Skip the stale decisions (e.g. after a backlog) before any upstream call
+    expired, age = check_deadline(message.timestamp, action)
+    if expired:
+        logger.warning('The action {} for the NS {} expired {:.1f} seconds after its '
+                       'decision. It is skipped.'.format(action, message.ns_id, age))
+        metrics.increment('actions_expired', planning=action)
+        skipped_event = compose_skipped_event(message, action, "expired", age=age)
+        influx_client.write_points(skipped_event, retention_policy=retention.RAW_POLICY)
+        return False
+
+    # The lifecycle actions of a NS do not overlap with the configuration flows of the NS
+    ns_uuid = message.ns_id if action in NS_LOCKED_ACTIONS else None
+
+    activity.start(message.routing_key, action, step="waiting_lock")
+    try:
+        with ns_locks.hold(ns_uuid):
+            activity.step("running")
+            profiling.run(HANDLERS[action], message, action, influx_client)
+    except NOT_RETRIED_ERRORS as ex:
+        logger.error(ex)
+    except Exception as ex:
+        if not isinstance(ex, EXPECTED_ERRORS):
             logger.exception(ex)
+        if retries is not None:
+            retries.schedule(message, action, failures, ex, done)
+            return True
+    finally:
+        activity.finish()
+    return False
+
+
+def store_optimization_event(influx_client, message, action):
+    """ Store the optimization event of an applied action
+
+    A failure is logged; the action is not retried since it has been applied.
+
+    Args:
+        influx_client (Spool): The spool of the InfluxDB writes
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+    """
+    try:
+        optimization_event = compose_optimization_event(message, action)
+        influx_client.write_points(optimization_event, retention_policy=retention.RAW_POLICY)
+    except Exception as ex:
+        logger.error('Failed to store the optimization event of {}: {}'.format(action, ex))
+
+
+def vnf_scale_out(message, action, influx_client):
+    """ Scale out a regular edge vCache VNF
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions import scale as vnf_scale_action
+    from actions.snapshot import NsSnapshot
+
+    ns_uuid = message.ns_id
+    vnfd_uuid = message.vnfd_id
+    vnf_index = message.vnf_index
+
+    # Fetch the NBI resources of the action concurrently
+    snapshot = NsSnapshot(ns_uuid)
+    vnf_scale_action.prefetch_resources(snapshot, vnfd_uuid)
+
+    # Execute the scaling out - Launch new VDU
+    activity.step("scaling")
+    vnf_scale = vnf_scale_action.Action(ns_uuid, vnfd_uuid, snapshot=snapshot)
+    vnf_scale.apply(vnf_index, scale_action="scale_out")
+
+    # Two steps must be performed when the new VM will be spawn and the edge
+    # vCache will be operational:
+    # (1) the mid vCache configuration, and
+    # (2) the vDNS configuration
+    # Both of them will be performed through the `osm_subscriber` after a
+    # relevant event in the intra-OSM kafka bus `ns` topic.
+
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+
+
+def vnf_scale_in(message, action, influx_client):
+    """ Scale in a regular edge vCache VNF
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions import scale as vnf_scale_action
+    from actions.snapshot import NsSnapshot
+    from actions.utils import get_vcdn_net_interfaces, get_ip_address
+    from actions.vnf_configuration import vcache, vdns
+    from httpclient.client import release_upstream
+
+    ns_uuid = message.ns_id
+    vnfd_uuid = message.vnfd_id
+    vnf_index = message.vnf_index
+
+    # The NBI resources of the NS are fetched once (concurrently) for the whole action
+    snapshot = NsSnapshot(ns_uuid)
+    vnf_scale_action.prefetch_resources(snapshot, vnfd_uuid)
+
+    # Discover the vcache_incremental_counter <N> & the CACHE_USER_IP for UC3
+    net_interfaces, current_vdu_index = get_vcdn_net_interfaces(ns_uuid, snapshot=snapshot)
+    vcache_incremental_counter = int(current_vdu_index) + 1
+
+    # Execute the scaling in - Remove VDU
+    activity.step("scaling")
+    vnf_scale = vnf_scale_action.Action(ns_uuid, vnfd_uuid, snapshot=snapshot)
+    vnf_scale.apply(vnf_index, scale_action="scale_in")
+    # The removed edge vCache is the one with the greatest count-index
+    edge_vcache_ip_mgmt_net = get_ip_address(net_interfaces.get('edge'), '5GMEDIA_MGMT_NET')
+    if edge_vcache_ip_mgmt_net is not None:
+        release_upstream(vcache.get_upstream(edge_vcache_ip_mgmt_net))
+
+    # Remove existing entry in DNS for the new vCache. The VDU is already removed, so a
+    # failure must not retry the scaling in.
+    activity.step("configuring_vdns")
+    try:
+        vdns_conf = vdns.Configuration()
+        vdns_conf.delete_vcache_entry(vcache_incremental_counter)
+    except VdnsConfigurationFailed as ex:
+        logger.error(ex)
+
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+
+
+def faas_vnf_scale_out(message, action, influx_client):
+    """ Scale out a FaaS edge vCache VNF
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    ns_name = message.ns_name
+    ns_uuid = message.ns_id
+    vnfd_uuid = message.vnfd_id
+
+    logger.info('Scale out action was sent by the SS-CNO for the vCDN service {} '
+                'and uuid {}'.format(ns_name, ns_uuid))
+
+    from plugins import faas_plugin
+    # Apply faas scale out action
+    faas_plugin.execute_faas_vnf_scale_out(ns_name, ns_uuid, vnfd_uuid)
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+    logger.info('Event was stored in the database')
+
+
+def faas_vnf_scale_in(message, action, influx_client):
+    """ Scale in a FaaS edge vCache VNF
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    # future usage: use terminate operation
+    ns_name = message.ns_name
+    ns_uuid = message.ns_id
+    vnfd_uuid = message.vnfd_id
+
+    logger.info('Scale in action was sent by the SS-CNO for the vCDN service {} '
+                'and uuid {}'.format(ns_name, ns_uuid))
+
+    from plugins import faas_plugin
+    # Apply faas scale in action
+    faas_plugin.execute_faas_vnf_scale_in(ns_name, ns_uuid, vnfd_uuid)
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+    logger.info('Event was stored in the database')
+
+
+def set_vce_bitrate(message, action, influx_client):
+    """ Set the bitrate of a vCE
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions.vnf_configuration import vce
+
+    # Pick the profile or bitrate value
+    bitrate = message.value
+    # fixme: when vCE is deployed through OSM
+    vdu_uuid = message.mac
+
+    if int(bitrate) < 0:
+        logger.warning(
+            "The suggested vCE bitrate is negative (actual value: {})".format(bitrate))
+        return
+
+    # Apply the new vCE profile
+    configuration = vce.Configuration(vdu_uuid)
+    completed = configuration.set_bitrate(bitrate)
+    if not completed:
+        raise CompressionEngineConfigurationFailed('Failed to set the vCE profile')
+
+    # Store the optimization events
+    # store_optimization_event(influx_client, message, action)
+
+
+def set_vtranscoder_profile(message, action, influx_client):
+    """ Set the produced profiles of a vTranscoder
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions.vnf_configuration import vtranscoder
+
+    # Pick the profiles
+    qualities = message.value
+    ns_name = message.ns_name
+    vnfd_name = message.vnfd_name
+    vnf_index = message.vnf_index
+
+    # Apply the new vTranscoder profile
+    configuration = vtranscoder.Configuration(ns_name, vnfd_name, vnf_index)
+    completed = configuration.set_transcoder_profile(tuple(qualities))
+    logger.debug(
+        "Action {} with status {}. Configuration: {}".format(action, completed, qualities))
+    if not completed:
+        raise TranscoderProfileUpdateFailed(
+            'Failed to set the vTranscoder qualities {}'.format(qualities))
+
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+
+
+def set_vtranscoder_processing_unit(message, action, influx_client):
+    """ Place a vTranscoder in CPU or GPU
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions.vnf_configuration import vtranscoder
+
+    # Pick the processor: "cpu|gpu"
+    processor = message.value if message.value is not None else "cpu"
+    ns_name = message.ns_name
+    vnfd_name = message.vnfd_name
+    vnf_index = message.vnf_index
+
+    # Transcoder placement (CPU or GPU)
+    configuration = vtranscoder.Configuration(ns_name, vnfd_name, vnf_index)
+    completed = configuration.apply_placement(processor=processor)
+    logger.debug(
+        "Action {} with status {}. Configuration: {}".format(action, completed, processor))
+    if not completed:
+        raise TranscoderPlacementFailed(
+            "Failed apply the vTranscoder placement in {} processor".format(processor))
+
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+
+
+def set_vtranscoder_client_profile(message, action, influx_client):
+    """ Set the qualities of the vTranscoder spectators
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions import vtranscoder_spectators
+
+    # Fetch the spectators profile
+    spectators_qualities = message.value
+    if not isinstance(spectators_qualities, dict) or not len(spectators_qualities.keys()) or \
+            spectators_qualities.get('clients', None) is None or \
+            not len(spectators_qualities['clients']):
+        raise InvalidTranscoderSpectatorsQualities(
+            'Invalid input for the spectators qualities in vTranscoder{}'.format(
+                spectators_qualities))
+    configuration = vtranscoder_spectators.Configuration(spectators_qualities)
+    completed = configuration.set_spectators_profile()
+    logger.debug(
+        "Action {} with status {}. Configuration: {}".format(action, completed,
+                                                             spectators_qualities))
+    if not completed:
+        raise TranscoderSpectatorsQualityConfigurationFailed(
+            'Failed to set the spectators qualities in vTranscoder{}'.format(
+                spectators_qualities))
+
+
+def ns_scale(message, action, influx_client):
+    # TODO: future usage
+    pass
+
+
+def ns_instantiate(message, action, influx_client):
+    """ Instantiate a NS and track its completion in the background
+
+    The NSD and the VIM account are resolved from the cached catalog indexes. The handler
+    returns once the NBI accepts the instantiation; its completion (`instantiated` event)
+    and the phase timings are recorded by the tracker, so that several instantiations can
+    be in flight.
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions import instantiate as ns_instantiate_action
+
+    activity.step("instantiating")
+    ns_instantiation = ns_instantiate_action.Action(message.nsd_name, message.ns_name,
+                                                     message.vim_name)
+    instantiation = ns_instantiation.execute()
+    ns_instantiate_action.tracker.track(instantiation)
+
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+
+
+def ns_terminate(message, action, influx_client):
+    """ Terminate a NS and clean up its vDNS entries, FaaS VNFs and InfluxDB series
+
+    The cleanup tasks run concurrently once the NBI accepts the termination. The end of the
+    teardown (`terminated` event) and the total time are recorded by the tracker.
+
+    Args:
+        message (ExecutionMessage): The message from ns.instances.exec
+        action (str): The planning type
+        influx_client (Spool): The spool of the InfluxDB writes
+    """
+    from actions import terminate as ns_terminate_action
+
+    activity.step("terminating")
+    ns_termination = ns_terminate_action.Action(message.ns_id, ns_name=message.ns_name)
+    termination = ns_termination.execute()
+    ns_terminate_action.tracker.track(termination)
+
+    # Store the optimization events
+    store_optimization_event(influx_client, message, action)
+
+
+# The failures that are logged without traceback
+EXPECTED_ERRORS = (VnfdUnexpectedStatusCode, VnfScaleNotCompleted, vCacheConfigurationFailed,
+                   VdnsConfigurationFailed, TranscoderProfileUpdateFailed,
+                   TranscoderPlacementFailed, CompressionEngineConfigurationFailed,
+                   TranscoderSpectatorsQualityConfigurationFailed, FaasBootstrapNotReady,
+                   NsInstantiationNotCompleted, NsTerminationNotCompleted, CircuitBreakerOpen,
+                   LockTimeout)
+
+# The failures that a new attempt cannot fix
+NOT_RETRIED_ERRORS = (ScalingGroupNotFound, VnfScaleNotAllowed,
+                      InvalidTranscoderSpectatorsQualities, FaasVnfNotFound, NsDescriptorNotFound,
+                      VimAccountNotFound, RequestOutcomeUnknown, ValueError)
+
+# The handler per planning type
+HANDLERS = {
+    "vnf_scale_out": vnf_scale_out,
+    "vnf_scale_in": vnf_scale_in,
+    "faas_vnf_scale_out": faas_vnf_scale_out,
+    "faas_vnf_scale_in": faas_vnf_scale_in,
+    "set_vce_bitrate": set_vce_bitrate,
+    "set_vtranscoder_profile": set_vtranscoder_profile,
+    "set_vtranscoder_processing_unit": set_vtranscoder_processing_unit,
+    "set_vtranscoder_client_profile": set_vtranscoder_client_profile,
+    "ns_scale": ns_scale,
+    "ns_instantiate": ns_instantiate,
+    "ns_terminate": ns_terminate,
+}
+
+# The planning types that hold the lock of their NS
+NS_LOCKED_ACTIONS = ("vnf_scale_out", "vnf_scale_in", "faas_vnf_scale_out", "faas_vnf_scale_in",
+                     "ns_scale", "ns_instantiate", "ns_terminate")
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Execute the optimization actions')
+    parser.add_argument('--processes', type=int, default=WORKER_PROCESSES,
+                        help='The number of worker processes, sharded by Kafka partition')
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        Supervisor(main, args.processes).run()
+    else:
+        main()